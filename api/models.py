@@ -2,9 +2,11 @@
 Pydantic models for API requests and responses.
 """
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
 from datetime import datetime
 
+from api.projection import COMPACT_VEHICLE_SCHEMA
+
 
 class ChatRequest(BaseModel):
     """Request model for chat endpoint."""
@@ -25,6 +27,7 @@ class ChatResponse(BaseModel):
     quick_replies: Optional[List[str]] = None  # Short answer options (1-3 words, 2-4 options)
     suggested_followups: List[str] = []  # Suggested next queries (short phrases, 3-5 options)
     comparison_table: Optional[Dict[str, Any]] = None  # Comparison table when user asks to compare vehicles
+    vehicle_schema: str = COMPACT_VEHICLE_SCHEMA  # "compact-v1" projection, or "full" with ?detail=full
 
 
 class SessionResponse(BaseModel):
@@ -34,6 +37,31 @@ class SessionResponse(BaseModel):
     preferences: Dict[str, Any]
     vehicles: List[Dict[str, Any]]
     conversation_history: List[Dict[str, Any]]
+    vehicle_schema: str = COMPACT_VEHICLE_SCHEMA
+
+
+class VehicleResponse(BaseModel):
+    """Response model for the per-VIN vehicle detail endpoint."""
+    vin: str
+    source: str  # "session" (as recommended, with ranking/photo data) or "catalog"
+    vehicle: Dict[str, Any]
+
+
+class FacetRequest(BaseModel):
+    """Request model for catalog facet counts."""
+    fields: Optional[List[str]] = None  # Facets to count (default: make, body_style, fuel_type, price)
+    filters: Optional[Dict[str, Union[str, int, float, None]]] = None  # Filters to count under (default: the session's filters); multiple values as "Honda,Toyota"
+    session_id: Optional[str] = None  # Use this session's filters and location
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    limit: Optional[int] = Field(default=None, ge=1)  # Most common values kept per categorical facet
+
+
+class FacetResponse(BaseModel):
+    """Response model for catalog facet counts."""
+    total: int  # Listings matching all filters
+    facets: Dict[str, List[Dict[str, Any]]]  # field -> [{"value", "count"}], each counted without its own filter
+    filters: Dict[str, Any]  # Filters the counts were computed under
 
 
 class ResetRequest(BaseModel):
@@ -0,0 +1,74 @@
+"""
+Response projections for vehicle listings.
+
+Recommendation payloads carry everything the agent used: the raw listing
+(``_original``), ranking scores, photo payloads and fields the web UI never
+shows. API responses send a compact projection instead, keeping the
+Auto.dev-style nesting (``vehicle`` / ``retailListing``) that clients already
+read. ``detail=full`` returns the complete payloads.
+"""
+from typing import Any, Dict, Iterable, List, Literal
+
+from idss_agent.tools.local_vehicle_store import LazyListingPayload
+
+VehicleDetail = Literal["compact", "full"]
+
+# Schema identifiers reported in responses; bump the compact version when its fields change
+COMPACT_VEHICLE_SCHEMA = "compact-v1"
+FULL_VEHICLE_SCHEMA = "full"
+
+_VEHICLE_FIELDS = (
+    "vin", "year", "make", "model", "trim", "bodyStyle", "drivetrain", "engine", "fuel",
+    "transmission", "doors", "seats", "exteriorColor", "interiorColor",
+)
+
+_LISTING_FIELDS = (
+    "price", "listPrice", "miles", "dealer", "city", "state", "zip", "vdp", "carfaxUrl",
+    "primaryImage", "photoCount", "used", "cpo",
+)
+
+
+def _pick(source: Any, fields: Iterable[str]) -> Dict[str, Any]:
+    if not isinstance(source, dict):
+        return {}
+    return {field: source[field] for field in fields if source.get(field) is not None}
+
+
+def compact_vehicle(vehicle: Dict[str, Any]) -> Dict[str, Any]:
+    """Project a listing onto the compact schema; empty fields are omitted."""
+    details = _pick(vehicle.get("vehicle"), _VEHICLE_FIELDS)
+    return {
+        "vin": vehicle.get("vin") or details.get("vin"),
+        "vehicle": details,
+        "retailListing": _pick(vehicle.get("retailListing"), _LISTING_FIELDS),
+    }
+
+
+def full_vehicle(vehicle: Dict[str, Any]) -> Dict[str, Any]:
+    """Complete payload, including the raw listing of lazily loaded rows."""
+    if isinstance(vehicle, LazyListingPayload):
+        # Materialize a copy so the session's listing stays lean
+        return vehicle.copy().materialize()
+    return vehicle
+
+
+def project_vehicles(vehicles: Iterable[Dict[str, Any]], detail: VehicleDetail = "compact") -> List[Dict[str, Any]]:
+    """Project a list of listings for an API response."""
+    project = full_vehicle if detail == "full" else compact_vehicle
+    return [project(vehicle) for vehicle in vehicles]
+
+
+def vehicle_schema(detail: VehicleDetail) -> str:
+    """Schema identifier for responses built with ``detail``."""
+    return FULL_VEHICLE_SCHEMA if detail == "full" else COMPACT_VEHICLE_SCHEMA
+
+
+__all__ = [
+    "COMPACT_VEHICLE_SCHEMA",
+    "FULL_VEHICLE_SCHEMA",
+    "VehicleDetail",
+    "compact_vehicle",
+    "full_vehicle",
+    "project_vehicles",
+    "vehicle_schema",
+]
@@ -7,22 +7,39 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Dict, Optional, List, Any
+from typing import Callable, Dict, Optional, List, Any
 import uuid
 from datetime import datetime
 from dotenv import load_dotenv
 import asyncio
-import concurrent.futures
+from concurrent.futures import Future, ThreadPoolExecutor
 import json
 from sse_starlette.sse import EventSourceResponse
-import requests
 import logging
 
 load_dotenv()
 
 from idss_agent import run_agent, create_initial_state, VehicleSearchState
+from idss_agent.core.request_analyzer import get_fast_path_metrics
+from idss_agent.core.supervisor import shutdown_supervisor_executor
+from idss_agent.processing.recommendation import (
+    close_local_vehicle_stores,
+    get_facet_counts,
+    get_vehicle_by_vin,
+    warm_catalog_ranking_index,
+)
+from idss_agent.processing.vector_ranker import close_embedding_stores
+from idss_agent.tools.local_vehicle_store import DEFAULT_FACETS
+from idss_agent.tools.zipcode_lookup import find_nearest_zipcode, warm_zipcode_index
+from idss_agent.utils.config import get_config
+from idss_agent.utils.llm_registry import close_llm_registry, get_llm_registry
+from idss_agent.utils.streaming import is_response_delta
+from api.projection import VehicleDetail, full_vehicle, project_vehicles, vehicle_schema
+from api.session_locks import SessionLocks
+from api.session_store import create_session_store
 from api.models import (
     ChatRequest,
     ChatResponse,
@@ -32,7 +49,10 @@ from api.models import (
     EventRequest,
     EventResponse,
     EventsResponse,
-    FavoriteRequest
+    FacetRequest,
+    FacetResponse,
+    FavoriteRequest,
+    VehicleResponse,
 )
 
 required_env_vars = ["OPENAI_API_KEY", "AUTODEV_API_KEY"]
@@ -42,11 +62,36 @@ if missing_vars:
     print("  Please set them in your .env file or environment")
     exit(1)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks."""
+    # Bounded session storage (in-memory LRU or SQLite-backed, see server.session_store in config)
+    app.state.session_store = create_session_store()
+    # Shared, bounded pool running agent turns; requests beyond max_workers queue instead of spawning threads
+    app.state.agent_executor = ThreadPoolExecutor(
+        max_workers=get_config().get('server.agent_workers', 16),
+        thread_name_prefix="agent",
+    )
+    # Load the catalog embedding index up front so the first request doesn't pay for it
+    await asyncio.to_thread(warm_catalog_ranking_index)
+    # Same for the ZIP table (memory-mapped) and the nearest-ZIP index used for browser coordinates
+    await asyncio.to_thread(warm_zipcode_index)
+    yield
+    app.state.agent_executor.shutdown(wait=False, cancel_futures=True)
+    # Release pooled SQLite connections held by the local vehicle store
+    close_local_vehicle_stores()
+    close_embedding_stores()
+    close_llm_registry()
+    shutdown_supervisor_executor()
+    app.state.session_store.close()
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="IDSS API",
     description="IDSS API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Enable CORS for frontend
@@ -62,68 +107,80 @@ app.add_middleware(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-sessions: Dict[str, VehicleSearchState] = {}
+
+# Serializes turns and updates per session; different sessions run in parallel
+session_locks = SessionLocks()
 
 # Helper Functions
 def reverse_geocode(latitude: float, longitude: float) -> Optional[str]:
     """
-    Convert latitude/longitude to ZIP code using OpenStreetMap Nominatim API.
-    
+    Convert latitude/longitude to the nearest ZIP code (offline, in-process).
+
     Args:
         latitude: Latitude coordinate
         longitude: Longitude coordinate
-    
+
     Returns:
-        5-digit ZIP code string, or None if geocoding fails
+        5-digit ZIP code string, or None if no ZIP code is within
+        ``server.reverse_geocode_max_miles``
     """
     try:
-        # Use OpenStreetMap Nominatim API (free, no API key required)
-        url = "https://nominatim.openstreetmap.org/reverse"
-        params = {
-            "lat": latitude,
-            "lon": longitude,
-            "format": "json",
-            "addressdetails": 1
-        }
-        headers = {
-            "User-Agent": "IDSS-Agent/1.0"  # Required by Nominatim
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=5)
-        response.raise_for_status()
-        
-        data = response.json()
-        address = data.get("address", {})
-        
-        # Try to extract ZIP code from various possible fields
-        zip_code = (
-            address.get("postcode") or
-            address.get("postal_code") or
-            address.get("zip") or
-            address.get("zipcode")
+        return find_nearest_zipcode(
+            latitude,
+            longitude,
+            max_distance_miles=get_config().get('server.reverse_geocode_max_miles', 50),
         )
-        
-        if zip_code:
-            # Ensure it's a 5-digit ZIP code (US format)
-            # Extract first 5 digits if longer
-            zip_code = zip_code.split("-")[0].split()[0]
-            if len(zip_code) >= 5:
-                return zip_code[:5]
-        
-        return None
     except Exception as e:
-        print(f"Error in reverse geocoding: {e}")
+        logger.error(f"Error in reverse geocoding: {e}")
         return None
 
 def get_or_create_session(session_id: Optional[str] = None) -> tuple[str, VehicleSearchState]:
     """Get existing session or create new one."""
-    if session_id and session_id in sessions:
-        return session_id, sessions[session_id]
+    if session_id:
+        state = app.state.session_store.get(session_id)
+        if state is not None:
+            return session_id, state
 
     # Create new session
     new_session_id = session_id or str(uuid.uuid4())
-    sessions[new_session_id] = create_initial_state()
-    return new_session_id, sessions[new_session_id]
+    state = create_initial_state()
+    app.state.session_store.put(new_session_id, state)
+    return new_session_id, state
+
+def _run_turn(
+    session_id: str,
+    message: str,
+    state: VehicleSearchState,
+    progress_callback: Optional[Callable[[dict], None]] = None,
+) -> VehicleSearchState:
+    """Run one agent turn and persist the result (agent pool thread)."""
+    updated_state = run_agent(message, state, progress_callback)
+    app.state.session_store.put(session_id, updated_state)
+    return updated_state
+
+
+def _submit_turn(session_id: str, *args: Any) -> asyncio.Future:
+    """
+    Run ``_run_turn`` on the agent pool for a session locked by the caller.
+
+    The lock is released when the worker's own future finishes, not when the request
+    (or its awaitable, which a client disconnect cancels) ends, so the next turn cannot
+    start on a state still being written.
+    """
+    loop = asyncio.get_running_loop()
+
+    def release(_: Future) -> None:
+        """Runs on the worker thread; the lock belongs to the event loop."""
+        try:
+            loop.call_soon_threadsafe(session_locks.release, session_id)
+        except RuntimeError:
+            # Event loop already closed (server shutting down); nothing left to unlock
+            pass
+
+    worker = app.state.agent_executor.submit(_run_turn, session_id, *args)
+    worker.add_done_callback(release)
+    return asyncio.wrap_future(worker, loop=loop)
+
 
 def format_conversation_history(state: VehicleSearchState) -> List[Dict[str, Any]]:
     """Format conversation history for API response."""
@@ -149,45 +206,55 @@ async def root():
 
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, detail: VehicleDetail = "compact"):
     """
     Main conversation endpoint.
 
     Handles user messages, updates state, and returns AI response with vehicles.
+    Vehicles use the compact schema unless ``?detail=full`` is passed.
     """
     try:
-        # Get or create session
-        session_id, state = get_or_create_session(request.session_id)
-
-        # Store user location in state for distance calculations
-        if request.latitude and request.longitude:
-            state['user_latitude'] = request.latitude
-            state['user_longitude'] = request.longitude
-
-        # Prepare message - include location as a hidden chat message if provided
-        message = request.message
-        if request.latitude and request.longitude:
-            zip_code = reverse_geocode(request.latitude, request.longitude)
-            if zip_code:
-                # Prepend location message to the user's message
-                # This will be in conversation history but not shown in UI
-                location_message = f"My location is {zip_code}. "
-                message = location_message + request.message
-            else:
-                # If reverse geocoding fails, use coordinates
-                location_message = f"My location is {request.latitude}, {request.longitude}. "
-                message = location_message + request.message
-
-        # Run the agent
-        updated_state = run_agent(message, state)
-
-        # Update session storage
-        sessions[session_id] = updated_state
+        # Turns for one session run one at a time
+        session_id = request.session_id or str(uuid.uuid4())
+        await session_locks.acquire(session_id)
+        submitted = False
+        try:
+            # Get or create session
+            session_id, state = get_or_create_session(session_id)
+
+            # Store user location in state for distance calculations
+            if request.latitude and request.longitude:
+                state['user_latitude'] = request.latitude
+                state['user_longitude'] = request.longitude
+
+            # Prepare message - include location as a hidden chat message if provided
+            message = request.message
+            if request.latitude and request.longitude:
+                zip_code = reverse_geocode(request.latitude, request.longitude)
+                if zip_code:
+                    # Prepend location message to the user's message
+                    # This will be in conversation history but not shown in UI
+                    location_message = f"My location is {zip_code}. "
+                    message = location_message + request.message
+                else:
+                    # If reverse geocoding fails, use coordinates
+                    location_message = f"My location is {request.latitude}, {request.longitude}. "
+                    message = location_message + request.message
+
+            # Run the agent on the shared pool so the event loop stays free; saves the session when done
+            future = _submit_turn(session_id, message, state)
+            submitted = True
+        finally:
+            if not submitted:
+                session_locks.release(session_id)
+
+        updated_state = await future
 
         # Prepare response
         return ChatResponse(
             response=updated_state.get('ai_response', ''),
-            vehicles=updated_state.get('recommended_vehicles', [])[:20],
+            vehicles=project_vehicles(updated_state.get('recommended_vehicles', [])[:20], detail),
+            vehicle_schema=vehicle_schema(detail),
             filters=updated_state.get('explicit_filters', {}),
             preferences=updated_state.get('implicit_preferences', {}),
             session_id=session_id,
@@ -204,95 +271,99 @@ async def chat(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Error processing message: {str(e)}")
 
 
+# Queued once the agent worker has finished the turn
+_STREAM_DONE = object()
+
+
+def _stream_event(update: dict) -> Dict[str, str]:
+    """Turn a progress-callback update into an SSE event."""
+    if is_response_delta(update):
+        return {
+            "event": "delta",
+            "data": json.dumps({"text": update.get("text", ""), "reset": update.get("reset", False)})
+        }
+    return {
+        "event": "progress",
+        "data": json.dumps(update)
+    }
+
+
 @app.post("/chat/stream")
-async def chat_stream(request: ChatRequest):
+async def chat_stream(request: ChatRequest, detail: VehicleDetail = "compact"):
     """
     Streaming conversation endpoint with Server-Sent Events.
 
-    Streams progress updates in real-time, then sends final response.
+    Streams progress updates and the response text in real-time, then sends final response.
 
     Events:
     - progress: Progress updates during execution
+    - delta: Response text as it is generated ({"text", "reset"}; reset = discard text shown so far)
     - complete: Final response with vehicles and session data
     - error: Error information if something goes wrong
     """
     async def event_generator():
         try:
-            # Get or create session
-            session_id, state = get_or_create_session(request.session_id)
-
-            # Prepare message - include location as a hidden chat message if provided
-            message = request.message
-            if request.latitude and request.longitude:
-                zip_code = reverse_geocode(request.latitude, request.longitude)
-                if zip_code:
-                    # Prepend location message to the user's message
-                    # This will be in conversation history but not shown in UI
-                    location_message = f"My location is {zip_code}. "
-                    message = location_message + request.message
-                else:
-                    # If reverse geocoding fails, use coordinates
-                    location_message = f"My location is {request.latitude}, {request.longitude}. "
-                    message = location_message + request.message
-
-            # Create progress queue for async communication
-            progress_queue = asyncio.Queue()
-
-            # Get the event loop in the async context (before threading)
-            loop = asyncio.get_running_loop()
-
-            def progress_callback(update: dict):
-                """Thread-safe callback to send progress updates."""
-                try:
-                    # Use the loop from outer scope
-                    asyncio.run_coroutine_threadsafe(
-                        progress_queue.put(update),
-                        loop
-                    )
-                except Exception as e:
-                    print(f"Error in progress_callback: {e}")
-
-            # Run agent in thread pool to avoid blocking event loop
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                # Submit agent execution to thread pool
-                future = executor.submit(run_agent, message, state, progress_callback)
-
-                # Stream progress updates while agent is running
-                while not future.done():
-                    try:
-                        # Wait for progress update with timeout
-                        update = await asyncio.wait_for(progress_queue.get(), timeout=0.1)
-                        yield {
-                            "event": "progress",
-                            "data": json.dumps(update)
-                        }
-                    except asyncio.TimeoutError:
-                        # No update available, continue waiting
-                        continue
-
-                # Drain any remaining progress updates
-                while not progress_queue.empty():
+            # Turns for one session run one at a time
+            session_id = request.session_id or str(uuid.uuid4())
+            await session_locks.acquire(session_id)
+            submitted = False
+            try:
+                # Get or create session
+                session_id, state = get_or_create_session(session_id)
+
+                # Prepare message - include location as a hidden chat message if provided
+                message = request.message
+                if request.latitude and request.longitude:
+                    zip_code = reverse_geocode(request.latitude, request.longitude)
+                    if zip_code:
+                        # Prepend location message to the user's message
+                        # This will be in conversation history but not shown in UI
+                        location_message = f"My location is {zip_code}. "
+                        message = location_message + request.message
+                    else:
+                        # If reverse geocoding fails, use coordinates
+                        location_message = f"My location is {request.latitude}, {request.longitude}. "
+                        message = location_message + request.message
+
+                # Progress updates flow from the worker thread to this generator through the queue,
+                # followed by _STREAM_DONE when the turn finishes, so no polling is needed
+                progress_queue: asyncio.Queue = asyncio.Queue()
+                loop = asyncio.get_running_loop()
+
+                def post(item: Any) -> None:
+                    """Thread-safe: enqueue an item on the event loop."""
                     try:
-                        update = progress_queue.get_nowait()
-                        yield {
-                            "event": "progress",
-                            "data": json.dumps(update)
-                        }
-                    except asyncio.QueueEmpty:
-                        break
-
-                # Get final result from agent
-                updated_state = future.result()
-
-            # Update session storage
-            sessions[session_id] = updated_state
+                        loop.call_soon_threadsafe(progress_queue.put_nowait, item)
+                    except RuntimeError:
+                        # Event loop already closed (server shutting down); nobody is listening
+                        pass
+
+                # Saves the session and releases the lock when the worker finishes; the done
+                # callback is scheduled after every update the worker posted
+                future = _submit_turn(session_id, message, state, post)
+                future.add_done_callback(lambda _: progress_queue.put_nowait(_STREAM_DONE))
+                submitted = True
+            finally:
+                if not submitted:
+                    session_locks.release(session_id)
+
+            # Stream progress updates as they arrive, until the worker signals completion
+            while True:
+                update = await progress_queue.get()
+                if update is _STREAM_DONE:
+                    break
+                yield _stream_event(update)
+
+            # Get final result from agent (re-raises agent errors)
+            updated_state = await future
 
             # Send final response
             yield {
                 "event": "complete",
                 "data": json.dumps({
                     "response": updated_state.get('ai_response', ''),
-                    "vehicles": updated_state.get('recommended_vehicles', [])[:20],
+                    "vehicles": project_vehicles(updated_state.get('recommended_vehicles', [])[:20], detail),
+                    "vehicle_schema": vehicle_schema(detail),
                     "filters": updated_state.get('explicit_filters', {}),
                     "preferences": updated_state.get('implicit_preferences', {}),
                     "session_id": session_id,
@@ -321,22 +392,22 @@ async def chat_stream(request: ChatRequest):
 
 
 @app.get("/session/{session_id}", response_model=SessionResponse)
-async def get_session(session_id: str):
+async def get_session(session_id: str, detail: VehicleDetail = "compact"):
     """
     Get current session state.
 
-    Returns filters, preferences, vehicles, and conversation history.
+    Returns filters, preferences, vehicles (compact unless ``?detail=full``), and conversation history.
     """
-    if session_id not in sessions:
+    state = app.state.session_store.get(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    state = sessions[session_id]
-
     return SessionResponse(
         session_id=session_id,
         filters=state.get('explicit_filters', {}),
         preferences=state.get('implicit_preferences', {}),
-        vehicles=state.get('recommended_vehicles', [])[:10],
+        vehicles=project_vehicles(state.get('recommended_vehicles', [])[:10], detail),
+        vehicle_schema=vehicle_schema(detail),
         conversation_history=format_conversation_history(state)
     )
 
@@ -353,8 +424,9 @@ async def reset_session(request: ResetRequest):
     if not session_id:
         session_id = str(uuid.uuid4())
 
-    # Create fresh state
-    sessions[session_id] = create_initial_state()
+    # Create fresh state (after any running turn for this session)
+    async with session_locks.hold(session_id):
+        app.state.session_store.put(session_id, create_initial_state())
 
     return ResetResponse(
         session_id=session_id,
@@ -365,18 +437,100 @@ async def reset_session(request: ResetRequest):
 @app.delete("/session/{session_id}")
 async def delete_session(session_id: str):
     """Delete a session (cleanup)."""
-    if session_id in sessions:
-        del sessions[session_id]
+    async with session_locks.hold(session_id):
+        deleted = app.state.session_store.delete(session_id)
+    if deleted:
         return {"status": "deleted", "session_id": session_id}
     raise HTTPException(status_code=404, detail="Session not found")
 
 
 @app.get("/sessions")
 async def list_sessions():
-    """List all active sessions (for debugging)."""
+    """List all active sessions, session store counters and session lock wait times (for debugging)."""
+    session_ids = app.state.session_store.session_ids()
     return {
-        "active_sessions": len(sessions),
-        "session_ids": list(sessions.keys())
+        "active_sessions": len(session_ids),
+        "session_ids": session_ids,
+        "store": app.state.session_store.metrics(),
+        "locks": session_locks.metrics(),
+    }
+
+
+@app.get("/vehicle/{vin}", response_model=VehicleResponse)
+async def get_vehicle(vin: str, session_id: Optional[str] = None):
+    """
+    Full details for one vehicle.
+
+    With ``session_id``, the session's recommendations and favorites are checked
+    first, so the payload includes ranking and photo data; otherwise (or if the
+    VIN is not in the session) the listing is loaded from the catalog.
+    """
+    vin = vin.upper()
+    state = app.state.session_store.get(session_id) if session_id else None
+    if state is not None:
+        for vehicle in state.get('recommended_vehicles', []) + state.get('favorites', []):
+            if str(vehicle.get('vin', '')).upper() == vin:
+                return VehicleResponse(vin=vin, source="session", vehicle=full_vehicle(vehicle))
+
+    try:
+        vehicle = await asyncio.to_thread(get_vehicle_by_vin, vin)
+    except Exception as e:
+        logger.error(f"Failed to load vehicle {vin}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error loading vehicle: {str(e)}")
+    if vehicle is None:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    return VehicleResponse(vin=vin, source="catalog", vehicle=full_vehicle(vehicle))
+
+
+@app.post("/facets", response_model=FacetResponse)
+async def facet_counts(request: FacetRequest):
+    """
+    Listing counts per make, body style, price band, etc. in the local catalog.
+
+    Counts are computed under ``filters`` or, when omitted, the session's current
+    filters and location. Each facet ignores its own filter, so its counts show
+    what selecting or relaxing that value would yield.
+    """
+    filters = request.filters
+    latitude, longitude = request.latitude, request.longitude
+    if request.session_id:
+        state = app.state.session_store.get(request.session_id)
+        if state is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        if filters is None:
+            filters = dict(state.get('explicit_filters', {}))
+        if latitude is None or longitude is None:
+            latitude, longitude = state.get('user_latitude'), state.get('user_longitude')
+    filters = {key: value for key, value in (filters or {}).items() if value not in (None, "", [], {})}
+
+    try:
+        result = await asyncio.to_thread(
+            get_facet_counts,
+            filters,
+            request.fields or DEFAULT_FACETS,
+            latitude,
+            longitude,
+            request.limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=f"Local vehicle catalog unavailable: {str(e)}")
+    except Exception as e:
+        logger.error(f"Failed to compute facet counts: {e}")
+        raise HTTPException(status_code=500, detail=f"Error computing facet counts: {str(e)}")
+
+    return FacetResponse(total=result["total"], facets=result["facets"], filters=filters)
+
+
+@app.get("/metrics/llm")
+async def llm_metrics():
+    """Per-model LLM call metrics, response cache counters, and intent classifications that skipped the LLM."""
+    registry = get_llm_registry()
+    return {
+        "models": registry.metrics(),
+        "response_cache": registry.cache_metrics(),
+        "intent_fast_path": get_fast_path_metrics(),
     }
 
 
@@ -394,24 +548,26 @@ async def log_event(session_id: str, request: EventRequest):
 
     Vehicle-related events (vehicle_view, vehicle_click, photo_view) must include 'vin' in data.
     """
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    state = sessions[session_id]
-
-    # Generate timestamp if not provided
-    timestamp = request.timestamp or datetime.now().isoformat()
-
-    # Create event record
-    event = {
-        "event_type": request.event_type,
-        "timestamp": timestamp,
-        "data": request.data
-    }
+    # Wait for any running turn so the event is not lost when it saves the session
+    async with session_locks.hold(session_id):
+        state = app.state.session_store.get(session_id)
+        if state is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+
+        # Generate timestamp if not provided
+        timestamp = request.timestamp or datetime.now().isoformat()
+
+        # Create event record
+        event = {
+            "event_type": request.event_type,
+            "timestamp": timestamp,
+            "data": request.data
+        }
 
-    # Add to session state
-    state['interaction_events'].append(event)
-    event_id = len(state['interaction_events']) - 1
+        # Add to session state
+        state['interaction_events'].append(event)
+        event_id = len(state['interaction_events']) - 1
+        app.state.session_store.put(session_id, state)
 
     return EventResponse(
         status="logged",
@@ -428,10 +584,9 @@ async def get_events(session_id: str, event_type: Optional[str] = None):
     Optional query parameter:
     - event_type: Filter events by type (e.g., ?event_type=vehicle_view)
     """
-    if session_id not in sessions:
+    state = app.state.session_store.get(session_id)
+    if state is None:
         raise HTTPException(status_code=404, detail="Session not found")
-
-    state = sessions[session_id]
     events = state.get('interaction_events', [])
 
     # Filter by event type if specified
@@ -448,7 +603,8 @@ async def get_events(session_id: str, event_type: Optional[str] = None):
 @app.post("/session/{session_id}/favorite", response_model=ChatResponse)
 async def handle_favorite(
     session_id: str,
-    request: FavoriteRequest
+    request: FavoriteRequest,
+    detail: VehicleDetail = "compact",
 ):
     """
     Handle vehicle favorite/unfavorite action and return proactive response.
@@ -466,58 +622,81 @@ async def handle_favorite(
     Returns:
         ChatResponse with proactive message and quick replies (or empty if unfavorited)
     """
-    # Get or create session state
-    if session_id not in sessions:
-        sessions[session_id] = create_initial_state()
-
-    state = sessions[session_id]
-
-    # Log the event for analytics
-    event_id = str(uuid.uuid4())
-    event = {
-        "event_id": event_id,
-        "event_type": "vehicle_favorited" if request.is_favorited else "vehicle_unfavorited",
-        "timestamp": datetime.now().isoformat(),
-        "data": {
-            "vin": request.vehicle.get("vin"),
-            "vehicle": request.vehicle
+    # Serialized with the session's turns so neither overwrites the other's changes
+    async with session_locks.hold(session_id):
+        # Get or create session state
+        state = app.state.session_store.get(session_id)
+        if state is None:
+            state = create_initial_state()
+
+        # Log the event for analytics
+        event_id = str(uuid.uuid4())
+        event = {
+            "event_id": event_id,
+            "event_type": "vehicle_favorited" if request.is_favorited else "vehicle_unfavorited",
+            "timestamp": datetime.now().isoformat(),
+            "data": {
+                "vin": request.vehicle.get("vin"),
+                "vehicle": request.vehicle
+            }
         }
-    }
-    state["interaction_events"].append(event)
-    logger.info(f"Session {session_id}: Logged {event['event_type']} for VIN {request.vehicle.get('vin')}")
-
-    # Update favorites list in state
-    vin = request.vehicle.get("vin")
-
-    if request.is_favorited:
-        # Add to favorites (avoid duplicates)
-        if not any(fav.get("vin") == vin for fav in state["favorites"]):
-            state["favorites"].append(request.vehicle)
-            logger.info(f"Session {session_id}: Added vehicle {vin} to favorites. Total: {len(state['favorites'])}")
-
-        # Generate proactive response using LLM
-        from idss_agent.processing.proactive_responses import generate_favorite_response
-
-        try:
-            proactive_response = generate_favorite_response(request.vehicle, state)
-
-            return ChatResponse(
-                response=proactive_response.ai_response,
-                vehicles=state.get("recommended_vehicles", []),
-                filters=state.get("explicit_filters", {}),
-                preferences=state.get("implicit_preferences", {}),
-                session_id=session_id,
-                interviewed=state.get("interviewed", False),
-                quick_replies=proactive_response.quick_replies,
-                suggested_followups=[],
-                comparison_table=None
-            )
-        except Exception as e:
-            logger.error(f"Failed to generate proactive response: {e}")
-            # Return empty response on error
+        state["interaction_events"].append(event)
+        logger.info(f"Session {session_id}: Logged {event['event_type']} for VIN {request.vehicle.get('vin')}")
+
+        # Update favorites list in state
+        vin = request.vehicle.get("vin")
+
+        if request.is_favorited:
+            # Add to favorites (avoid duplicates)
+            if not any(fav.get("vin") == vin for fav in state["favorites"]):
+                state["favorites"].append(request.vehicle)
+                logger.info(f"Session {session_id}: Added vehicle {vin} to favorites. Total: {len(state['favorites'])}")
+            app.state.session_store.put(session_id, state)
+
+            # Generate proactive response using LLM
+            from idss_agent.processing.proactive_responses import generate_favorite_response
+
+            try:
+                proactive_response = generate_favorite_response(request.vehicle, state)
+
+                return ChatResponse(
+                    response=proactive_response.ai_response,
+                    vehicles=project_vehicles(state.get("recommended_vehicles", []), detail),
+                    vehicle_schema=vehicle_schema(detail),
+                    filters=state.get("explicit_filters", {}),
+                    preferences=state.get("implicit_preferences", {}),
+                    session_id=session_id,
+                    interviewed=state.get("interviewed", False),
+                    quick_replies=proactive_response.quick_replies,
+                    suggested_followups=[],
+                    comparison_table=None
+                )
+            except Exception as e:
+                logger.error(f"Failed to generate proactive response: {e}")
+                # Return empty response on error
+                return ChatResponse(
+                    response="",
+                    vehicles=project_vehicles(state.get("recommended_vehicles", []), detail),
+                    vehicle_schema=vehicle_schema(detail),
+                    filters=state.get("explicit_filters", {}),
+                    preferences=state.get("implicit_preferences", {}),
+                    session_id=session_id,
+                    interviewed=state.get("interviewed", False),
+                    quick_replies=None,
+                    suggested_followups=[],
+                    comparison_table=None
+                )
+        else:
+            # Remove from favorites (unfavorited)
+            state["favorites"] = [fav for fav in state["favorites"] if fav.get("vin") != vin]
+            logger.info(f"Session {session_id}: Removed vehicle {vin} from favorites. Total: {len(state['favorites'])}")
+            app.state.session_store.put(session_id, state)
+
+            # No proactive response for unfavorite
             return ChatResponse(
                 response="",
-                vehicles=state.get("recommended_vehicles", []),
+                vehicles=project_vehicles(state.get("recommended_vehicles", []), detail),
+                vehicle_schema=vehicle_schema(detail),
                 filters=state.get("explicit_filters", {}),
                 preferences=state.get("implicit_preferences", {}),
                 session_id=session_id,
@@ -526,23 +705,6 @@ async def handle_favorite(
                 suggested_followups=[],
                 comparison_table=None
             )
-    else:
-        # Remove from favorites (unfavorited)
-        state["favorites"] = [fav for fav in state["favorites"] if fav.get("vin") != vin]
-        logger.info(f"Session {session_id}: Removed vehicle {vin} from favorites. Total: {len(state['favorites'])}")
-
-        # No proactive response for unfavorite
-        return ChatResponse(
-            response="",
-            vehicles=state.get("recommended_vehicles", []),
-            filters=state.get("explicit_filters", {}),
-            preferences=state.get("implicit_preferences", {}),
-            session_id=session_id,
-            interviewed=state.get("interviewed", False),
-            quick_replies=None,
-            suggested_followups=[],
-            comparison_table=None
-        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+"""
+Per-session locks for the API server.
+
+Agent turns and session updates for the same session run one at a time, in
+arrival order; different sessions never wait on each other. Locks exist only
+while someone holds or waits for them, so idle sessions cost nothing.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+
+class SessionLocks:
+    """
+    Registry of ``asyncio.Lock`` objects keyed by session ID, with wait-time metrics.
+
+    Must be used from a single event loop.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._users: Dict[str, int] = {}
+        self._stats = {
+            "acquisitions": 0,
+            "contended": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    async def acquire(self, session_id: str) -> None:
+        """Wait until the session is free, then take it. Pair with ``release``."""
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        self._users[session_id] = self._users.get(session_id, 0) + 1
+
+        contended = lock.locked()
+        start = time.perf_counter()
+        try:
+            await lock.acquire()
+        except BaseException:
+            self._forget(session_id)
+            raise
+        waited = time.perf_counter() - start
+
+        self._stats["acquisitions"] += 1
+        if contended:
+            self._stats["contended"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+
+    def release(self, session_id: str) -> None:
+        """Release a session taken with ``acquire``."""
+        self._locks[session_id].release()
+        self._forget(session_id)
+
+    def _forget(self, session_id: str) -> None:
+        self._users[session_id] -= 1
+        if self._users[session_id] == 0:
+            del self._users[session_id]
+            del self._locks[session_id]
+
+    @asynccontextmanager
+    async def hold(self, session_id: str) -> AsyncIterator[None]:
+        """``async with`` form of ``acquire``/``release``."""
+        await self.acquire(session_id)
+        try:
+            yield
+        finally:
+            self.release(session_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Acquisition counts and time spent waiting for a busy session."""
+        stats = dict(self._stats)
+        contended = stats["contended"]
+        stats["wait_seconds_avg"] = stats["wait_seconds_total"] / contended if contended else 0.0
+        stats["locked_sessions"] = sum(1 for lock in self._locks.values() if lock.locked())
+        stats["waiting_requests"] = sum(self._users.values()) - stats["locked_sessions"]
+        return stats
+
+
+__all__ = ["SessionLocks"]
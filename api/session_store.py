@@ -0,0 +1,344 @@
+"""
+Session storage for the API server.
+
+``InMemorySessionStore`` keeps sessions in a bounded LRU with an idle TTL;
+evicted sessions are gone. ``SQLiteSessionStore`` writes every session
+through to SQLite (zlib-compressed JSON) and keeps only hot sessions in the
+same kind of LRU, so cold sessions are evicted from memory and rehydrated on
+demand, survive restarts, and can be shared by several server processes.
+
+Sessions are mutable dicts: after changing one, call ``put`` to persist it.
+"""
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain_core.messages import messages_from_dict, messages_to_dict
+
+from idss_agent import VehicleSearchState, create_initial_state
+from idss_agent.utils.config import get_config
+from idss_agent.utils.logger import get_logger
+
+logger = get_logger("api.session_store")
+
+# Runtime-only keys that must not be persisted
+_TRANSIENT_KEYS = frozenset({"_progress_callback"})
+
+# Sessions idle past the retention period are deleted once per this many writes
+_PRUNE_EVERY = 500
+
+
+def _encode_value(value: Any) -> Any:
+    """JSON fallback for known non-JSON types that round-trip by value (NumPy scalars)."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def serialize_state(state: VehicleSearchState) -> bytes:
+    """
+    Encode a session state as compressed JSON (messages via LangChain's dict format).
+
+    Raises:
+        TypeError: If a state field holds a value that would not survive the
+            round trip, naming the field.
+    """
+    data = {key: value for key, value in state.items() if key not in _TRANSIENT_KEYS}
+    data["conversation_history"] = messages_to_dict(state.get("conversation_history", []))
+    try:
+        encoded = json.dumps(data, separators=(",", ":"), default=_encode_value)
+    except (TypeError, ValueError):
+        # Re-encode field by field to report which one is not serializable
+        for key, value in data.items():
+            try:
+                json.dumps(value, default=_encode_value)
+            except (TypeError, ValueError) as exc:
+                raise TypeError(f"Session state field '{key}' is not serializable: {exc}") from exc
+        raise
+    return zlib.compress(encoded.encode("utf-8"))
+
+
+def deserialize_state(blob: bytes) -> VehicleSearchState:
+    """Decode a state written by ``serialize_state``; fields added since then get their defaults."""
+    data = json.loads(zlib.decompress(blob).decode("utf-8"))
+    data["conversation_history"] = messages_from_dict(data.get("conversation_history", []))
+    state = create_initial_state()
+    state.update(data)
+    return state
+
+
+class _LRUCache:
+    """Session cache bounded by size and idle time. Not thread-safe; callers hold a lock."""
+
+    def __init__(self, max_size: int, idle_ttl: Optional[float]):
+        self.max_size = max(1, max_size)
+        self.idle_ttl = idle_ttl or None
+        self._entries: "OrderedDict[str, Tuple[VehicleSearchState, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    def get(self, session_id: str) -> Optional[VehicleSearchState]:
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        state, last_access = entry
+        now = time.monotonic()
+        if self.idle_ttl is not None and now - last_access > self.idle_ttl:
+            del self._entries[session_id]
+            return None
+        self._entries[session_id] = (state, now)
+        self._entries.move_to_end(session_id)
+        return state
+
+    def put(self, session_id: str, state: VehicleSearchState) -> int:
+        """Insert or refresh a session; returns how many sessions were evicted."""
+        self._entries[session_id] = (state, time.monotonic())
+        self._entries.move_to_end(session_id)
+        return self.evict()
+
+    def pop(self, session_id: str) -> Optional[VehicleSearchState]:
+        entry = self._entries.pop(session_id, None)
+        return entry[0] if entry else None
+
+    def evict(self) -> int:
+        """Drop idle sessions (oldest first) and least recently used ones beyond ``max_size``."""
+        evicted = 0
+        now = time.monotonic()
+        while self._entries:
+            session_id, (_, last_access) = next(iter(self._entries.items()))
+            idle = self.idle_ttl is not None and now - last_access > self.idle_ttl
+            if not idle and len(self._entries) <= self.max_size:
+                break
+            del self._entries[session_id]
+            evicted += 1
+        return evicted
+
+
+class SessionStore(ABC):
+    """Interface for session storage backends."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[VehicleSearchState]:
+        """Return the session's state, or None if unknown (or expired)."""
+
+    @abstractmethod
+    def put(self, session_id: str, state: VehicleSearchState) -> None:
+        """Store (or update) a session's state."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Remove a session; returns True if it existed."""
+
+    @abstractmethod
+    def session_ids(self) -> List[str]:
+        """IDs of all stored sessions."""
+
+    @abstractmethod
+    def metrics(self) -> Dict[str, Any]:
+        """Cache and storage counters."""
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def close(self) -> None:
+        """Release resources (API shutdown)."""
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local sessions in an LRU with an idle TTL. Evicted sessions are lost.
+
+    Args:
+        max_sessions: Maximum sessions kept; least recently used are evicted first.
+        idle_ttl_seconds: Sessions idle longer than this are dropped (None = never).
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl_seconds: Optional[float] = None):
+        self._cache = _LRUCache(max_sessions, idle_ttl_seconds)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, session_id: str) -> Optional[VehicleSearchState]:
+        with self._lock:
+            state = self._cache.get(session_id)
+            self._stats["hits" if state is not None else "misses"] += 1
+        return state
+
+    def put(self, session_id: str, state: VehicleSearchState) -> None:
+        with self._lock:
+            self._stats["evictions"] += self._cache.put(session_id, state)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._cache.pop(session_id) is not None
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            self._stats["evictions"] += self._cache.evict()
+            return self._cache.keys()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": "memory", "cached": len(self._cache), **self._stats}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions persisted to SQLite, with the hot ones cached in memory.
+
+    Args:
+        path: SQLite file holding the sessions.
+        cache_size: Sessions kept deserialized in memory.
+        idle_ttl_seconds: Sessions idle longer than this leave the memory cache.
+        retention_seconds: Sessions idle longer than this are deleted from disk (None = keep).
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        cache_size: int = 1000,
+        idle_ttl_seconds: Optional[float] = 1800,
+        retention_seconds: Optional[float] = None,
+    ):
+        self.path = Path(path)
+        self.retention_seconds = retention_seconds or None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._cache = _LRUCache(cache_size, idle_ttl_seconds)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                state BLOB NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated_at ON sessions(updated_at)")
+        self._conn.commit()
+
+        self._writes_since_prune = 0
+        self._stats = {"hits": 0, "misses": 0, "rehydrated": 0, "evictions": 0, "writes": 0, "expired": 0}
+        with self._lock:
+            self._prune()
+
+    def get(self, session_id: str) -> Optional[VehicleSearchState]:
+        with self._lock:
+            state = self._cache.get(session_id)
+            if state is not None:
+                self._stats["hits"] += 1
+                return state
+
+            row = self._conn.execute(
+                "SELECT state FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+
+            state = deserialize_state(row[0])
+            self._stats["rehydrated"] += 1
+            self._stats["evictions"] += self._cache.put(session_id, state)
+        return state
+
+    def put(self, session_id: str, state: VehicleSearchState) -> None:
+        blob = serialize_state(state)
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO sessions (session_id, state, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(session_id) DO UPDATE
+                SET state = excluded.state, updated_at = excluded.updated_at
+                """,
+                (session_id, blob, time.time()),
+            )
+            self._conn.commit()
+            self._stats["writes"] += 1
+            self._stats["evictions"] += self._cache.put(session_id, state)
+
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= _PRUNE_EVERY:
+                self._prune()
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            self._cache.pop(session_id)
+            deleted = self._conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount
+            self._conn.commit()
+        return deleted > 0
+
+    def session_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT session_id FROM sessions ORDER BY updated_at DESC")]
+
+    def _prune(self) -> None:
+        """Delete sessions past the retention period. Caller holds the lock."""
+        self._writes_since_prune = 0
+        if self.retention_seconds is None:
+            return
+        expired = self._conn.execute(
+            "DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.retention_seconds,)
+        ).rowcount
+        self._conn.commit()
+        if expired:
+            self._stats["expired"] += expired
+            logger.info(f"Deleted {expired} session(s) idle longer than {self.retention_seconds}s")
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stored = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+            return {"backend": "sqlite", "cached": len(self._cache), "stored": stored, **self._stats}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store configured under ``server.session_store``."""
+    config = get_config()
+    backend = config.get('server.session_store.backend', 'memory')
+    max_sessions = config.get('server.session_store.max_sessions', 10000)
+    idle_ttl = config.get('server.session_store.idle_ttl_seconds')
+
+    if backend == "memory":
+        return InMemorySessionStore(max_sessions, idle_ttl)
+
+    if backend == "sqlite":
+        path = Path(config.get('server.session_store.sqlite_path', 'data/sessions/sessions.db'))
+        if not path.is_absolute():
+            path = Path(__file__).resolve().parent.parent / path
+        logger.info(f"Persisting sessions to {path}")
+        return SQLiteSessionStore(
+            path,
+            cache_size=max_sessions,
+            idle_ttl_seconds=idle_ttl,
+            retention_seconds=config.get('server.session_store.retention_seconds'),
+        )
+
+    raise ValueError(f"Unknown session store backend '{backend}'. Expected 'memory' or 'sqlite'")
+
+
+__all__ = [
+    "InMemorySessionStore",
+    "SQLiteSessionStore",
+    "SessionStore",
+    "create_session_store",
+    "deserialize_state",
+    "serialize_state",
+]
@@ -6,11 +6,12 @@ import json
 import re
 from typing import Optional, Callable, Dict, List, Any
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langchain_core.tools import tool
 from langgraph.prebuilt import create_react_agent
 from idss_agent.utils.config import get_config
+from idss_agent.utils.llm_registry import get_llm
+from idss_agent.utils.streaming import ResponseStreamer, token_streaming_enabled
 from idss_agent.utils.prompts import render_prompt
 from idss_agent.state.schema import VehicleSearchState, AgentResponse, ComparisonTable
 from idss_agent.tools.autodev_api import get_vehicle_listing_by_vin, get_vehicle_photos_by_vin
@@ -139,16 +140,8 @@ def generate_interactive_elements(ai_response: str, user_question: str) -> Inter
     Returns:
         InteractiveElements with quick_replies (suggested_followups disabled for analytical mode)
     """
-    # Get configuration
-    config = get_config()
-    model_config = config.get_model_config('analytical_postprocess')
-
-    llm = ChatOpenAI(
-        model=model_config['name'],
-        temperature=model_config['temperature'],
-        max_tokens=model_config.get('max_tokens', 800)
-    )
-    structured_llm = llm.with_structured_output(InteractiveElements)
+    # Shared LLM client with config parameters
+    structured_llm = get_llm('analytical_postprocess', InteractiveElements, default_max_tokens=800)
 
     # Load prompt template
     template_prompt = render_prompt('analytical.j2')
@@ -317,7 +310,6 @@ def analytical_agent(
     """
     # Get configuration
     config = get_config()
-    model_config = config.get_model_config('analytical')
     max_history = config.limits.get('max_conversation_history', 10)
 
     # Get conversation history for analytical context
@@ -333,12 +325,8 @@ def analytical_agent(
     user_input = recent_history[-1].content if recent_history else ""
     logger.info(f"Analytical query: {user_input[:100]}... (with {len(recent_history)} messages of context)")
 
-    # Create LLM with config parameters
-    llm = ChatOpenAI(
-        model=model_config['name'],
-        temperature=model_config['temperature'],
-        max_tokens=model_config.get('max_tokens', 4000)
-    )
+    # Shared LLM client with config parameters
+    llm = get_llm('analytical', default_max_tokens=4000)
 
     # Get available tools
     db_tools = get_vehicle_database_tools(llm)
@@ -394,8 +382,14 @@ def analytical_agent(
     # Add recent conversation history (includes current question)
     messages.extend(recent_history)
 
-    # Create analytical agent
-    agent = create_react_agent(llm, tools)
+    # Create analytical agent; its final answer is streamed when a listener is attached
+    # (database tools keep the non-streaming client so their internal calls are not forwarded)
+    streamer = None
+    agent_llm = llm
+    if token_streaming_enabled(progress_callback):
+        streamer = ResponseStreamer(progress_callback, field=None, json_fallback_field="summary")
+        agent_llm = get_llm('analytical', default_max_tokens=4000, streaming=True)
+    agent = create_react_agent(agent_llm, tools)
 
     # Emit progress: Starting analysis
     if progress_callback:
@@ -407,7 +401,10 @@ def analytical_agent(
 
     try:
         # Invoke with system message (cached) + context + history
-        result = agent.invoke({"messages": messages})
+        result = agent.invoke(
+            {"messages": messages},
+            config={"callbacks": [streamer]} if streamer else None,
+        )
 
         # Emit progress: Synthesizing answer
         if progress_callback:
@@ -508,4 +505,8 @@ def analytical_agent(
         state["quick_replies"] = None
         state["suggested_followups"] = []
 
+    if streamer:
+        # Streamed text ends equal to the final answer (comparison summary, error message, ...)
+        streamer.finish(state["ai_response"])
+
     return state
@@ -4,9 +4,10 @@ Discovery agent - generates responses with listing summary and elicitation quest
 import json
 from typing import List, Dict, Any, Optional, Callable
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from idss_agent.utils.config import get_config
+from idss_agent.utils.llm_registry import get_llm
+from idss_agent.utils.streaming import invoke_streaming, token_streaming_enabled
 from idss_agent.utils.prompts import render_prompt
 from idss_agent.state.schema import VehicleSearchState, AgentResponse
 
@@ -60,7 +61,6 @@ def discovery_agent(
 
     # Get configuration
     config = get_config()
-    model_config = config.get_model_config('discovery')
     top_limit = config.limits.get('top_vehicles_to_show', 3)
 
     # Format vehicles for LLM
@@ -102,14 +102,12 @@ Generate your response:
         HumanMessage(content=prompt),
     ]
 
-    # Create LLM with config parameters
-    llm = ChatOpenAI(
-        model=model_config['name'],
-        temperature=model_config['temperature'],
-        max_tokens=model_config.get('max_tokens', 800)
+    # Shared LLM client with config parameters; the response text is streamed as it is generated
+    structured_llm = get_llm(
+        'discovery', AgentResponse, default_max_tokens=800,
+        streaming=token_streaming_enabled(progress_callback),
     )
-    structured_llm = llm.with_structured_output(AgentResponse)
-    response: AgentResponse = structured_llm.invoke(messages)
+    response: AgentResponse = invoke_streaming(structured_llm, messages, progress_callback)
 
     state['ai_response'] = response.ai_response
 
@@ -176,15 +174,8 @@ Return ONLY a JSON array of topics that were asked about, e.g.:
 If no questions were asked, return an empty array: []
 """
 
-    # Get configuration for extraction model
-    config = get_config()
-    model_config = config.get_model_config('discovery_extraction')
-
-    llm = ChatOpenAI(
-        model=model_config['name'],
-        temperature=model_config['temperature'],
-        max_tokens=model_config.get('max_tokens', 500)
-    )
+    # Shared LLM client for the extraction model
+    llm = get_llm('discovery_extraction', default_max_tokens=500)
     result = llm.invoke(extraction_prompt)
 
     try:
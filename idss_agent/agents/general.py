@@ -2,10 +2,11 @@
 General conversation agent - handles greetings, thanks, meta questions.
 """
 from typing import Optional, Callable
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import AIMessage, SystemMessage
 from idss_agent.state.schema import VehicleSearchState, AgentResponse
 from idss_agent.utils.config import get_config
+from idss_agent.utils.llm_registry import get_llm
+from idss_agent.utils.streaming import invoke_streaming, token_streaming_enabled
 from idss_agent.utils.prompts import render_prompt
 from idss_agent.utils.logger import get_logger
 
@@ -46,15 +47,10 @@ def run_general_mode(
 
     # Get configuration
     config = get_config()
-    model_config = config.get_model_config('general')
-
-    # Create LLM with config parameters
-    llm = ChatOpenAI(
-        model=model_config['name'],
-        temperature=model_config['temperature'],
-        max_tokens=model_config.get('max_tokens', 500)
+    structured_llm = get_llm(
+        'general', AgentResponse, default_max_tokens=500,
+        streaming=token_streaming_enabled(progress_callback),
     )
-    structured_llm = llm.with_structured_output(AgentResponse)
 
     # Load system prompt from template
     system_prompt = render_prompt('general.j2')
@@ -65,7 +61,7 @@ def run_general_mode(
     messages = [SystemMessage(content=system_prompt)]
     messages.extend(recent)
 
-    response: AgentResponse = structured_llm.invoke(messages)
+    response: AgentResponse = invoke_streaming(structured_llm, messages, progress_callback)
     state["ai_response"] = response.ai_response
 
     # Apply feature flags for interactive elements
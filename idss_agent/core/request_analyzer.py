@@ -5,12 +5,19 @@ This module handles compound requests like:
 - "I want a black one, what's the maintenance cost?" (filter update + analytical question)
 - "Show me Honda Accords and compare top 3" (search + comparison)
 - "What's the safety rating?" (pure analytical, no search)
+
+Unambiguous turns (greetings, clicks on the agent's own quick replies, bare
+budget or color edits) are classified by deterministic rules first and only
+fall through to the LLM when no rule is confident enough.
 """
-from typing import List, Dict, Any
+import re
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from idss_agent.state.schema import VehicleSearchState
+from idss_agent.utils.config import get_config
+from idss_agent.utils.llm_registry import get_llm
 from idss_agent.utils.logger import get_logger
 
 logger = get_logger("request_analyzer")
@@ -66,6 +73,133 @@ class RequestAnalysis(BaseModel):
     )
 
 
+_GREETING_PATTERN = re.compile(
+    r"^(?:(?:hi|hello|hey|hiya|howdy|good (?:morning|afternoon|evening))(?: there)?"
+    r"|(?:great|awesome|perfect|cool|ok|okay)?,? ?(?:thanks?|thank you|thx|ty)(?: (?:so|very) much| a lot)?"
+    r"|(?:bye|goodbye|see you|see ya))$"
+)
+
+_AMOUNT = r"\$?\d[\d,]*(?:\.\d+)?\s*(?:k|thousand)?"
+_BUDGET_PATTERN = re.compile(
+    r"^(?:(?:my )?budget(?: is)?(?: of)?\s*|(?:under|below|less than|up to|at most|max(?:imum)?|around|about)\s+)?"
+    rf"{_AMOUNT}(?:\s*(?:-|to)\s*{_AMOUNT})?"
+    r"(?:\s+(?:or less|max(?:imum)?|budget|tops))?$"
+)
+# A bare number ("2020") could be a year or mileage; require some sign that it is money
+_BUDGET_SIGNAL = re.compile(r"\$|\d\s*(?:k|thousand)\b|budget|under|below|less|up to|at most|max|around|about")
+
+_COLORS = (
+    "black", "white", "silver", "gray", "grey", "red", "blue", "green", "brown", "beige",
+    "gold", "orange", "yellow", "purple", "tan", "maroon", "burgundy",
+)
+_COLOR_PATTERN = re.compile(
+    r"^(?:(?:show me|only|just|make it|i want|i'd prefer|prefer)\s+)?(?:(?:a|an|the)\s+)?(?:in\s+)?"
+    rf"(?:{'|'.join(_COLORS)})"
+    r"(?:\s+(?:ones?|cars?|colou?r|only))?$"
+)
+
+_FAST_PATH_STATS: Dict[str, Any] = {"calls": 0, "hits": 0, "rules": {}}
+_FAST_PATH_LOCK = threading.Lock()
+
+
+def _normalize(user_input: str) -> str:
+    text = re.sub(r"\s+", " ", user_input.strip().lower())
+    text = re.sub(r"\s*please$", "", text)
+    return text.rstrip(" !.?")
+
+
+def _record_fast_path(rule: Optional[str]) -> None:
+    with _FAST_PATH_LOCK:
+        _FAST_PATH_STATS["calls"] += 1
+        if rule:
+            _FAST_PATH_STATS["hits"] += 1
+            _FAST_PATH_STATS["rules"][rule] = _FAST_PATH_STATS["rules"].get(rule, 0) + 1
+
+
+def get_fast_path_metrics() -> Dict[str, Any]:
+    """Return how many requests the rule-based fast path classified without an LLM call."""
+    with _FAST_PATH_LOCK:
+        calls = _FAST_PATH_STATS["calls"]
+        hits = _FAST_PATH_STATS["hits"]
+        return {
+            "calls": calls,
+            "hits": hits,
+            "hit_rate": hits / calls if calls else 0.0,
+            "rules": dict(_FAST_PATH_STATS["rules"]),
+        }
+
+
+def pre_classify_request(
+    user_input: str,
+    state: VehicleSearchState
+) -> Optional[Tuple[RequestAnalysis, float, str]]:
+    """
+    Classify a request with deterministic rules, without calling the LLM.
+
+    Rules:
+    - Greetings, thanks and goodbyes -> general conversation
+    - A quick reply offered by the agent, clicked during the interview -> interview
+    - A bare budget ("under $20k", "25000-30000") or color ("black ones") edit
+      once the interview is over -> filter update + search
+
+    Args:
+        user_input: Latest user message
+        state: Current conversation state
+
+    Returns:
+        (analysis, confidence, rule name), or None when no rule matches
+    """
+    text = _normalize(user_input)
+    if not text:
+        return None
+
+    interviewed = state.get('interviewed', False)
+    quick_replies = {_normalize(reply) for reply in (state.get('quick_replies') or [])}
+    is_quick_reply = text in quick_replies
+
+    if _GREETING_PATTERN.match(text):
+        return RequestAnalysis(
+            needs_interview=False,
+            needs_search=False,
+            needs_analytical=False,
+            has_filter_update=False,
+            is_general_conversation=True,
+            reasoning="Greeting or thanks (rule-based)",
+        ), 0.95, "greeting"
+
+    if is_quick_reply and not interviewed:
+        return RequestAnalysis(
+            needs_interview=True,
+            needs_search=False,
+            needs_analytical=False,
+            has_filter_update=False,
+            is_general_conversation=False,
+            reasoning="Answer to an interview question via quick reply (rule-based)",
+        ), 0.9, "interview_quick_reply"
+
+    # Bare criteria edits are only unambiguous once the interview is over
+    if not interviewed and not state.get('recommended_vehicles'):
+        return None
+
+    if _BUDGET_PATTERN.match(text):
+        rule = "budget_edit"
+        confidence = 0.9 if _BUDGET_SIGNAL.search(text) else 0.6
+    elif _COLOR_PATTERN.match(text):
+        rule = "color_edit"
+        confidence = 0.9
+    else:
+        return None
+
+    return RequestAnalysis(
+        needs_interview=False,
+        needs_search=True,
+        needs_analytical=False,
+        has_filter_update=True,
+        is_general_conversation=False,
+        reasoning=f"Single {rule.split('_')[0]} filter edit (rule-based)",
+    ), confidence, rule
+
+
 def analyze_request(
     user_input: str,
     state: VehicleSearchState
@@ -80,6 +214,18 @@ def analyze_request(
     Returns:
         RequestAnalysis with detected needs
     """
+    config = get_config()
+    if config.get('request_analyzer.fast_path_enabled', True):
+        fast = pre_classify_request(user_input, state)
+        threshold = config.get('request_analyzer.fast_path_min_confidence', 0.85)
+        if fast is not None and fast[1] >= threshold:
+            analysis, confidence, rule = fast
+            _record_fast_path(rule)
+            logger.info(f"Request analysis (fast path: {rule}, confidence={confidence:.2f}): "
+                       f"interview={analysis.needs_interview}, search={analysis.needs_search}, "
+                       f"general={analysis.is_general_conversation}")
+            return analysis
+        _record_fast_path(None)
 
     # Get context
     interviewed = state.get('interviewed', False)
@@ -137,8 +283,7 @@ Example: "I want a black one, what's the maintenance cost?"
 Analyze this request and determine what the user needs."""
 
     # Call LLM for analysis
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-    structured_llm = llm.with_structured_output(RequestAnalysis)
+    structured_llm = get_llm('intent_classifier', RequestAnalysis)
 
     try:
         result = structured_llm.invoke([
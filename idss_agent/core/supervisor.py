@@ -7,7 +7,10 @@ Refactored architecture:
 3. ResponseSynthesizer - handles response synthesis logic
 4. Clear data structures with proper typing
 """
-from typing import Optional, Callable, Dict, Any, List
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Optional, Callable, Dict, Any, List, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
@@ -20,7 +23,46 @@ from idss_agent.agents.discovery import discovery_agent
 from idss_agent.agents.general import run_general_mode
 from idss_agent.workflows.interview import run_interview_workflow
 from idss_agent.processing.llm_synthesizer import llm_synthesize_multi_mode
+from idss_agent.utils.config import get_config
 from idss_agent.utils.logger import get_logger
+from idss_agent.utils.streaming import is_response_delta
+
+
+# Request analysis runs on its own pool so sub-agents stuck past their timeout
+# (threads cannot be killed) never delay analysis and parsing for other turns
+_EXECUTORS: Dict[str, ThreadPoolExecutor] = {}
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def _get_pool(name: str, size_key: str) -> ThreadPoolExecutor:
+    pool = _EXECUTORS.get(name)
+    if pool is None:
+        with _EXECUTOR_LOCK:
+            pool = _EXECUTORS.get(name)
+            if pool is None:
+                pool = _EXECUTORS[name] = ThreadPoolExecutor(
+                    max_workers=get_config().get(size_key, 16),
+                    thread_name_prefix=name,
+                )
+    return pool
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool for request analysis (runs alongside semantic parsing)."""
+    return _get_pool("supervisor", 'supervisor.max_workers')
+
+
+def _get_sub_agent_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool that runs sub-agent modes."""
+    return _get_pool("sub-agent", 'supervisor.sub_agent_workers')
+
+
+def shutdown_supervisor_executor() -> None:
+    """Shut down the shared supervisor thread pools (API shutdown)."""
+    with _EXECUTOR_LOCK:
+        while _EXECUTORS:
+            _, pool = _EXECUTORS.popitem()
+            pool.shutdown(wait=False, cancel_futures=True)
 
 
 class AgentMode(str, Enum):
@@ -31,6 +73,22 @@ class AgentMode(str, Enum):
     GENERAL = "general"
 
 
+# Modes that must wait for (and see the results of) other modes in the same plan.
+# Overridable via supervisor.mode_dependencies in agent_config.yaml.
+MODE_DEPENDENCIES: Dict[AgentMode, Tuple[AgentMode, ...]] = {
+    AgentMode.ANALYTICAL: (),
+    AgentMode.SEARCH: (),
+    AgentMode.INTERVIEW: (),
+    AgentMode.GENERAL: (),
+}
+
+_DEFAULT_MODE_TIMEOUT = 120.0
+
+
+class SubAgentCancelled(Exception):
+    """Raised inside a sub-agent that was cancelled after timing out."""
+
+
 @dataclass
 class SubAgentResult:
     """Structured result from a sub-agent."""
@@ -146,6 +204,7 @@ class SubAgentRunner:
         return SubAgentResult(
             mode=AgentMode.GENERAL,
             response=state_copy.get('ai_response'),
+            quick_replies=state_copy.get('quick_replies'),
             suggested_followups=state_copy.get('suggested_followups', [])
         )
 
@@ -263,7 +322,8 @@ class ResponseSynthesizer:
         synthesized = llm_synthesize_multi_mode(
             sub_agent_results=sub_agent_results,
             user_input=user_input,
-            context=context
+            context=context,
+            progress_callback=self.progress_callback
         )
 
         return {
@@ -360,7 +420,6 @@ class SupervisorOrchestrator:
 
     def __init__(self, progress_callback: Optional[Callable[[dict], None]] = None):
         self.progress_callback = progress_callback
-        self.runner = SubAgentRunner(progress_callback)
         self.synthesizer = ResponseSynthesizer(progress_callback)
         self.logger = get_logger("supervisor")
 
@@ -373,8 +432,7 @@ class SupervisorOrchestrator:
         Main entry point - orchestrates request processing.
 
         Flow:
-        1. Analyze request → detect intents
-        2. Parse filters
+        1-2. Analyze request (detect intents) and parse filters, concurrently
         3. Determine which sub-agents to run
         4. Execute sub-agents
         5. Synthesize response
@@ -392,11 +450,8 @@ class SupervisorOrchestrator:
         # Clear comparison table at start of each request
         state['comparison_table'] = None
 
-        # Step 1: Analyze request to detect intents
-        analysis = analyze_request(user_input, state)
-
-        # Step 2: Parse filters from conversation
-        state = semantic_parser_node(state, self.progress_callback)
+        # Steps 1-2: Analyze request to detect intents while parsing filters from conversation
+        analysis, state = self._analyze_and_parse(user_input, state)
         # Mark that semantic parsing is done to avoid duplicate parsing in sub-workflows
         state['_semantic_parsing_done'] = True
 
@@ -426,6 +481,34 @@ class SupervisorOrchestrator:
 
         return state
 
+    def _analyze_and_parse(
+        self,
+        user_input: str,
+        state: VehicleSearchState
+    ) -> Tuple[RequestAnalysis, VehicleSearchState]:
+        """
+        Run request analysis and semantic parsing concurrently.
+
+        Both are independent LLM round trips over the same input, so the turn
+        pays for the slower one instead of both. The analyzer gets a snapshot
+        of the pre-parse state, exactly what it saw when the two ran in sequence.
+
+        Args:
+            user_input: User's message
+            state: Current state (updated in place by the parser)
+
+        Returns:
+            Tuple of (request analysis, state with parsed filters)
+        """
+        snapshot = state.copy()
+        analysis_future = _get_executor().submit(analyze_request, user_input, snapshot)
+
+        # Parse on the calling thread so progress events keep their order
+        state = semantic_parser_node(state, self.progress_callback)
+        analysis = analysis_future.result()
+
+        return analysis, state
+
     def _create_execution_plan(
         self,
         analysis: RequestAnalysis,
@@ -472,34 +555,163 @@ class SupervisorOrchestrator:
         """
         Execute sub-agents according to plan.
 
+        Every mode, including a plan's only one, runs on the shared sub-agent
+        pool. Independent modes run concurrently; a mode listed in
+        MODE_DEPENDENCIES starts only after the modes it depends on and sees
+        their results (e.g. fresh ``recommended_vehicles`` from search). Each
+        mode has a timeout; a timed-out mode is cancelled and left out of the
+        results so the others can still be synthesized (or, if none are left,
+        the fallback response is used).
+
         Args:
             plan: Execution plan from _create_execution_plan
             user_input: User's message
             state: Current state
 
         Returns:
-            List of sub-agent results
-        """
-        results = []
+            List of sub-agent results (in plan order)
+        """
+        if not plan:
+            return []
+
+        dependencies = self._mode_dependencies(plan)
+        timeouts = self._mode_timeouts()
+        executor = _get_sub_agent_executor()
+        # A lone mode's response is final, so its streamed text goes straight to the client
+        stream_responses = len(plan) == 1
+
+        results: Dict[AgentMode, SubAgentResult] = {}
+        skipped: set = set()
+        running: Dict[Future, AgentMode] = {}
+        deadlines: Dict[AgentMode, float] = {}
+        cancel_events: Dict[AgentMode, threading.Event] = {}
+
+        def start_ready_modes() -> None:
+            for mode, params in plan.items():
+                if mode in results or mode in skipped or mode in deadlines:
+                    continue
+                blocking = dependencies.get(mode, set())
+                if blocking & skipped:
+                    self.logger.warning(f"Skipping {mode.value}: dependency did not complete")
+                    skipped.add(mode)
+                    continue
+                if not blocking <= set(results):
+                    continue
+
+                mode_state = self._state_for_mode(state, [results[dep] for dep in blocking])
+                cancel_events[mode] = threading.Event()
+                runner = SubAgentRunner(
+                    self._cancellable_callback(mode, cancel_events[mode], stream_responses)
+                )
+                future = executor.submit(self._run_mode, mode, params, user_input, mode_state, runner)
+                running[future] = mode
+                deadlines[mode] = time.monotonic() + timeouts.get(mode, _DEFAULT_MODE_TIMEOUT)
+
+        start_ready_modes()
+        try:
+            while running:
+                next_deadline = min(deadlines[mode] for mode in running.values())
+                done, _ = wait(running, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    mode = running.pop(future)
+                    results[mode] = future.result()
+
+                now = time.monotonic()
+                for future, mode in list(running.items()):
+                    if deadlines[mode] <= now:
+                        self.logger.warning(f"Sub-agent {mode.value} timed out after {timeouts.get(mode, _DEFAULT_MODE_TIMEOUT)}s; cancelling")
+                        cancel_events[mode].set()
+                        future.cancel()
+                        del running[future]
+                        skipped.add(mode)
+
+                start_ready_modes()
+        except BaseException:
+            # A sub-agent failed: stop the rest before propagating
+            for future, mode in running.items():
+                cancel_events[mode].set()
+                future.cancel()
+            raise
+
+        return [results[mode] for mode in plan if mode in results]
+
+    def _run_mode(
+        self,
+        mode: AgentMode,
+        params: Dict[str, Any],
+        user_input: str,
+        state: VehicleSearchState,
+        runner: "SubAgentRunner"
+    ) -> SubAgentResult:
+        """Run a single sub-agent mode with the given runner."""
+        if mode == AgentMode.ANALYTICAL:
+            return runner.run_analytical(params['questions'], state)
+        if mode == AgentMode.SEARCH:
+            return runner.run_search(state)
+        if mode == AgentMode.INTERVIEW:
+            return runner.run_interview(user_input, state)
+        return runner.run_general(state)
+
+    def _mode_dependencies(self, plan: Dict[AgentMode, Dict[str, Any]]) -> Dict[AgentMode, set]:
+        """Return the dependencies of each planned mode, restricted to modes in the plan."""
+        configured = get_config().get('supervisor.mode_dependencies') or {}
+        dependencies: Dict[AgentMode, set] = {}
+
+        for mode in plan:
+            declared = configured.get(mode.value, [dep.value for dep in MODE_DEPENDENCIES.get(mode, ())])
+            dependencies[mode] = {AgentMode(dep) for dep in declared or []} & set(plan)
+        return dependencies
+
+    def _mode_timeouts(self) -> Dict[AgentMode, float]:
+        """Return per-mode timeouts in seconds from config."""
+        configured = get_config().get('supervisor.mode_timeouts') or {}
+        return {
+            mode: float(configured.get(mode.value, _DEFAULT_MODE_TIMEOUT))
+            for mode in AgentMode
+        }
 
-        for mode, params in plan.items():
-            if mode == AgentMode.ANALYTICAL:
-                result = self.runner.run_analytical(params['questions'], state)
-                results.append(result)
+    def _state_for_mode(
+        self,
+        state: VehicleSearchState,
+        upstream: List[SubAgentResult]
+    ) -> VehicleSearchState:
+        """
+        Give a mode its own state copy, with upstream search results applied.
 
-            elif mode == AgentMode.SEARCH:
-                result = self.runner.run_search(state)
-                results.append(result)
+        The conversation history list is copied too: a mode that outlives its
+        timeout keeps running and must not append to the session's history.
+        """
+        mode_state = state.copy()
+        mode_state['conversation_history'] = list(state.get('conversation_history', []))
+        for result in upstream:
+            if result.mode == AgentMode.SEARCH and result.vehicles is not None:
+                mode_state['recommended_vehicles'] = result.vehicles
+        return mode_state
 
-            elif mode == AgentMode.INTERVIEW:
-                result = self.runner.run_interview(user_input, state)
-                results.append(result)
+    def _cancellable_callback(
+        self,
+        mode: AgentMode,
+        cancelled: threading.Event,
+        stream_responses: bool = False
+    ) -> Callable[[dict], None]:
+        """
+        Wrap the progress callback so a cancelled sub-agent stops at its next progress update.
 
-            elif mode == AgentMode.GENERAL:
-                result = self.runner.run_general(state)
-                results.append(result)
+        Threads cannot be killed, so cancellation is cooperative: once the mode
+        times out, its next progress event raises SubAgentCancelled. Streamed
+        response text is dropped unless ``stream_responses`` is set: with several
+        modes only the synthesized response is final.
+        """
+        def callback(update: dict) -> None:
+            if cancelled.is_set():
+                raise SubAgentCancelled(f"{mode.value} sub-agent was cancelled")
+            if is_response_delta(update) and not stream_responses:
+                return
+            if self.progress_callback:
+                self.progress_callback(update)
 
-        return results
+        return callback
 
     def _handle_special_cases(
         self,
@@ -524,6 +736,7 @@ class SupervisorOrchestrator:
         if len(results) == 1 and results[0].mode == AgentMode.GENERAL:
             state_copy = state.copy()
             state_copy['ai_response'] = results[0].response
+            state_copy['quick_replies'] = results[0].quick_replies
             state_copy['suggested_followups'] = results[0].suggested_followups
             return state_copy
 
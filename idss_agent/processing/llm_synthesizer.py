@@ -4,10 +4,11 @@ LLM-based response synthesizer for multi-mode scenarios.
 Used when multiple sub-agents are active to create smooth, natural responses.
 Single-mode responses use direct output (no synthesis needed).
 """
-from typing import Dict, Any, Optional, List
+from typing import Callable, Dict, Any, Optional, List
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
+from idss_agent.utils.llm_registry import get_llm
+from idss_agent.utils.streaming import invoke_streaming, token_streaming_enabled
 from idss_agent.utils.logger import get_logger
 
 logger = get_logger("llm_synthesizer")
@@ -32,7 +33,8 @@ class SynthesizedResponse(BaseModel):
 def llm_synthesize_multi_mode(
     sub_agent_results: Dict[str, Any],
     user_input: str,
-    context: str = ""
+    context: str = "",
+    progress_callback: Optional[Callable[[dict], None]] = None
 ) -> SynthesizedResponse:
     """
     Use LLM to synthesize smooth response from multiple sub-agent results.
@@ -47,6 +49,7 @@ def llm_synthesize_multi_mode(
         sub_agent_results: Dict with keys 'interview', 'analytical', 'search'
         user_input: Original user input
         context: Additional context (filters, preferences)
+        progress_callback: Optional callback; receives the response text as it is generated
 
     Returns:
         SynthesizedResponse with smooth, unified message
@@ -154,14 +157,17 @@ Please synthesize these into ONE smooth, conversational response that:
 """
 
     # Call LLM for synthesis
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7)
-    structured_llm = llm.with_structured_output(SynthesizedResponse)
+    structured_llm = get_llm(
+        'response_synthesizer', SynthesizedResponse,
+        streaming=token_streaming_enabled(progress_callback),
+    )
 
     try:
-        result = structured_llm.invoke([
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=user_prompt)
-        ])
+        result = invoke_streaming(
+            structured_llm,
+            [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)],
+            progress_callback,
+        )
 
         # Preserve quick replies from interview if available
         if has_interview and sub_agent_results['interview'].get('quick_replies'):
@@ -7,10 +7,9 @@ in ways that signal interest (like favoriting a vehicle).
 import json
 from typing import Dict, Any, Optional, List
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
 from idss_agent.state.schema import VehicleSearchState
-from idss_agent.utils.config import get_config
+from idss_agent.utils.llm_registry import get_llm
 from idss_agent.utils.prompts import render_prompt
 from idss_agent.utils.logger import get_logger
 
@@ -43,10 +42,6 @@ def generate_favorite_response(
         ProactiveResponse with contextual question and quick replies for analytical deep dive
     """
 
-    # Get configuration
-    config = get_config()
-    model_config = config.get_model_config('general')  # Use general model for proactive responses
-
     # Extract user preferences
     priorities = state.get('implicit_preferences', {}).get('priorities', [])
     concerns = state.get('implicit_preferences', {}).get('concerns', [])
@@ -81,13 +76,8 @@ def generate_favorite_response(
 Generate the proactive response now.
 """
 
-    # Create LLM with structured output
-    llm = ChatOpenAI(
-        model=model_config['name'],
-        temperature=model_config['temperature'],
-        max_tokens=model_config.get('max_tokens', 500)
-    )
-    structured_llm = llm.with_structured_output(ProactiveResponse)
+    # Create LLM with structured output (general model is used for proactive responses)
+    structured_llm = get_llm('general', ProactiveResponse, default_max_tokens=500)
 
     try:
         # Generate response
@@ -2,19 +2,35 @@
 Recommendation agent node - uses ReAct to build a list of 20 vehicles.
 """
 import concurrent.futures
+import copy
+import hashlib
 import math
 import json
-from typing import Dict, Any, List, Optional, Tuple, Callable
-from langchain_openai import ChatOpenAI
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Tuple, Callable
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.prebuilt import create_react_agent
 from pydantic import BaseModel, Field
 from idss_agent.state.schema import VehicleSearchState
 from idss_agent.tools.autodev_api import search_vehicle_listings, get_vehicle_photos_by_vin
-from idss_agent.tools.local_vehicle_store import LocalVehicleStore, VehicleStoreError
+from idss_agent.tools.local_vehicle_store import (
+    DEFAULT_FACETS,
+    DatasetSignature,
+    LocalVehicleStore,
+    VehicleStoreError,
+    relaxed_filters,
+)
 from idss_agent.tools.zipcode_lookup import get_location_from_zip_or_coords
-from idss_agent.processing.vector_ranker import rank_local_vehicles_by_similarity
+from idss_agent.processing.vector_ranker import (
+    get_catalog_index,
+    rank_catalog_by_similarity,
+    rank_local_vehicles_by_similarity,
+)
 from idss_agent.utils.config import get_config
+from idss_agent.utils.llm_registry import get_llm
 from idss_agent.utils.logger import get_logger
 
 
@@ -22,16 +38,230 @@ logger = get_logger("components.recommendation")
 
 _LOCAL_STORE_CACHE: Dict[bool, LocalVehicleStore] = {}
 
+# Candidates pulled per local query (price-ordered mode) / kept after catalog ranking
+LOCAL_CANDIDATE_LIMIT = 60
+
 
 def _get_local_vehicle_store(require_photos: bool) -> LocalVehicleStore:
     """Return cached LocalVehicleStore instance keyed by photo requirement."""
     store = _LOCAL_STORE_CACHE.get(require_photos)
     if store is None:
-        store = LocalVehicleStore(require_photos=require_photos)
+        config = get_config()
+        store = LocalVehicleStore(
+            require_photos=require_photos,
+            pool_size=config.get('local_store.pool_size', 8),
+            mmap_size_mb=config.get('local_store.mmap_size_mb', 256),
+            cache_size_mb=config.get('local_store.cache_size_mb', 64),
+            include_raw_json=config.get('local_store.include_raw_json', True),
+        )
         _LOCAL_STORE_CACHE[require_photos] = store
     return store
 
 
+class _CandidateCache:
+    """
+    Cross-session LRU + TTL cache of preference-independent local search results.
+
+    Entries are tagged with the store's dataset signature (file identity plus
+    the version stamped by the migration and precompute tools) and dropped when
+    it changes. Embedding upserts on the request path leave it unchanged, so
+    they do not flush the cache.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, DatasetSignature, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: str, signature: Optional[DatasetSignature]) -> Optional[Any]:
+        """Cached value for ``key``; pass the signature read before computing a replacement."""
+        if not self.enabled or signature is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic() or entry[1] != signature:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: str, signature: Optional[DatasetSignature], value: Any) -> None:
+        if not self.enabled or signature is None:
+            return
+        entry = (time.monotonic() + self.ttl_seconds, signature, value)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_CANDIDATE_CACHE: Optional[_CandidateCache] = None
+
+
+def _get_candidate_cache() -> _CandidateCache:
+    """Return the process-wide candidate cache, sized from config on first use."""
+    global _CANDIDATE_CACHE
+    if _CANDIDATE_CACHE is None:
+        config = get_config()
+        _CANDIDATE_CACHE = _CandidateCache(
+            max_entries=config.get('local_store.candidate_cache_size', 256),
+            ttl_seconds=config.get('local_store.candidate_cache_ttl_seconds', 600),
+        )
+    return _CANDIDATE_CACHE
+
+
+def _canonical_filter_value(value: Any) -> Any:
+    if isinstance(value, str):
+        # Multi-value filters are matched case-insensitively in any order
+        parts = sorted(part.strip().casefold() for part in value.split(",") if part.strip())
+        return ",".join(parts)
+    if isinstance(value, (list, tuple)):
+        return sorted(str(_canonical_filter_value(item)) for item in value)
+    return value
+
+
+def _candidate_cache_key(
+    kind: str,
+    store: LocalVehicleStore,
+    filters: Dict[str, Any],
+    user_latitude: Optional[float],
+    user_longitude: Optional[float],
+) -> str:
+    """Hash filters, rounded coordinates (~1 km) and store settings into a cache key."""
+    if not filters.get("search_radius"):
+        # Location only affects results through the radius filter
+        user_latitude = user_longitude = None
+    payload = {
+        "kind": kind,
+        "db": str(store.db_path),
+        "require_photos": store.require_photos,
+        "filters": {
+            key: _canonical_filter_value(value)
+            for key, value in filters.items()
+            if value not in (None, "", [], {})
+        },
+        "lat": round(user_latitude, 2) if user_latitude is not None else None,
+        "lon": round(user_longitude, 2) if user_longitude is not None else None,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def warm_catalog_ranking_index() -> None:
+    """Load the in-memory catalog embedding index when catalog ranking is enabled."""
+    config = get_config()
+    if not config.features.get('use_local_vehicle_store', False):
+        return
+    if config.get('local_store.ranking_mode', 'candidates') != 'catalog':
+        return
+
+    try:
+        store = _get_local_vehicle_store(require_photos=config.features.get('require_photos', True))
+        get_catalog_index(store.db_path)
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.error("Failed to load catalog embedding index: %s", exc)
+
+
+def _resolve_search_location(
+    filters: Dict[str, Any],
+    latitude: Optional[float],
+    longitude: Optional[float],
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Resolve the user's coordinates (browser location OR ZIP lookup).
+
+    Applies the default search_radius to ``filters`` (in place) when a location
+    is known but no radius was given.
+    """
+    user_coords = get_location_from_zip_or_coords(
+        zipcode=filters.get('zip'),
+        latitude=latitude,
+        longitude=longitude
+    )
+    if not user_coords:
+        return None, None
+
+    if not filters.get('search_radius'):
+        default_radius = get_config().limits.get('default_search_radius', 100)
+        filters['search_radius'] = default_radius
+        logger.info(f"Applied default search_radius: {default_radius} miles (user provided location but no explicit radius)")
+
+    return user_coords[0], user_coords[1]
+
+
+def get_facet_counts(
+    filters: Dict[str, Any],
+    fields: Sequence[str] = DEFAULT_FACETS,
+    user_latitude: Optional[float] = None,
+    user_longitude: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Per-value listing counts for the local catalog under the given filters.
+
+    Filters and location are resolved the way the recommendation step resolves
+    them (model normalization, ZIP lookup, default search radius), so ``total``
+    matches what a search would find. Results go through the cross-session
+    candidate cache. See LocalVehicleStore.facet_counts for the result format.
+
+    Raises:
+        ValueError: If a field is not a supported facet, or a categorical
+            filter value is not a string.
+        FileNotFoundError: If the local vehicle database is missing.
+    """
+    filters = dict(filters)
+    if isinstance(filters.get('model'), str):
+        filters['model'] = filters['model'].replace('-', ' ').replace('_', ' ')
+    user_latitude, user_longitude = _resolve_search_location(filters, user_latitude, user_longitude)
+
+    store = _get_local_vehicle_store(require_photos=get_config().features.get('require_photos', True))
+    cache = _get_candidate_cache()
+    kind = f"facets:{','.join(sorted(set(fields)))}:{limit}"
+    cache_key = _candidate_cache_key(kind, store, filters, user_latitude, user_longitude)
+
+    signature = store.dataset_signature()
+    cached = cache.get(cache_key, signature)
+    if cached is None:
+        cached = store.facet_counts(
+            filters,
+            fields,
+            user_latitude=user_latitude,
+            user_longitude=user_longitude,
+            limit=limit,
+        )
+        cache.put(cache_key, signature, cached)
+    return copy.deepcopy(cached)
+
+
+def get_vehicle_by_vin(vin: str) -> Optional[Dict[str, Any]]:
+    """Look up one catalog listing by VIN (None if unknown)."""
+    return _get_local_vehicle_store(False).get_by_vin(vin)
+
+
+def close_local_vehicle_stores() -> None:
+    """Close pooled connections of all cached LocalVehicleStore instances."""
+    if _CANDIDATE_CACHE is not None:
+        _CANDIDATE_CACHE.clear()
+    while _LOCAL_STORE_CACHE:
+        _, store = _LOCAL_STORE_CACHE.popitem()
+        store.close()
+
+
 class VehicleSuggestion(BaseModel):
     """Suggested vehicles based on user preferences."""
     makes: List[str] = Field(description="List of 2-4 recommended vehicle makes (e.g., ['Honda', 'Toyota', 'Mazda'])")
@@ -85,8 +315,8 @@ If already tried: Honda, Toyota (luxury sedans)
 Generate NEW suggestions:"""
 
     try:
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.5)  # Higher temp for variety
-        structured_llm = llm.with_structured_output(VehicleSuggestion)
+        # Higher temperature than initial suggestions for variety
+        structured_llm = get_llm('vehicle_suggestion_retry', VehicleSuggestion)
 
         result = structured_llm.invoke([
             SystemMessage(content="You are a vehicle recommendation expert."),
@@ -175,8 +405,7 @@ def suggest_vehicles_from_preferences(
 Generate your suggestions:"""
 
     try:
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.3)
-        structured_llm = llm.with_structured_output(VehicleSuggestion)
+        structured_llm = get_llm('vehicle_suggestion', VehicleSuggestion)
 
         result = structured_llm.invoke([
             SystemMessage(content="You are a vehicle recommendation expert."),
@@ -289,56 +518,169 @@ def enrich_vehicles_with_photos(vehicles: List[Dict[str, Any]], max_workers: int
     return vehicles
 
 
+def _rank_local_catalog(
+    store: LocalVehicleStore,
+    filters: Dict[str, Any],
+    explicit_filters: Dict[str, Any],
+    implicit_preferences: Dict[str, Any],
+    user_latitude: Optional[float] = None,
+    user_longitude: Optional[float] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Rank every listing matching the filters by vector similarity.
+
+    Returns:
+        Up to LOCAL_CANDIDATE_LIMIT payloads with ``_vector_score`` set, or None
+        when there is no preference signal (caller falls back to price order).
+    """
+    cache = _get_candidate_cache()
+    cache_key = _candidate_cache_key("rowids", store, filters, user_latitude, user_longitude)
+    signature = store.dataset_signature()
+    rowids = cache.get(cache_key, signature)
+    if rowids is None:
+        rowids = tuple(store.search_rowids(filters, user_latitude=user_latitude, user_longitude=user_longitude))
+        cache.put(cache_key, signature, rowids)
+
+    ranked = rank_catalog_by_similarity(
+        rowids,
+        explicit_filters,
+        implicit_preferences,
+        store.db_path,
+        top_k=LOCAL_CANDIDATE_LIMIT,
+        load_payloads=store.get_by_rowids,
+        max_unindexed=get_config().get('local_store.catalog_max_unindexed', 500),
+    )
+    if ranked is None:
+        return None
+
+    payloads = store.get_by_rowids([rowid for rowid, _ in ranked])
+    vehicles: List[Dict[str, Any]] = []
+    for rowid, score in ranked:
+        vehicle = payloads.get(rowid)
+        if vehicle is not None:
+            vehicle["_vector_score"] = score
+            vehicles.append(vehicle)
+    return vehicles
+
+
+# Filter keys the local search drops, in order, when nothing matches
+_FALLBACK_RELAX = ("model", "make")
+
+
+def _fallback_message(filters: Dict[str, Any], tier: int) -> Optional[str]:
+    """
+    User-facing note for results from a relaxed tier of ``relaxed_filters(filters, _FALLBACK_RELAX)``.
+
+    Tier 0 is an exact match (no note); later tiers dropped ``model`` and/or ``make``.
+    """
+    if tier == 0:
+        return None
+    tier_filters = relaxed_filters(filters, _FALLBACK_RELAX)[tier]
+    if tier_filters.get("make"):
+        logger.info("Local fallback: removing model filter")
+        return f"Showing {tier_filters['make']} vehicles matching your other criteria"
+    if filters.get("make"):
+        logger.info("Local fallback: removing make filter")
+        return "Showing the closest matches available based on your other criteria"
+    logger.info("Local fallback: removing model filter")
+    return "Showing available vehicles matching your other criteria"
+
+
 def _search_local_listings(
     store: LocalVehicleStore,
     filters: Dict[str, Any],
     user_latitude: Optional[float] = None,
     user_longitude: Optional[float] = None,
+    ranker: Optional[Callable[[Dict[str, Any]], Optional[List[Dict[str, Any]]]]] = None,
 ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
-    """Execute local database searches with retry and fallback strategy."""
-    def run_query(active_filters: Dict[str, Any]) -> List[Dict[str, Any]]:
-        try:
-            return store.search_listings(
-                active_filters,
-                limit=60,
+    """
+    Execute the local database search, relaxing ``model`` then ``make`` when nothing matches.
+
+    Without a ranker the tiers run as one statement that stops at the first
+    tier with matches. With a ranker the best tier is found first (cheap
+    ``EXISTS`` probes) and only that tier is ranked.
+
+    Args:
+        store: Local vehicle store.
+        filters: Explicit filters for the first attempt.
+        user_latitude: Optional user latitude for radius filtering.
+        user_longitude: Optional user longitude for radius filtering.
+        ranker: Optional catalog ranker used instead of the price-ordered query;
+            returning None falls back to the price-ordered query.
+    """
+    try:
+        if ranker is None:
+            vehicles, tier = store.search_listings_relaxed(
+                filters,
+                _FALLBACK_RELAX,
+                limit=LOCAL_CANDIDATE_LIMIT,
                 order_by="price",
                 user_latitude=user_latitude,
-                user_longitude=user_longitude
+                user_longitude=user_longitude,
+            )
+        else:
+            vehicles = []
+            tier = store.match_tier(
+                filters, _FALLBACK_RELAX, user_latitude=user_latitude, user_longitude=user_longitude
             )
-        except (VehicleStoreError, FileNotFoundError) as exc:
-            logger.error("Local vehicle query failed: %s", exc)
-            return []
+            if tier is not None:
+                tier_filters = relaxed_filters(filters, _FALLBACK_RELAX)[tier]
+                try:
+                    ranked = ranker(tier_filters)
+                except (VehicleStoreError, sqlite3.Error) as exc:
+                    logger.error("Catalog ranking failed, using price order: %s", exc)
+                    ranked = None
+                if ranked is None:
+                    ranked = store.search_listings(
+                        tier_filters,
+                        limit=LOCAL_CANDIDATE_LIMIT,
+                        order_by="price",
+                        user_latitude=user_latitude,
+                        user_longitude=user_longitude,
+                    )
+                vehicles = ranked
+    except (VehicleStoreError, FileNotFoundError) as exc:
+        logger.error("Local vehicle query failed: %s", exc)
+        return [], None
 
-    fallback_message = None
-    vehicles = run_query(filters)
+    if not vehicles:
+        logger.warning("Local search returned no vehicles after all fallback steps")
+        return [], None
 
-    if not vehicles and filters.get("model"):
-        logger.info("Local fallback: removing model filter")
-        fallback_filters = filters.copy()
-        fallback_filters.pop("model", None)
-        vehicles = run_query(fallback_filters)
+    return vehicles, _fallback_message(filters, tier)
 
-        if vehicles:
-            fallback_message = (
-                f"Showing {fallback_filters.get('make', 'available')} vehicles matching your other criteria"
-            )
 
-    if not vehicles and filters.get("make"):
-        logger.info("Local fallback: removing make filter")
-        fallback_filters = filters.copy()
-        fallback_filters.pop("model", None)
-        fallback_filters.pop("make", None)
-        vehicles = run_query(fallback_filters)
-
-        if vehicles:
-            fallback_message = (
-                "Showing the closest matches available based on your other criteria"
-            )
+def _search_local_listings_cached(
+    store: LocalVehicleStore,
+    filters: Dict[str, Any],
+    user_latitude: Optional[float] = None,
+    user_longitude: Optional[float] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Run _search_local_listings through the cross-session candidate cache.
 
-    if not vehicles:
-        logger.warning("Local search returned no vehicles after all fallback steps")
+    The cached value is the pre-ranking candidate set; callers get shallow
+    copies so per-session ranking scores and photo stubs never leak back.
+    """
+    cache = _get_candidate_cache()
+    cache_key = _candidate_cache_key("listings", store, filters, user_latitude, user_longitude)
+
+    signature = store.dataset_signature()
+    cached = cache.get(cache_key, signature)
+    if cached is None:
+        vehicles, fallback_message = _search_local_listings(
+            store,
+            filters,
+            user_latitude=user_latitude,
+            user_longitude=user_longitude,
+        )
+        cached = ([vehicle.copy() for vehicle in vehicles], fallback_message)
+        cache.put(cache_key, signature, cached)
+        return vehicles, fallback_message
 
-    return vehicles, fallback_message
+    logger.info("Local candidate cache hit (%d vehicles)", len(cached[0]))
+    vehicles, fallback_message = cached
+    return [vehicle.copy() for vehicle in vehicles], fallback_message
 
 
 def _attach_local_photo_stubs(vehicles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -434,32 +776,46 @@ def update_recommendation_list(
 
     used_local_pipeline = use_local_store and local_store is not None
 
-    # Get user location coordinates (browser location OR ZIP lookup)
-    user_coords = get_location_from_zip_or_coords(
-        zipcode=filters.get('zip'),
-        latitude=state.get('user_latitude'),
-        longitude=state.get('user_longitude')
+    user_lat, user_lon = _resolve_search_location(
+        filters, state.get('user_latitude'), state.get('user_longitude')
     )
 
-    user_lat = user_coords[0] if user_coords else None
-    user_lon = user_coords[1] if user_coords else None
-
-    # Apply default search_radius if user provided location but no explicit radius
-    if user_coords and not filters.get('search_radius'):
-        default_radius = config.limits.get('default_search_radius', 100)
-        filters['search_radius'] = default_radius
-        logger.info(f"Applied default search_radius: {default_radius} miles (user provided location but no explicit radius)")
-
     vehicles: List[Dict[str, Any]] = []
     fallback_message: Optional[str] = None
 
+    catalog_ranked = False
+
     if used_local_pipeline:
-        vehicles, fallback_message = _search_local_listings(
-            local_store,
-            filters,
-            user_latitude=user_lat,
-            user_longitude=user_lon,
-        )
+        ranker = None
+        if config.get('local_store.ranking_mode', 'candidates') == 'catalog':
+            def ranker(active_filters: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+                nonlocal catalog_ranked
+                ranked = _rank_local_catalog(
+                    local_store,
+                    active_filters,
+                    state['explicit_filters'],
+                    implicit,
+                    user_latitude=user_lat,
+                    user_longitude=user_lon,
+                )
+                catalog_ranked = ranked is not None
+                return ranked
+
+        if ranker is None:
+            vehicles, fallback_message = _search_local_listings_cached(
+                local_store,
+                filters,
+                user_latitude=user_lat,
+                user_longitude=user_lon,
+            )
+        else:
+            vehicles, fallback_message = _search_local_listings(
+                local_store,
+                filters,
+                user_latitude=user_lat,
+                user_longitude=user_lon,
+                ranker=ranker,
+            )
     else:
         # Build prompt for recommendation agent
         recommendation_prompt = f"""
@@ -486,7 +842,7 @@ You are a vehicle recommendation agent. Your goal is to find up to 20 vehicles f
 
         # Create ReAct agent with search tool
         tools = [search_vehicle_listings]
-        llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+        llm = get_llm('recommendation_agent')
         agent = create_react_agent(llm, tools)
 
         # Run the agent
@@ -673,7 +1029,8 @@ You are a vehicle recommendation agent. Find up to 20 vehicles with minimal filt
     else:
         vehicles = enrich_vehicles_with_photos(vehicles)
 
-    if used_local_pipeline and local_store:
+    # Catalog ranking already scored the full match set
+    if used_local_pipeline and local_store and not catalog_ranked:
         vehicles = rank_local_vehicles_by_similarity(
             vehicles,
             state['explicit_filters'],
@@ -2,13 +2,14 @@
 Semantic parser node for extracting vehicle search criteria from user input.
 """
 import json
-from typing import Optional, Callable
+import re
+from typing import Any, Callable, Dict, List, Optional
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage
+from idss_agent.utils.config import get_config
 from idss_agent.utils.logger import get_logger
 from idss_agent.state.schema import VehicleSearchState, get_latest_user_message, VehicleFiltersPydantic, ImplicitPreferencesPydantic
-from idss_agent.utils.config import get_config
+from idss_agent.utils.llm_registry import get_llm
 from idss_agent.utils.prompts import render_prompt
 
 logger = get_logger("components.semantic_parser")
@@ -27,6 +28,29 @@ class SemanticParserOutput(BaseModel):
         default_factory=ImplicitPreferencesPydantic,
         description="Implicit user preferences"
     )
+    conversation_summary: str = Field(
+        default="",
+        description="1-3 sentence summary of what the user wants, has ruled out and has asked about so far"
+    )
+
+
+class IncrementalParserOutput(SemanticParserOutput):
+    """Structured output when parsing only the messages since the last parse."""
+    needs_full_context: bool = Field(
+        default=False,
+        description=(
+            "True if the new messages refer back to, or contradict, something that the current "
+            "filters and summary do not capture, so the full conversation must be re-read"
+        )
+    )
+
+
+# Phrases pointing back at earlier turns that the summary may not preserve
+_BACK_REFERENCE = re.compile(
+    r"\b(?:earlier|originally|at first|in the beginning|go(?:ing)? back|back to (?:the|what|my)|"
+    r"like i said|as i (?:said|mentioned)|i (?:said|mentioned) (?:before|earlier))\b",
+    re.IGNORECASE,
+)
 
 
 def semantic_parser_node(
@@ -34,13 +58,16 @@ def semantic_parser_node(
     progress_callback: Optional[Callable[[dict], None]] = None
 ) -> VehicleSearchState:
     """
-    Semantic parser node that extracts vehicle preferences from the ENTIRE conversation.
+    Semantic parser node that extracts vehicle preferences from the conversation.
 
     This node:
-    1. Analyzes the COMPLETE conversation history
+    1. Sends the LLM the current filters/preferences, a rolling summary and only
+       the messages added since the last parse (incremental mode), or the
+       conversation itself on the first turn, on a detected contradiction or
+       back-reference, or when incremental mode is disabled (full mode)
     2. Uses an LLM to generate COMPLETE filters representing current search intent
     3. REPLACES filters entirely (not merge) based on LLM's analysis
-    4. Stores previous filters for history tracking
+    4. Advances the parse cursor and rolling summary kept in state
 
     Args:
         state: Current vehicle search state
@@ -63,48 +90,30 @@ def semantic_parser_node(
             "status": "in_progress"
         })
 
-    # Get configuration
-    config = get_config()
-    model_config = config.get_model_config('semantic_parser')
-
-    # Create LLM with config parameters
-    llm = ChatOpenAI(
-        model=model_config['name'],
-        temperature=model_config['temperature'],
-        max_tokens=model_config.get('max_tokens')
-    )
-
-    # Build COMPLETE conversation context from ALL LangChain messages
-    history_context = "\n".join([
-        f"{'User' if isinstance(msg, HumanMessage) else 'Assistant'}: {msg.content}"
-        for msg in state.get("conversation_history", [])  # ALL messages, not just last 5
-    ])
+    history = state.get("conversation_history", [])
+    settings = _parser_settings()
 
     # Store current filters as previous (for history tracking)
     current_filters = state.get("explicit_filters", {})
-    current_implicit = state.get("implicit_preferences", {})
-
-    context_info = f"""
-COMPLETE Conversation History:
-{history_context}
-
-Based on the ENTIRE conversation above, extract the user's CURRENT search intent.
-"""
-
-    # Load system prompt from template
-    system_prompt = render_prompt('semantic_parser.j2')
-
-    # Call LLM with structured output
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=context_info)
-    ]
-
-    # Use structured output to avoid JSON parsing errors
-    structured_llm = llm.with_structured_output(SemanticParserOutput)
 
     try:
-        parsed_data: SemanticParserOutput = structured_llm.invoke(messages)
+        parsed_data: Optional[SemanticParserOutput] = None
+        if _can_parse_incrementally(state, user_input, settings):
+            parsed_data = get_llm('semantic_parser', IncrementalParserOutput).invoke(
+                _incremental_messages(state, settings)
+            )
+            if parsed_data.needs_full_context:
+                logger.info("Incremental parse flagged missing context - re-parsing full conversation")
+                parsed_data = None
+
+        if parsed_data is None:
+            parsed_data = get_llm('semantic_parser', SemanticParserOutput).invoke(
+                _full_messages(state, settings)
+            )
+
+        state["_parser_cursor"] = len(history)
+        if parsed_data.conversation_summary:
+            state["_parser_summary"] = _truncate(parsed_data.conversation_summary, settings["summary_max_chars"])
 
         # Check if there are new filters
         if not parsed_data.has_new_filters:
@@ -152,6 +161,94 @@ Based on the ENTIRE conversation above, extract the user's CURRENT search intent
     return state
 
 
+def _parser_settings() -> Dict[str, Any]:
+    config = get_config()
+    return {
+        "incremental": config.get('semantic_parser.incremental', True),
+        "max_new_messages": config.get('semantic_parser.max_new_messages', 6),
+        "max_message_chars": config.get('semantic_parser.max_message_chars', 1500),
+        "summary_max_chars": config.get('semantic_parser.summary_max_chars', 1500),
+        "full_parse_max_messages": config.get('semantic_parser.full_parse_max_messages', 40),
+    }
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    text = str(text)
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + "…"
+
+
+def _format_messages(messages: List[BaseMessage], max_chars: int) -> str:
+    return "\n".join(
+        f"{'User' if isinstance(msg, HumanMessage) else 'Assistant'}: {_truncate(msg.content, max_chars)}"
+        for msg in messages
+    )
+
+
+def _can_parse_incrementally(state: VehicleSearchState, user_input: str, settings: Dict[str, Any]) -> bool:
+    """Incremental parsing needs a previous parse to build on and no back-reference to earlier turns."""
+    if not settings["incremental"]:
+        return False
+
+    cursor = state.get("_parser_cursor", 0)
+    history = state.get("conversation_history", [])
+    if cursor <= 0 or cursor >= len(history):
+        return False
+    if len(history) - cursor > settings["max_new_messages"]:
+        # Too many unparsed messages to fit the bounded prompt without dropping some
+        return False
+
+    if _BACK_REFERENCE.search(user_input):
+        logger.info("Latest message refers back to earlier turns - re-parsing full conversation")
+        return False
+    return True
+
+
+def _incremental_messages(state: VehicleSearchState, settings: Dict[str, Any]) -> List[BaseMessage]:
+    history = state.get("conversation_history", [])
+    new_messages = history[state["_parser_cursor"]:]
+
+    context_info = f"""
+CURRENT Explicit Filters:
+{json.dumps(state.get("explicit_filters", {}), default=str)}
+
+CURRENT Implicit Preferences:
+{json.dumps(state.get("implicit_preferences", {}), default=str)}
+
+Summary of Earlier Conversation:
+{state.get("_parser_summary") or "(none)"}
+
+NEW Messages:
+{_format_messages(new_messages, settings["max_message_chars"])}
+
+Based on the current filters, the summary and the new messages, extract the user's CURRENT search intent.
+"""
+    return [
+        SystemMessage(content=render_prompt('semantic_parser.j2', {'incremental': True})),
+        HumanMessage(content=context_info),
+    ]
+
+
+def _full_messages(state: VehicleSearchState, settings: Dict[str, Any]) -> List[BaseMessage]:
+    history = state.get("conversation_history", [])
+    recent = history[-settings["full_parse_max_messages"]:]
+
+    # Very long sessions keep only the most recent messages, prefixed by the rolling summary
+    earlier = ""
+    if len(recent) < len(history) and state.get("_parser_summary"):
+        earlier = f"Summary of Earlier Conversation:\n{state['_parser_summary']}\n\n"
+
+    context_info = f"""
+{earlier}COMPLETE Conversation History:
+{_format_messages(recent, settings["max_message_chars"])}
+
+Based on the ENTIRE conversation above, extract the user's CURRENT search intent.
+"""
+    return [
+        SystemMessage(content=render_prompt('semantic_parser.j2')),
+        HumanMessage(content=context_info),
+    ]
+
+
 def format_state_summary(state: VehicleSearchState) -> str:
     """
     Format the current state into a readable summary.
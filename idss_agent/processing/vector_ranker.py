@@ -3,80 +3,481 @@ Lightweight vector similarity ranking for local vehicle recommendations.
 """
 from __future__ import annotations
 
+import hashlib
 import json
 import math
 import re
 import sqlite3
+import sys
+import threading
+from array import array
 from collections import Counter
+from contextlib import closing
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
+import numpy as np
+
+from idss_agent.tools.local_vehicle_store import DatasetSignature, dataset_signature
 from idss_agent.utils.logger import get_logger
+from idss_agent.utils.sqlite_pool import SQLiteConnectionPool
 
 logger = get_logger("processing.vector_ranker")
 
 _TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+# Bump when _embed_vehicle changes so precomputed embeddings are refreshed
+EMBEDDING_VERSION = 1
+EMBEDDING_TABLE = "vehicle_embedding_vectors"
+# JSON token→weight table used before the packed binary format
+LEGACY_EMBEDDING_TABLE = "vehicle_embeddings"
 _EMBED_STORE_CACHE: Dict[Path, "VehicleEmbeddingStore"] = {}
+_CATALOG_INDEX_CACHE: Dict[Path, "CatalogEmbeddingIndex"] = {}
+_CATALOG_INDEX_LOCK = threading.Lock()
+# Databases whose catalog index is being rebuilt in the background
+_CATALOG_INDEX_REBUILDS: Set[Path] = set()
+
+
+# Packed embedding layout: little-endian uint32 token ids + float32 weights
+_ID_DTYPE = np.dtype("<u4")
+_WEIGHT_DTYPE = np.dtype("<f4")
+
+SparseVector = Tuple[np.ndarray, np.ndarray]
+_EMPTY_VECTOR: SparseVector = (np.zeros(0, dtype=_ID_DTYPE), np.zeros(0, dtype=_WEIGHT_DTYPE))
+
+
+def _pack_ids(ids: Sequence[int]) -> bytes:
+    packed = array("I", ids)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _pack_weights(weights: Sequence[float]) -> bytes:
+    packed = array("f", weights)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(token_ids: bytes, weights: bytes) -> SparseVector:
+    """Decode packed BLOBs into (ids, weights) NumPy arrays without copying."""
+    return (
+        np.frombuffer(token_ids, dtype=_ID_DTYPE),
+        np.frombuffer(weights, dtype=_WEIGHT_DTYPE),
+    )
 
 
 class VehicleEmbeddingStore:
-    """Persistent embedding cache stored alongside the main vehicle database."""
+    """
+    Persistent embedding cache stored alongside the main vehicle database.
+
+    Tokens are mapped to stable integer ids in ``embedding_vocabulary``; each
+    embedding is stored in ``vehicle_embedding_vectors`` as two BLOBs (packed
+    uint32 token ids and float32 weights) that decode straight into NumPy.
+    """
 
-    def __init__(self, db_path: Path):
+    # Stay well below SQLite's host-parameter limit for IN (...) lookups
+    _MAX_VARS_PER_QUERY = 900
+
+    def __init__(self, db_path: Path, pool_size: int = 4):
         self.db_path = Path(db_path).resolve()
         if not self.db_path.exists():
             raise FileNotFoundError(
                 f"Vehicle embedding store database not found at {self.db_path}"
             )
+        self._pool = SQLiteConnectionPool(self.db_path, max_size=pool_size, read_only=False)
+        self._vocab: Dict[str, int] = {}
+        self._vocab_by_id: Dict[int, str] = {}
+        self._vocab_lock = threading.Lock()
         self._ensure_schema()
 
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        return self._pool.connection()
 
     def _ensure_schema(self) -> None:
-        with self._connect() as conn:
+        with self._connect() as conn, conn:
             conn.execute(
                 """
-                CREATE TABLE IF NOT EXISTS vehicle_embeddings (
+                CREATE TABLE IF NOT EXISTS embedding_vocabulary (
+                    id INTEGER PRIMARY KEY,
+                    token TEXT NOT NULL UNIQUE
+                )
+                """
+            )
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {EMBEDDING_TABLE} (
                     vin TEXT PRIMARY KEY,
-                    embedding TEXT NOT NULL,
+                    token_ids BLOB NOT NULL,
+                    weights BLOB NOT NULL,
+                    source_hash TEXT,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
                 """
             )
+            legacy = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (LEGACY_EMBEDDING_TABLE,),
+            ).fetchone()
+
+        if legacy:
+            logger.warning(
+                "Legacy JSON embeddings found in %s; run scripts/migrate_vehicle_db.py --only binary_embeddings",
+                LEGACY_EMBEDDING_TABLE,
+            )
+
+    # ------------------------------------------------------------------ #
+    # Vocabulary
+    # ------------------------------------------------------------------ #
+
+    def _load_vocabulary(self, conn: sqlite3.Connection) -> None:
+        for row in conn.execute("SELECT id, token FROM embedding_vocabulary"):
+            self._vocab[row["token"]] = row["id"]
+            self._vocab_by_id[row["id"]] = row["token"]
+
+    def token_ids(self, tokens: Iterable[str], create: bool = False) -> Dict[str, int]:
+        """
+        Map tokens to vocabulary ids.
+
+        Args:
+            tokens: Tokens to look up.
+            create: Add unknown tokens to the vocabulary. When False, unknown
+                tokens are omitted from the result.
+        """
+        tokens = list(dict.fromkeys(tokens))
+        with self._vocab_lock:
+            missing = [token for token in tokens if token not in self._vocab]
+            if missing:
+                with self._connect() as conn, conn:
+                    if create:
+                        conn.executemany(
+                            "INSERT OR IGNORE INTO embedding_vocabulary (token) VALUES (?)",
+                            [(token,) for token in missing],
+                        )
+                    # Refresh from the table: other processes may have added tokens
+                    self._load_vocabulary(conn)
+            return {token: self._vocab[token] for token in tokens if token in self._vocab}
+
+    def vocabulary_size(self) -> int:
+        """Return one past the largest known token id."""
+        with self._vocab_lock:
+            if not self._vocab_by_id:
+                with self._connect() as conn:
+                    self._load_vocabulary(conn)
+            return max(self._vocab_by_id, default=0) + 1
+
+    def encode(self, embedding: Dict[str, float], create: bool = True) -> SparseVector:
+        """Convert a token→weight dict into sorted (ids, weights) arrays."""
+        ids = self.token_ids(embedding.keys(), create=create)
+        pairs = sorted((ids[token], weight) for token, weight in embedding.items() if token in ids)
+        return (
+            np.fromiter((pair[0] for pair in pairs), dtype=_ID_DTYPE, count=len(pairs)),
+            np.fromiter((pair[1] for pair in pairs), dtype=_WEIGHT_DTYPE, count=len(pairs)),
+        )
+
+    def decode(self, vector: SparseVector) -> Dict[str, float]:
+        """Convert (ids, weights) arrays back into a token→weight dict."""
+        ids, weights = vector
+        with self._vocab_lock:
+            if any(int(token_id) not in self._vocab_by_id for token_id in ids):
+                with self._connect() as conn:
+                    self._load_vocabulary(conn)
+            return {
+                self._vocab_by_id[int(token_id)]: float(weight)
+                for token_id, weight in zip(ids, weights)
+                if int(token_id) in self._vocab_by_id
+            }
+
+    # ------------------------------------------------------------------ #
+    # Embeddings
+    # ------------------------------------------------------------------ #
 
     def get(self, vin: str) -> Optional[Dict[str, float]]:
-        with self._connect() as conn:
-            row = conn.execute(
-                "SELECT embedding FROM vehicle_embeddings WHERE vin = ?", (vin,)
-            ).fetchone()
+        return self.get_many([vin]).get(vin)
 
-        if not row:
-            return None
+    def get_many(self, vins: Iterable[str]) -> Dict[str, Dict[str, float]]:
+        """Fetch embeddings for many VINs as token→weight dicts."""
+        return {vin: self.decode(vector) for vin, vector in self.get_vectors(vins).items()}
+
+    def get_vectors(self, vins: Iterable[str]) -> Dict[str, SparseVector]:
+        """Fetch embeddings for many VINs as (ids, weights) arrays via chunked ``IN (...)`` queries."""
+        unique_vins = list(dict.fromkeys(vin for vin in vins if vin))
+        found: Dict[str, SparseVector] = {}
+        if not unique_vins:
+            return found
 
-        try:
-            data = json.loads(row["embedding"])
-            return {token: float(weight) for token, weight in data.items()}
-        except (json.JSONDecodeError, TypeError, ValueError):
-            logger.warning("Invalid embedding payload for VIN %s", vin)
-            return None
-
-    def upsert(self, vin: str, embedding: Dict[str, float]) -> None:
-        payload = json.dumps(embedding)
         with self._connect() as conn:
-            conn.execute(
-                """
-                INSERT INTO vehicle_embeddings (vin, embedding, updated_at)
-                VALUES (?, ?, CURRENT_TIMESTAMP)
+            for start in range(0, len(unique_vins), self._MAX_VARS_PER_QUERY):
+                chunk = unique_vins[start:start + self._MAX_VARS_PER_QUERY]
+                placeholders = ",".join(["?"] * len(chunk))
+                rows = conn.execute(
+                    f"SELECT vin, token_ids, weights FROM {EMBEDDING_TABLE} WHERE vin IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+
+                for row in rows:
+                    ids, weights = _unpack(row["token_ids"], row["weights"])
+                    if len(ids) != len(weights):
+                        logger.warning("Invalid embedding payload for VIN %s", row["vin"])
+                        continue
+                    found[row["vin"]] = (ids, weights)
+
+        return found
+
+    def get_source_hashes(self, vins: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Return the stored source hash for each VIN that has an embedding."""
+        unique_vins = list(dict.fromkeys(vin for vin in vins if vin))
+        hashes: Dict[str, Optional[str]] = {}
+
+        with self._connect() as conn:
+            for start in range(0, len(unique_vins), self._MAX_VARS_PER_QUERY):
+                chunk = unique_vins[start:start + self._MAX_VARS_PER_QUERY]
+                placeholders = ",".join(["?"] * len(chunk))
+                rows = conn.execute(
+                    f"SELECT vin, source_hash FROM {EMBEDDING_TABLE} WHERE vin IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                hashes.update((row["vin"], row["source_hash"]) for row in rows)
+
+        return hashes
+
+    def upsert(self, vin: str, embedding: Dict[str, float], source_hash: Optional[str] = None) -> None:
+        self.upsert_many({vin: embedding}, {vin: source_hash} if source_hash else None)
+
+    def upsert_many(
+        self,
+        embeddings: Dict[str, Dict[str, float]],
+        source_hashes: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Insert or replace many embeddings in a single transaction."""
+        if not embeddings:
+            return
+
+        source_hashes = source_hashes or {}
+        ids = self.token_ids(
+            {token for embedding in embeddings.values() for token in embedding},
+            create=True,
+        )
+
+        rows = []
+        for vin, embedding in embeddings.items():
+            pairs = sorted((ids[token], weight) for token, weight in embedding.items() if token in ids)
+            rows.append((
+                vin,
+                _pack_ids([pair[0] for pair in pairs]),
+                _pack_weights([pair[1] for pair in pairs]),
+                source_hashes.get(vin),
+            ))
+
+        with self._connect() as conn, conn:
+            conn.executemany(
+                f"""
+                INSERT INTO {EMBEDDING_TABLE} (vin, token_ids, weights, source_hash, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
                 ON CONFLICT(vin) DO UPDATE
-                SET embedding = excluded.embedding,
+                SET token_ids = excluded.token_ids,
+                    weights = excluded.weights,
+                    source_hash = excluded.source_hash,
                     updated_at = CURRENT_TIMESTAMP
                 """,
-                (vin, payload),
+                rows,
+            )
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self._pool.close()
+
+
+def migrate_json_embeddings(db_path: Path, batch_size: int = 5000, drop_legacy: bool = True) -> int:
+    """
+    Convert legacy JSON rows in ``vehicle_embeddings`` to the packed binary format.
+
+    Args:
+        db_path: Path to the database holding the embeddings.
+        batch_size: Rows converted per transaction.
+        drop_legacy: Drop the JSON table once every row is converted.
+
+    Returns:
+        Number of embeddings migrated.
+    """
+    store = VehicleEmbeddingStore(db_path)
+    migrated = 0
+
+    try:
+        with closing(sqlite3.connect(store.db_path)) as conn:
+            conn.row_factory = sqlite3.Row
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (LEGACY_EMBEDDING_TABLE,),
+            ).fetchone()
+            if not exists:
+                logger.info("No legacy %s table to migrate", LEGACY_EMBEDDING_TABLE)
+                return 0
+
+            columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({LEGACY_EMBEDDING_TABLE})")}
+            hash_column = "source_hash" if "source_hash" in columns else "NULL"
+            cursor = conn.execute(
+                f"SELECT vin, embedding, {hash_column} AS source_hash FROM {LEGACY_EMBEDDING_TABLE}"
             )
 
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+
+                embeddings: Dict[str, Dict[str, float]] = {}
+                source_hashes: Dict[str, str] = {}
+                for row in rows:
+                    try:
+                        data = json.loads(row["embedding"])
+                        embeddings[row["vin"]] = {token: float(weight) for token, weight in data.items()}
+                    except (json.JSONDecodeError, TypeError, ValueError, AttributeError):
+                        logger.warning("Skipping invalid legacy embedding for VIN %s", row["vin"])
+                        continue
+                    if row["source_hash"]:
+                        source_hashes[row["vin"]] = row["source_hash"]
+
+                store.upsert_many(embeddings, source_hashes)
+                migrated += len(embeddings)
+
+            if drop_legacy:
+                cursor.close()
+                with conn:
+                    conn.execute(f"DROP TABLE {LEGACY_EMBEDDING_TABLE}")
+    finally:
+        store.close()
+
+    logger.info("Migrated %d JSON embeddings to %s", migrated, EMBEDDING_TABLE)
+    return migrated
+
+
+class CatalogEmbeddingIndex:
+    """
+    In-memory inverted index over every precomputed embedding in the catalog.
+
+    Postings are stored per token id (CSC layout: ``token_indptr`` into
+    ``posting_rows``/``posting_weights``), so scoring a user vector touches
+    only the listings that share at least one of its tokens instead of the
+    whole matrix. Rows are addressed by ``unified_vehicle_listings.rowid``, so
+    the index is only valid for the dataset ``signature`` it was loaded from.
+    """
+
+    def __init__(
+        self,
+        rowids: np.ndarray,
+        token_indptr: np.ndarray,
+        posting_rows: np.ndarray,
+        posting_weights: np.ndarray,
+        signature: Optional[DatasetSignature] = None,
+    ):
+        self.rowids = rowids
+        self.token_indptr = token_indptr
+        self.posting_rows = posting_rows
+        self.posting_weights = posting_weights
+        self.signature = signature
+
+    def __len__(self) -> int:
+        return int(self.rowids.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(
+            self.rowids.nbytes
+            + self.token_indptr.nbytes
+            + self.posting_rows.nbytes
+            + self.posting_weights.nbytes
+        )
+
+    @classmethod
+    def load(cls, store: VehicleEmbeddingStore, batch_size: int = 20000) -> "CatalogEmbeddingIndex":
+        """Build the index from every stored embedding that maps to a catalog listing."""
+        rowid_chunks: List[np.ndarray] = []
+        id_chunks: List[np.ndarray] = []
+        weight_chunks: List[np.ndarray] = []
+        length_chunks: List[np.ndarray] = []
+
+        with store._connect() as conn:
+            # Read before the data: a stamp landing mid-load makes the index look stale, never current
+            signature = dataset_signature(store.db_path, conn)
+            cursor = conn.execute(
+                f"""
+                SELECT l.rowid AS listing_rowid, v.token_ids, v.weights
+                FROM {EMBEDDING_TABLE} v
+                JOIN unified_vehicle_listings l ON l.vin = v.vin
+                ORDER BY l.rowid
+                """
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                vectors = [_unpack(row["token_ids"], row["weights"]) for row in rows]
+                valid = [len(ids) == len(weights) for ids, weights in vectors]
+                rowid_chunks.append(np.fromiter(
+                    (row["listing_rowid"] for row, ok in zip(rows, valid) if ok), dtype=np.int64
+                ))
+                kept = [vector for vector, ok in zip(vectors, valid) if ok]
+                length_chunks.append(np.fromiter((len(ids) for ids, _ in kept), dtype=np.int64, count=len(kept)))
+                if kept:
+                    id_chunks.append(np.concatenate([ids for ids, _ in kept]))
+                    weight_chunks.append(np.concatenate([weights for _, weights in kept]))
+
+        rowids = np.concatenate(rowid_chunks) if rowid_chunks else np.zeros(0, dtype=np.int64)
+        lengths = np.concatenate(length_chunks) if length_chunks else np.zeros(0, dtype=np.int64)
+        indices = np.concatenate(id_chunks).astype(np.intp) if id_chunks else np.zeros(0, dtype=np.intp)
+        data = np.concatenate(weight_chunks) if weight_chunks else np.zeros(0, dtype=_WEIGHT_DTYPE)
+
+        # Transpose the row-major (CSR) entries into per-token postings
+        row_of_entry = np.repeat(np.arange(rowids.shape[0], dtype=np.int32), lengths)
+        order = np.argsort(indices, kind="stable")
+        vocab_size = int(indices.max()) + 1 if indices.size else 0
+        token_indptr = np.zeros(vocab_size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=vocab_size), out=token_indptr[1:])
+
+        index = cls(
+            rowids=rowids,
+            token_indptr=token_indptr,
+            posting_rows=row_of_entry[order],
+            posting_weights=data[order].astype(np.float32, copy=False),
+            signature=signature,
+        )
+        logger.info(
+            "Loaded catalog embedding index: %d listings, %d postings (%.1f MB)",
+            len(index),
+            index.posting_rows.shape[0],
+            index.nbytes / (1024 * 1024),
+        )
+        return index
+
+    def score(self, user_weights: Dict[int, float], rowids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score candidate listings against a user vector given as token id → weight.
+
+        Args:
+            user_weights: L2-normalized user vector keyed by vocabulary id.
+            rowids: Candidate listing rowids (the filter mask).
+
+        Returns:
+            (scores, indexed) arrays aligned with ``rowids``; ``indexed`` is False
+            for candidates that have no embedding in the index.
+        """
+        catalog_scores = np.zeros(len(self), dtype=np.float64)
+        vocab_size = self.token_indptr.shape[0] - 1
+        for token_id, weight in user_weights.items():
+            if token_id >= vocab_size:
+                continue
+            start, end = self.token_indptr[token_id], self.token_indptr[token_id + 1]
+            # Each listing appears at most once per token, so fancy-index += is safe
+            catalog_scores[self.posting_rows[start:end]] += weight * self.posting_weights[start:end]
+
+        positions = np.searchsorted(self.rowids, rowids)
+        positions = np.minimum(positions, max(len(self) - 1, 0))
+        indexed = (self.rowids[positions] == rowids) if len(self) else np.zeros(rowids.shape[0], dtype=bool)
+
+        scores = np.zeros(rowids.shape[0], dtype=np.float64)
+        scores[indexed] = catalog_scores[positions[indexed]]
+        return scores, indexed
+
 
 def get_embedding_store(db_path: Path) -> VehicleEmbeddingStore:
     """Return cached VehicleEmbeddingStore for a given database path."""
@@ -88,6 +489,140 @@ def get_embedding_store(db_path: Path) -> VehicleEmbeddingStore:
     return store
 
 
+def get_catalog_index(db_path: Path) -> Optional[CatalogEmbeddingIndex]:
+    """
+    Return the CatalogEmbeddingIndex for a database, loading it on first use.
+
+    Each call compares the index's dataset signature with the database's. When
+    the dataset has changed (refresh, migration, precompute run) the index is
+    rebuilt on a background thread, and None is returned until it is ready,
+    since the old index may address rowids that now hold other listings.
+    """
+    path = Path(db_path).resolve()
+    index = _CATALOG_INDEX_CACHE.get(path)
+    if index is None:
+        with _CATALOG_INDEX_LOCK:
+            index = _CATALOG_INDEX_CACHE.get(path)
+            if index is None:
+                index = CatalogEmbeddingIndex.load(get_embedding_store(path))
+                _CATALOG_INDEX_CACHE[path] = index
+        return index
+
+    store = get_embedding_store(path)
+    with store._connect() as conn:
+        current = dataset_signature(path, conn)
+    if current == index.signature:
+        return index
+
+    with _CATALOG_INDEX_LOCK:
+        if path not in _CATALOG_INDEX_REBUILDS:
+            _CATALOG_INDEX_REBUILDS.add(path)
+            logger.info("Dataset %s changed; rebuilding catalog embedding index in the background", path)
+            threading.Thread(
+                target=_rebuild_catalog_index,
+                args=(path,),
+                name="catalog-index-rebuild",
+                daemon=True,
+            ).start()
+    return None
+
+
+def _rebuild_catalog_index(path: Path) -> None:
+    """Load a fresh catalog index and swap it in (runs on a background thread)."""
+    try:
+        index = CatalogEmbeddingIndex.load(get_embedding_store(path))
+        with _CATALOG_INDEX_LOCK:
+            _CATALOG_INDEX_CACHE[path] = index
+    except (OSError, sqlite3.Error) as exc:
+        logger.error("Failed to rebuild catalog embedding index for %s: %s", path, exc)
+    finally:
+        with _CATALOG_INDEX_LOCK:
+            _CATALOG_INDEX_REBUILDS.discard(path)
+
+
+def close_embedding_stores() -> None:
+    """Close pooled connections of all cached VehicleEmbeddingStore instances and drop catalog indexes."""
+    _CATALOG_INDEX_CACHE.clear()
+    while _EMBED_STORE_CACHE:
+        _, store = _EMBED_STORE_CACHE.popitem()
+        store.close()
+
+
+def rank_catalog_by_similarity(
+    rowids: Sequence[int],
+    explicit_filters: Dict[str, Any],
+    implicit_preferences: Dict[str, Any],
+    db_path: Path,
+    top_k: int = 20,
+    load_payloads: Optional[Callable[[List[int]], Dict[int, Dict[str, Any]]]] = None,
+    max_unindexed: int = 500,
+) -> Optional[List[Tuple[int, float]]]:
+    """
+    Rank an entire filtered candidate set using the in-memory catalog index.
+
+    Args:
+        rowids: Listing rowids matching the user's filters.
+        explicit_filters: Filters used to build the user vector.
+        implicit_preferences: Preferences used to build the user vector.
+        db_path: Path to the vehicle database.
+        top_k: Number of results to return.
+        load_payloads: Fetches payloads by rowid so candidates missing from the
+            index (not yet precomputed) can be embedded on the fly.
+        max_unindexed: Upper bound on on-the-fly embeddings per call; beyond it
+            unindexed candidates score 0 to keep latency bounded.
+
+    Returns:
+        Top ``top_k`` (rowid, score) pairs in descending score order, or None
+        when there is no preference signal to rank by or the catalog index is
+        being rebuilt after a dataset change.
+    """
+    user_vector = _build_user_vector(explicit_filters, implicit_preferences)
+    if not user_vector:
+        logger.info("No preference signal detected; skipping catalog ranking")
+        return None
+    if not rowids:
+        return []
+
+    store = get_embedding_store(db_path)
+    index = get_catalog_index(db_path)
+    if index is None:
+        logger.info("Catalog embedding index is being rebuilt; skipping catalog ranking")
+        return None
+    candidates = np.asarray(rowids, dtype=np.int64)
+
+    user_weights = {
+        token_id: user_vector[token]
+        for token, token_id in store.token_ids(user_vector.keys(), create=False).items()
+    }
+    scores, indexed = index.score(user_weights, candidates)
+
+    missing = np.flatnonzero(~indexed)
+    if missing.size:
+        if load_payloads is not None and missing.size <= max_unindexed:
+            payloads = load_payloads([int(candidates[position]) for position in missing])
+            for position in missing:
+                vehicle = payloads.get(int(candidates[position]))
+                if vehicle is not None:
+                    scores[position] = _cosine_similarity(user_vector, _embed_vehicle(vehicle))
+        else:
+            logger.warning(
+                "%d of %d candidates have no precomputed embedding and were scored 0; "
+                "run scripts/precompute_embeddings.py",
+                missing.size,
+                candidates.size,
+            )
+
+    order = _rank_order(scores, top_k)[:top_k]
+    ranked = [(int(candidates[position]), float(scores[position])) for position in order]
+    logger.info(
+        "Catalog ranking scored %d candidates (%d unindexed, top score=%.3f)",
+        candidates.size,
+        missing.size,
+        ranked[0][1] if ranked else 0.0,
+    )
+    return ranked
+
+
 def rank_local_vehicles_by_similarity(
     vehicles: List[Dict[str, Any]],
     explicit_filters: Dict[str, Any],
@@ -106,29 +641,70 @@ def rank_local_vehicles_by_similarity(
         logger.info("No preference signal detected; skipping vector ranking")
         return vehicles
 
-    scored: List[Tuple[float, Dict[str, Any]]] = []
-
-    for vehicle in vehicles:
-        vin = (
-            vehicle.get("vehicle", {}).get("vin")
-            or vehicle.get("vin")
-        )
-
-        embedding: Optional[Dict[str, float]] = None
-        if vin:
-            embedding = store.get(vin)
+    vins = [
+        vehicle.get("vehicle", {}).get("vin") or vehicle.get("vin")
+        for vehicle in vehicles
+    ]
 
-        if embedding is None:
-            embedding = _embed_vehicle(vehicle)
-            if vin and embedding:
-                store.upsert(vin, embedding)
+    try:
+        cached = store.get_vectors(vins)
+    except sqlite3.Error as exc:
+        logger.warning("Embedding lookup failed, computing on the fly: %s", exc)
+        cached = {}
+
+    computed: Dict[str, Dict[str, float]] = {}
+    computed_hashes: Dict[str, str] = {}
+    # Candidates whose embedding could not be encoded are scored with the reference path
+    unencoded: Dict[int, Dict[str, float]] = {}
+
+    for index, (vin, vehicle) in enumerate(zip(vins, vehicles)):
+        if vin and vin in cached:
+            continue
+        embedding = _embed_vehicle(vehicle)
+        if vin and embedding:
+            computed[vin] = embedding
+            computed_hashes[vin] = embedding_source_hash(vehicle)
+        else:
+            unencoded[index] = embedding
+
+    if computed:
+        try:
+            store.upsert_many(computed, computed_hashes)
+        except sqlite3.Error as exc:
+            logger.warning("Failed to cache %d embeddings: %s", len(computed), exc)
+
+    rows: List[SparseVector] = []
+    for index, vin in enumerate(vins):
+        if index in unencoded:
+            rows.append(_EMPTY_VECTOR)
+        elif vin in cached:
+            rows.append(cached[vin])
+        else:
+            try:
+                rows.append(store.encode(computed[vin], create=False))
+            except sqlite3.Error:
+                unencoded[index] = computed[vin]
+                rows.append(_EMPTY_VECTOR)
 
-        similarity = _cosine_similarity(user_vector, embedding)
-        vehicle["_vector_score"] = similarity
-        scored.append((similarity, vehicle))
+    try:
+        user_dense = _dense_user_vector(store, user_vector)
+    except sqlite3.Error as exc:
+        logger.warning("Vocabulary lookup failed, using reference scoring: %s", exc)
+        user_dense = np.zeros(0, dtype=np.float32)
+        unencoded = {
+            index: computed.get(vin) or _embed_vehicle(vehicle)
+            for index, (vin, vehicle) in enumerate(zip(vins, vehicles))
+        }
+
+    scores = _score_candidates(user_dense, rows)
+    for index, embedding in unencoded.items():
+        scores[index] = _cosine_similarity(user_vector, embedding)
+
+    order = _rank_order(scores, top_k)
+    ranked = [vehicles[index] for index in order]
+    for index in order:
+        vehicles[index]["_vector_score"] = float(scores[index])
 
-    scored.sort(key=lambda item: item[0], reverse=True)
-    ranked = [item[1] for item in scored]
     top_preview = min(top_k, len(ranked))
     top_score = ranked[0].get("_vector_score", 0.0) if ranked else 0.0
     logger.info(
@@ -140,6 +716,96 @@ def rank_local_vehicles_by_similarity(
     return ranked
 
 
+def _dense_user_vector(store: VehicleEmbeddingStore, user_vector: Dict[str, float]) -> np.ndarray:
+    """Scatter the user vector into a dense array indexed by vocabulary id."""
+    # Read-only lookup: user tokens that no vehicle has cannot contribute to a dot product
+    ids = store.token_ids(user_vector.keys(), create=False)
+    dense = np.zeros(store.vocabulary_size(), dtype=np.float32)
+    for token, token_id in ids.items():
+        if token_id < dense.shape[0]:
+            dense[token_id] = user_vector[token]
+    return dense
+
+
+def _score_candidates(user_dense: np.ndarray, vectors: Sequence[SparseVector]) -> np.ndarray:
+    """
+    Score all candidates against the user vector in one sparse matrix-vector product.
+
+    The packed vectors are stacked into CSR form (``indptr``/``indices``/``data``);
+    since both sides are L2-normalized, each row dot product is the cosine
+    similarity computed by ``_cosine_similarity``.
+
+    Args:
+        user_dense: User vector indexed by vocabulary id.
+        vectors: One (ids, weights) pair per candidate.
+
+    Returns:
+        float64 array of similarities, one per candidate.
+    """
+    count = len(vectors)
+    if not count:
+        return np.zeros(0, dtype=np.float64)
+
+    lengths = np.fromiter((len(ids) for ids, _ in vectors), dtype=np.int64, count=count)
+    if not lengths.sum() or not user_dense.shape[0]:
+        return np.zeros(count, dtype=np.float64)
+
+    indices = np.concatenate([ids for ids, _ in vectors]).astype(np.intp, copy=False)
+    data = np.concatenate([weights for _, weights in vectors]).astype(np.float64, copy=False)
+    row_of_entry = np.repeat(np.arange(count), lengths)
+
+    # Ids minted after the user vector was built cannot match any user token
+    in_range = indices < user_dense.shape[0]
+    contributions = np.zeros_like(data)
+    contributions[in_range] = user_dense[indices[in_range]] * data[in_range]
+
+    return np.bincount(row_of_entry, weights=contributions, minlength=count)
+
+
+def _rank_order(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Return candidate indices ordered by descending score.
+
+    The top_k head is selected with ``np.argpartition`` in linear time and
+    then sorted; the tail follows in descending order so the full ranking is
+    still available to callers that apply their own tie-breakers.
+    """
+    count = scores.shape[0]
+    if count == 0:
+        return np.zeros(0, dtype=np.intp)
+
+    k = max(0, min(top_k, count))
+    if k == 0 or k == count:
+        return np.argsort(-scores, kind="stable")
+
+    partitioned = np.argpartition(-scores, k - 1)
+    head, tail = partitioned[:k], partitioned[k:]
+    head = head[np.lexsort((head, -scores[head]))]
+    tail = tail[np.lexsort((tail, -scores[tail]))]
+    return np.concatenate([head, tail])
+
+
+def embedding_source_hash(vehicle: Dict[str, Any]) -> str:
+    """
+    Fingerprint the listing fields that feed _embed_vehicle.
+
+    Used to skip recomputing embeddings for listings that have not changed.
+    """
+    vehicle_data = vehicle.get("vehicle", {})
+    retail_data = vehicle.get("retailListing", {})
+    parts = [
+        EMBEDDING_VERSION,
+        [vehicle_data.get(key) for key in (
+            "make", "model", "trim", "engine", "fuel", "drivetrain", "transmission",
+            "exteriorColor", "interiorColor", "bodyStyle", "doors", "seats", "year",
+        )],
+        vehicle.get("body_style"),
+        [retail_data.get(key) for key in ("price", "miles", "state", "city")],
+        vehicle.get("raw_json_summary"),
+    ]
+    return hashlib.sha1(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+
 def _embed_vehicle(vehicle: Dict[str, Any]) -> Dict[str, float]:
     counter = Counter()
     vehicle_data = vehicle.get("vehicle", {})
@@ -318,7 +984,13 @@ def _bin_value(value: Any, step: int) -> int:
 
 
 __all__ = [
+    "CatalogEmbeddingIndex",
     "VehicleEmbeddingStore",
+    "get_catalog_index",
     "get_embedding_store",
+    "close_embedding_stores",
+    "embedding_source_hash",
+    "migrate_json_embeddings",
+    "rank_catalog_by_similarity",
     "rank_local_vehicles_by_similarity",
 ]
@@ -234,6 +234,8 @@ class VehicleSearchState(TypedDict):
     interviewed: bool  # False = in interview workflow, True = interview complete
     _interview_should_end: bool  # Internal flag for routing within interview workflow
     _semantic_parsing_done: bool  # Internal flag to skip duplicate semantic parsing in interview workflow
+    _parser_cursor: int  # Number of conversation messages already folded into the parsed filters
+    _parser_summary: str  # Rolling conversation summary used by incremental semantic parsing
 
     # Current mode tracking
     current_mode: str  # Current operational mode (supervisor/general)
@@ -261,6 +263,8 @@ def create_initial_state() -> VehicleSearchState:
         interviewed=False,  # Start in interview workflow
         _interview_should_end=False,
         _semantic_parsing_done=False,  # Semantic parsing not done yet
+        _parser_cursor=0,
+        _parser_summary="",
         current_mode="general",  # Initial mode
         ai_response="",
         quick_replies=None,
@@ -8,12 +8,18 @@ components.
 from __future__ import annotations
 
 import json
+import math
+import os
 import sqlite3
-from dataclasses import dataclass
+import time
+import uuid
+from contextlib import closing
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from idss_agent.utils.logger import get_logger
+from idss_agent.utils.sqlite_pool import SQLiteConnectionPool
 
 logger = get_logger("tools.local_vehicle_store")
 
@@ -25,11 +31,174 @@ def _project_root() -> Path:
 
 DEFAULT_DB_PATH = _project_root() / "data" / "car_dataset_idss" / "uni_vehicles.db"
 
+# R*Tree virtual table over dealer coordinates (built by build_spatial_index)
+SPATIAL_INDEX_TABLE = "unified_vehicle_locations_rtree"
+
+# Expression indexes for filtered searches (built by build_search_indexes). Categorical
+# filters compare UPPER(column), so the indexes are on those exact expressions. Composites
+# follow the filter combinations of dataset_builder/schema.sql and end in the default
+# ORDER BY (price, vin), so a LIMIT query can walk the index without sorting.
+SEARCH_INDEX_PREFIX = "idx_uvl_"
+SEARCH_INDEXES: Dict[str, str] = {
+    "idx_uvl_vin": "vin",
+    "idx_uvl_price": "price, vin",
+    "idx_uvl_year": "year",
+    "idx_uvl_mileage": "mileage",
+    "idx_uvl_make_price": "UPPER(make), price, vin",
+    "idx_uvl_make_model_price": "UPPER(make), UPPER(model), price, vin",
+    "idx_uvl_make_model_year": "UPPER(make), UPPER(model), year",
+    "idx_uvl_body_style_price": "UPPER(body_style), price, vin",
+    "idx_uvl_fuel_type_price": "UPPER(fuel_type), price, vin",
+    "idx_uvl_drivetrain": "UPPER(drivetrain)",
+    "idx_uvl_exterior_color": "UPPER(exterior_color)",
+    "idx_uvl_state_make": "UPPER(dealer_state), UPPER(make)",
+}
+
+# Facets for facet_counts(), named after the filter each one relaxes. Categorical
+# facets group by the same UPPER(column) expressions the filters and search indexes
+# use; numeric facets are grouped into bands of the given width.
+_CATEGORICAL_FACETS: Dict[str, str] = {
+    "make": "make",
+    "model": "model",
+    "trim": "trim",
+    "body_style": "body_style",
+    "engine": "engine",
+    "transmission": "transmission",
+    "drivetrain": "drivetrain",
+    "fuel_type": "fuel_type",
+    "exterior_color": "exterior_color",
+    "interior_color": "interior_color",
+    "state": "dealer_state",
+}
+_BAND_FACETS: Dict[str, Tuple[str, int]] = {
+    "year": ("year", 1),
+    "price": ("price", 5000),
+    "mileage": ("mileage", 20000),
+}
+FACET_FIELDS: Tuple[str, ...] = tuple(_CATEGORICAL_FACETS) + tuple(_BAND_FACETS)
+DEFAULT_FACETS: Tuple[str, ...] = ("make", "body_style", "fuel_type", "price")
+
+# Key/value metadata in the catalog file. "dataset_version" is stamped by the tools
+# that change listings or precomputed embeddings (stamp_dataset_version); caches key
+# on it rather than the file's mtime, which request-time embedding writes also bump.
+DATASET_METADATA_TABLE = "dataset_metadata"
+DATASET_VERSION_KEY = "dataset_version"
+
+# (device, inode, stamped version) of a catalog file; see dataset_signature()
+DatasetSignature = Tuple[int, int, Optional[str]]
+
+EARTH_RADIUS_MILES = 3959.0
+# Stay well below SQLite's host-parameter limit for IN (...) lookups
+_MAX_VARS_PER_QUERY = 900
+
+# Normalized columns used to build listing payloads (raw_json is selected separately)
+_LISTING_COLUMNS = """price, mileage, primary_image_url, photo_count,
+            year, make, model, trim, body_style, drivetrain, engine, fuel_type, transmission,
+            doors, seats, exterior_color, interior_color,
+            dealer_name, dealer_city, dealer_state, dealer_zip, dealer_latitude, dealer_longitude,
+            is_used, is_cpo, vdp_url, carfax_url, vin"""
+
 
 class VehicleStoreError(RuntimeError):
     """Raised when the local vehicle store encounters an error."""
 
 
+def _parse_raw_json(raw_json: Optional[str]) -> Dict[str, Any]:
+    """Parse a raw listing blob, returning an empty dict on missing/invalid JSON."""
+    if not raw_json:
+        return {}
+    try:
+        payload = json.loads(raw_json)
+    except json.JSONDecodeError:
+        logger.warning("Failed to parse raw_json for row")
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+class LazyListingPayload(dict):
+    """
+    Auto.dev-shaped listing whose raw-JSON-derived keys are parsed on first access.
+
+    ``@id``, ``online`` and ``_original`` come from the listing's ``raw_json``
+    blob. They are absent from the underlying dict until touched through
+    ``[]``, ``get`` or ``in`` (or ``materialize()``), so serializing an
+    untouched payload skips the raw listing entirely.
+
+    Args:
+        data: Payload built from normalized database columns.
+        raw_json: Raw listing JSON text, if it was selected.
+        raw_loader: Callable returning the raw JSON text on demand, used when
+            ``raw_json`` was left out of the query.
+        original: Already-parsed raw listing, if the caller had to parse it anyway.
+    """
+
+    _LAZY_KEYS = frozenset({"@id", "online", "_original"})
+
+    __slots__ = ("_raw_json", "_raw_loader", "_pending")
+
+    def __init__(
+        self,
+        data: Dict[str, Any],
+        raw_json: Optional[str] = None,
+        raw_loader: Optional[Callable[[], Optional[str]]] = None,
+        original: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        super().__init__(data)
+        self._raw_json = raw_json
+        self._raw_loader = raw_loader
+        self._pending = True
+        if original is not None:
+            self._apply_original(original)
+
+    def _apply_original(self, original: Dict[str, Any]) -> None:
+        self._pending = False
+        self._raw_json = None
+        self._raw_loader = None
+        self.setdefault("@id", original.get("id", f"unified/{dict.get(self, 'vin')}"))
+        self.setdefault("online", original.get("online", True))
+        self.setdefault("_original", original)
+
+    def materialize(self) -> "LazyListingPayload":
+        """Parse the raw listing (once) and fill in the lazy keys."""
+        if not self._pending:
+            return self
+
+        raw_json = self._raw_json
+        if raw_json is None and self._raw_loader is not None:
+            raw_json = self._raw_loader()
+        self._apply_original(_parse_raw_json(raw_json))
+        return self
+
+    def copy(self) -> "LazyListingPayload":
+        """Shallow copy that stays lazy (or shares the already-parsed original)."""
+        clone = LazyListingPayload(dict(self))
+        clone._pending = self._pending
+        clone._raw_json = self._raw_json
+        clone._raw_loader = self._raw_loader
+        return clone
+
+    def __missing__(self, key: Any) -> Any:
+        if key in self._LAZY_KEYS and self._pending:
+            self.materialize()
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key in self._LAZY_KEYS and self._pending:
+            self.materialize()
+        return dict.get(self, key, default)
+
+    def __contains__(self, key: Any) -> bool:
+        if key in self._LAZY_KEYS and self._pending:
+            self.materialize()
+        return dict.__contains__(self, key)
+
+    def __reduce__(self):
+        # Pickle/deepcopy as a plain dict; materialize first so nothing is lost
+        self.materialize()
+        return (dict, (dict(self),))
+
+
 def _format_sql_with_params(sql: str, params: Sequence[Any]) -> str:
     """Return human-readable SQL with positional parameters substituted for logging."""
     formatted = sql
@@ -70,6 +239,29 @@ def _split_multi_value(text: str) -> List[str]:
     return [part.strip() for part in text.split(",") if part.strip()]
 
 
+def relaxed_filters(filters: Dict[str, Any], relax: Sequence[str]) -> List[Dict[str, Any]]:
+    """
+    Filter sets for a search relaxed step by step, strictest first.
+
+    The first is ``filters`` itself; each following one also drops the next
+    key of ``relax`` that is set, e.g. ``relax=("model", "make")`` gives the
+    filters, then without ``model``, then without ``model`` and ``make``.
+    """
+    tiers = [filters]
+    current = filters
+    for key in relax:
+        if current.get(key):
+            current = {name: value for name, value in current.items() if name != key}
+            tiers.append(current)
+    return tiers
+
+
+def _band_label(band: int, width: int) -> str:
+    """Format a numeric facet band as a filter range ("2020", "15000-19999")."""
+    lower = int(band) * width
+    return str(lower) if width == 1 else f"{lower}-{lower + width - 1}"
+
+
 def _haversine_distance_sql(user_lat: float, user_lon: float) -> str:
     """
     Generate SQL expression for haversine distance calculation in miles.
@@ -85,7 +277,7 @@ def _haversine_distance_sql(user_lat: float, user_lon: float) -> str:
         SQL expression string for distance calculation in miles
     """
     # Earth's radius in miles
-    earth_radius = 3959.0
+    earth_radius = EARTH_RADIUS_MILES
 
     # Convert degrees to radians in SQL
     # SQLite uses radians for trig functions
@@ -98,18 +290,241 @@ def _haversine_distance_sql(user_lat: float, user_lon: float) -> str:
     """
 
 
+def _bounding_box(
+    latitude: float,
+    longitude: float,
+    radius_miles: float,
+) -> Tuple[float, float, Optional[float], Optional[float]]:
+    """
+    Compute the lat/lon box that encloses a circle on the sphere.
+
+    Every point within ``radius_miles`` of the center lies inside the box, so it
+    can be used as a cheap prefilter before the exact haversine check.
+    See http://janmatuschek.de/LatitudeLongitudeBoundingCoordinates.
+
+    Returns:
+        Tuple of (min_lat, max_lat, min_lon, max_lon). Longitude bounds are None
+        when the circle covers a pole or crosses the antimeridian.
+    """
+    angular_radius = radius_miles / EARTH_RADIUS_MILES
+    lat_rad = math.radians(latitude)
+
+    min_lat = lat_rad - angular_radius
+    max_lat = lat_rad + angular_radius
+
+    if min_lat <= -math.pi / 2 or max_lat >= math.pi / 2:
+        return (
+            math.degrees(max(min_lat, -math.pi / 2)),
+            math.degrees(min(max_lat, math.pi / 2)),
+            None,
+            None,
+        )
+
+    delta_lon = math.asin(min(1.0, math.sin(angular_radius) / math.cos(lat_rad)))
+    min_lon = longitude - math.degrees(delta_lon)
+    max_lon = longitude + math.degrees(delta_lon)
+
+    if min_lon < -180.0 or max_lon > 180.0:
+        return (math.degrees(min_lat), math.degrees(max_lat), None, None)
+
+    return (math.degrees(min_lat), math.degrees(max_lat), min_lon, max_lon)
+
+
+def build_spatial_index(db_path: Path) -> int:
+    """
+    (Re)build the R*Tree index over dealer coordinates.
+
+    The index maps ``unified_vehicle_listings.rowid`` to a degenerate box at the
+    dealer location. Rebuild it whenever the listings table is reloaded or
+    vacuumed, since rowids may change.
+
+    Args:
+        db_path: Path to uni_vehicles.db (opened read-write).
+
+    Returns:
+        Number of listings indexed.
+    """
+    with closing(sqlite3.connect(db_path)) as conn:
+        with conn:
+            conn.execute(f"DROP TABLE IF EXISTS {SPATIAL_INDEX_TABLE}")
+            conn.execute(
+                f"CREATE VIRTUAL TABLE {SPATIAL_INDEX_TABLE} "
+                "USING rtree(id, min_lat, max_lat, min_lon, max_lon)"
+            )
+            cursor = conn.execute(
+                f"""
+                INSERT INTO {SPATIAL_INDEX_TABLE} (id, min_lat, max_lat, min_lon, max_lon)
+                SELECT rowid, dealer_latitude, dealer_latitude, dealer_longitude, dealer_longitude
+                FROM unified_vehicle_listings
+                WHERE dealer_latitude IS NOT NULL AND dealer_longitude IS NOT NULL
+                """
+            )
+            indexed = cursor.rowcount
+
+    logger.info("Built spatial index %s with %d listings", SPATIAL_INDEX_TABLE, indexed)
+    return indexed
+
+
+def _search_index_sql(name: str, columns: str) -> str:
+    """CREATE statement for a ``SEARCH_INDEXES`` entry (as stored in ``sqlite_master.sql``)."""
+    return f"CREATE INDEX {name} ON unified_vehicle_listings({columns})"
+
+
+def _normalize_sql(sql: Optional[str]) -> str:
+    """Collapse whitespace and case so equivalent definitions compare equal."""
+    return " ".join((sql or "").split()).lower()
+
+
+def build_search_indexes(db_path: Path) -> int:
+    """
+    Create the expression and composite indexes in ``SEARCH_INDEXES``.
+
+    Existing indexes are compared with their definition in ``sqlite_master``:
+    an index whose columns changed is dropped and recreated, and indexes with
+    the ``idx_uvl_`` prefix that are no longer listed are dropped, so editing
+    ``SEARCH_INDEXES`` and re-running the migration converges.
+    Run ``analyze_database`` afterwards so the planner has statistics for them.
+
+    Args:
+        db_path: Path to uni_vehicles.db (opened read-write).
+
+    Returns:
+        Number of indexes created or recreated.
+    """
+    created = 0
+    with closing(sqlite3.connect(db_path)) as conn:
+        existing = {
+            row[0]: row[1]
+            for row in conn.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'unified_vehicle_listings'"
+            )
+        }
+        with conn:
+            for name in existing:
+                if name.startswith(SEARCH_INDEX_PREFIX) and name not in SEARCH_INDEXES:
+                    conn.execute(f"DROP INDEX {name}")
+                    logger.info("Dropped stale search index %s", name)
+            for name, columns in SEARCH_INDEXES.items():
+                sql = _search_index_sql(name, columns)
+                if name in existing:
+                    if _normalize_sql(existing[name]) == _normalize_sql(sql):
+                        continue
+                    conn.execute(f"DROP INDEX {name}")
+                    logger.info("Rebuilding search index %s (definition changed)", name)
+                conn.execute(sql)
+                created += 1
+
+    logger.info("Created %d search indexes (%d defined)", created, len(SEARCH_INDEXES))
+    return created
+
+
+def analyze_database(db_path: Path) -> int:
+    """
+    Refresh the query planner statistics (``ANALYZE``).
+
+    Args:
+        db_path: Path to uni_vehicles.db (opened read-write).
+
+    Returns:
+        Number of indexes with statistics.
+    """
+    with closing(sqlite3.connect(db_path)) as conn:
+        conn.execute("ANALYZE")
+        conn.commit()
+        analyzed = conn.execute("SELECT COUNT(DISTINCT idx) FROM sqlite_stat1 WHERE idx IS NOT NULL").fetchone()[0]
+
+    logger.info("Analyzed %s (%d indexes with statistics)", db_path, analyzed)
+    return analyzed
+
+
+def stamp_dataset_version(db_path: Path) -> str:
+    """
+    Record a new dataset version in the catalog file.
+
+    Run after anything that changes listings or precomputed embeddings in
+    place (migrate_vehicle_db.py and precompute_embeddings.py do this), so
+    running servers drop candidate caches and reload the catalog index.
+
+    Args:
+        db_path: Path to uni_vehicles.db (opened read-write).
+
+    Returns:
+        The new version string.
+    """
+    version = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    with closing(sqlite3.connect(db_path)) as conn:
+        with conn:
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {DATASET_METADATA_TABLE} (
+                    key TEXT PRIMARY KEY,
+                    value TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+            conn.execute(
+                f"""
+                INSERT INTO {DATASET_METADATA_TABLE} (key, value, updated_at)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = CURRENT_TIMESTAMP
+                """,
+                (DATASET_VERSION_KEY, version),
+            )
+
+    logger.info("Stamped %s with dataset version %s", db_path, version)
+    return version
+
+
+def dataset_signature(db_path: Path, conn: sqlite3.Connection) -> DatasetSignature:
+    """
+    Identify the dataset in a catalog file: (device, inode, stamped version).
+
+    A replaced file changes the inode; an in-place refresh changes the stamped
+    version. Other writes (such as embedding upserts) change neither.
+
+    Raises:
+        OSError: If the file is gone.
+        sqlite3.Error: If the metadata cannot be read.
+    """
+    stat = os.stat(db_path)
+    try:
+        row = conn.execute(
+            f"SELECT value FROM {DATASET_METADATA_TABLE} WHERE key = ?", (DATASET_VERSION_KEY,)
+        ).fetchone()
+    except sqlite3.OperationalError as exc:
+        if "no such table" not in str(exc):
+            raise
+        row = None
+    return (stat.st_dev, stat.st_ino, row[0] if row else None)
+
+
 @dataclass
 class LocalVehicleStore:
     """
     Thin repository for vehicle listings stored in SQLite.
 
+    Connections are borrowed from a bounded pool of read-only connections so
+    repeated queries reuse a warm page cache instead of reopening the file.
+
     Args:
         db_path: Optional override for database location.
         require_photos: Whether to filter listings to those with photo metadata.
+        pool_size: Maximum number of pooled SQLite connections.
+        mmap_size_mb: Megabytes of the database file to memory-map per connection.
+        cache_size_mb: Page cache size per connection in megabytes.
+        include_raw_json: Select ``raw_json`` with each row. When False the raw
+            listing is fetched by VIN only if a caller touches ``_original``.
     """
 
     db_path: Optional[Path] = None
     require_photos: bool = True
+    pool_size: int = 8
+    mmap_size_mb: int = 256
+    cache_size_mb: int = 64
+    include_raw_json: bool = True
+    _pool: SQLiteConnectionPool = field(init=False, repr=False)
+    _has_spatial_index: Optional[bool] = field(init=False, default=None, repr=False)
 
     def __post_init__(self) -> None:
         path = Path(self.db_path) if self.db_path else DEFAULT_DB_PATH
@@ -119,11 +534,58 @@ class LocalVehicleStore:
                 "Build it via dataset_builder/fetch_california_dataset.py."
             )
         self.db_path = path
+        self._pool = SQLiteConnectionPool(
+            path,
+            max_size=self.pool_size,
+            read_only=True,
+            mmap_size=self.mmap_size_mb * 1024 * 1024,
+            cache_size_kib=self.cache_size_mb * 1024,
+        )
 
-    def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
+    def _connect(self) -> ContextManager[sqlite3.Connection]:
+        """Borrow a pooled read-only connection (use as a context manager)."""
+        return self._pool.connection()
+
+    def _spatial_index_available(self) -> bool:
+        """
+        Return True if the R*Tree location index exists.
+
+        Only a definite answer is cached: a missing table means False until
+        restart, while transient failures (locked database, pool timeout) raise
+        VehicleStoreError and are checked again on the next query.
+        """
+        if self._has_spatial_index is None:
+            try:
+                with self._connect() as conn:
+                    conn.execute(f"SELECT id FROM {SPATIAL_INDEX_TABLE} LIMIT 0")
+                self._has_spatial_index = True
+            except sqlite3.OperationalError as exc:
+                if "no such table" not in str(exc):
+                    raise VehicleStoreError(f"Failed to check for spatial index: {exc}") from exc
+                logger.info(
+                    "Spatial index %s not found; radius searches use a bounding-box prefilter only. "
+                    "Run scripts/migrate_vehicle_db.py to build it.",
+                    SPATIAL_INDEX_TABLE,
+                )
+                self._has_spatial_index = False
+        return self._has_spatial_index
+
+    def dataset_signature(self) -> Optional[DatasetSignature]:
+        """Signature of the loaded dataset for cache invalidation, or None if it cannot be read."""
+        try:
+            with self._connect() as conn:
+                return dataset_signature(self.db_path, conn)
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("Could not read dataset version of %s: %s", self.db_path, exc)
+            return None
+
+    def ping(self) -> bool:
+        """Return True if the underlying database is reachable."""
+        return self._pool.ping()
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self._pool.close()
 
     # ------------------------------------------------------------------ #
     # Public interface
@@ -176,21 +638,121 @@ class LocalVehicleStore:
         except sqlite3.Error as exc:
             raise VehicleStoreError(f"SQLite query failed: {exc}") from exc
 
-        payloads: List[Dict[str, Any]] = []
-        for row in rows:
-            payload = self._row_to_payload(row)
-            if payload:
-                payloads.append(payload)
-
+        payloads = self._rows_to_payloads(rows)
         logger.info("Local vehicle query returned %d listings", len(payloads))
         return payloads
 
+    def search_listings_relaxed(
+        self,
+        filters: Dict[str, Any],
+        relax: Sequence[str],
+        limit: int = 60,
+        order_by: str = "price",
+        order_dir: str = "ASC",
+        user_latitude: Optional[float] = None,
+        user_longitude: Optional[float] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Search with filters relaxed step by step, returning the first tier with matches.
+
+        Tier 0 applies every filter; tier ``i`` drops the first ``i`` keys of
+        ``relax`` that are set (see ``relaxed_filters``). All tiers go into one
+        statement: each tier's branch only runs when the tier before it has no
+        match (an ``EXISTS`` probe in its ``LIMIT``), so each branch keeps its
+        own indexes and the exact query costs about the same as ``search_listings``.
+
+        Args:
+            filters: Explicit filter dictionary (VehicleFilters).
+            relax: Filter keys to drop, in order (e.g. ``("model", "make")``).
+            limit: Maximum number of rows to return.
+            order_by: Column to sort by (price, mileage, year).
+            order_dir: Sort direction ("ASC" or "DESC").
+            user_latitude: Optional user latitude for distance filtering.
+            user_longitude: Optional user longitude for distance filtering.
+
+        Returns:
+            (payloads, tier): listings of the best tier with matches and its
+            index, or ``([], None)`` when no tier matches.
+        """
+        raw_column = "raw_json, " if self.include_raw_json else ""
+        order_clause = self._order_clause(order_by, order_dir)
+
+        branches: List[str] = []
+        params: List[Any] = []
+        previous: Optional[Tuple[str, List[Any]]] = None
+        for tier, tier_filters in enumerate(relaxed_filters(filters, relax)):
+            where_clause, where_params = self._build_where(tier_filters, user_latitude, user_longitude)
+            params.extend(where_params)
+            # The guard sits in LIMIT rather than WHERE: a LIMIT of 0 skips the
+            # branch outright, while a WHERE term would be tested on every row
+            limit_clause = "?"
+            if previous is not None:
+                limit_clause = (
+                    f"CASE WHEN EXISTS (SELECT 1 FROM unified_vehicle_listings{previous[0]}) THEN 0 ELSE ? END"
+                )
+                params.extend(previous[1])
+            params.append(limit)
+            branches.append(
+                f"SELECT * FROM (SELECT {tier} AS match_tier, {raw_column}{_LISTING_COLUMNS} "
+                f"FROM unified_vehicle_listings{where_clause} ORDER BY {order_clause} LIMIT {limit_clause})"
+            )
+            previous = (where_clause, where_params)
+
+        sql = " UNION ALL ".join(branches)
+        logger.info(
+            "Recommendation SQL query: %s",
+            _format_sql_with_params(" ".join(sql.split()), params),
+        )
+
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(sql, params).fetchall()
+        except sqlite3.Error as exc:
+            raise VehicleStoreError(f"SQLite query failed: {exc}") from exc
+
+        if not rows:
+            logger.info("Local vehicle query returned no listings in any tier")
+            return [], None
+
+        tier = rows[0]["match_tier"]
+        payloads = self._rows_to_payloads(rows)
+        logger.info("Local vehicle query returned %d listings (tier %d)", len(payloads), tier)
+        return payloads, tier
+
+    def match_tier(
+        self,
+        filters: Dict[str, Any],
+        relax: Sequence[str],
+        user_latitude: Optional[float] = None,
+        user_longitude: Optional[float] = None,
+    ) -> Optional[int]:
+        """
+        Index of the first tier of ``relaxed_filters(filters, relax)`` with any match.
+
+        Cheap (one ``EXISTS`` probe per tier, stopping at the first hit), so
+        callers that do their own ranking can pick the tier before fetching it.
+        Returns None when no tier matches.
+        """
+        probes: List[str] = []
+        params: List[Any] = []
+        for tier, tier_filters in enumerate(relaxed_filters(filters, relax)):
+            where_clause, where_params = self._build_where(tier_filters, user_latitude, user_longitude)
+            probes.append(f"WHEN EXISTS (SELECT 1 FROM unified_vehicle_listings{where_clause}) THEN {tier}")
+            params.extend(where_params)
+
+        sql = f"SELECT CASE {' '.join(probes)} END"
+        try:
+            with self._connect() as conn:
+                return conn.execute(sql, params).fetchone()[0]
+        except sqlite3.Error as exc:
+            raise VehicleStoreError(f"SQLite query failed: {exc}") from exc
+
     def get_by_vin(self, vin: str) -> Optional[Dict[str, Any]]:
         """Fetch a single listing by VIN."""
         if not vin:
             return None
 
-        sql = "SELECT raw_json FROM unified_vehicle_listings WHERE vin = ? LIMIT 1"
+        sql = f"SELECT raw_json, {_LISTING_COLUMNS} FROM unified_vehicle_listings WHERE vin = ? LIMIT 1"
 
         try:
             with self._connect() as conn:
@@ -200,6 +762,230 @@ class LocalVehicleStore:
 
         return self._row_to_payload(row) if row else None
 
+    def iter_listing_batches(
+        self,
+        batch_size: int = 2000,
+        after_rowid: int = 0,
+    ) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """
+        Walk the whole catalog in rowid order (filters and require_photos are ignored).
+
+        Uses keyset pagination, so each batch is a rowid range scan and a pooled
+        connection is only held while a batch is fetched.
+
+        Args:
+            batch_size: Number of listings per batch.
+            after_rowid: Resume after this rowid (0 = from the start).
+
+        Yields:
+            Lists of (rowid, payload) tuples.
+        """
+        sql = (
+            f"SELECT rowid AS listing_rowid, {_LISTING_COLUMNS} FROM unified_vehicle_listings "
+            "WHERE rowid > ? ORDER BY rowid LIMIT ?"
+        )
+        last_rowid = after_rowid
+
+        while True:
+            try:
+                with self._connect() as conn:
+                    rows = conn.execute(sql, (last_rowid, batch_size)).fetchall()
+            except sqlite3.Error as exc:
+                raise VehicleStoreError(f"Catalog scan failed after rowid {last_rowid}: {exc}") from exc
+
+            if not rows:
+                return
+
+            last_rowid = rows[-1]["listing_rowid"]
+            yield [
+                (row["listing_rowid"], self._row_to_payload(row, raw_loader=self._raw_loader_for(row["vin"])))
+                for row in rows
+            ]
+
+    def search_rowids(
+        self,
+        filters: Dict[str, Any],
+        user_latitude: Optional[float] = None,
+        user_longitude: Optional[float] = None,
+    ) -> List[int]:
+        """
+        Return the rowids of every listing matching the filters, unordered and unpaginated.
+
+        Selecting only rowids keeps this cheap enough to run over the whole
+        catalog, so callers can rank the full match set in memory and fetch
+        payloads for the winners with get_by_rowids().
+        """
+        where_clause, params = self._build_where(filters, user_latitude, user_longitude)
+        sql = f"SELECT rowid FROM unified_vehicle_listings{where_clause}"
+        logger.debug("Executing local rowid query: %s | params=%s", sql, params)
+
+        try:
+            with self._connect() as conn:
+                return [row[0] for row in conn.execute(sql, params)]
+        except sqlite3.Error as exc:
+            raise VehicleStoreError(f"SQLite query failed: {exc}") from exc
+
+    def facet_counts(
+        self,
+        filters: Dict[str, Any],
+        fields: Sequence[str] = DEFAULT_FACETS,
+        user_latitude: Optional[float] = None,
+        user_longitude: Optional[float] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Count matching listings per value of each facet, in one statement.
+
+        Each facet is counted with every filter applied except its own, so the
+        counts say how many listings selecting (or switching to) that value would
+        yield: ``make`` counts under ``{"make": "Honda", "price": "-20000"}`` are
+        the listings under $20k for every make. Listings without a value for the
+        facet are not counted.
+
+        Args:
+            filters: Explicit filter dictionary (VehicleFilters).
+            fields: Facets to count; see FACET_FIELDS.
+            user_latitude: Optional user latitude for radius filtering.
+            user_longitude: Optional user longitude for radius filtering.
+            limit: Keep only the most common values of categorical facets.
+
+        Returns:
+            ``{"total": <listings matching all filters>, "facets": {field: [{"value", "count"}]}}``.
+            Categorical values are ordered by count; year, price and mileage
+            values are bands ("2020", "15000-19999") in ascending order, usable
+            as filter values as-is.
+
+        Raises:
+            ValueError: If a field is not a supported facet, or a categorical
+                filter value is not a string.
+        """
+        unknown = [name for name in fields if name not in FACET_FIELDS]
+        if unknown:
+            raise ValueError(
+                f"Unsupported facet(s): {', '.join(unknown)}. Expected any of: {', '.join(FACET_FIELDS)}"
+            )
+        invalid = [
+            name for name in _CATEGORICAL_FACETS
+            if filters.get(name) is not None and not isinstance(filters[name], str)
+        ]
+        if invalid:
+            raise ValueError(
+                f"Filter value(s) for {', '.join(invalid)} must be strings (comma-separated for several values)"
+            )
+        fields = list(dict.fromkeys(fields))
+
+        where_clause, params = self._build_where(filters, user_latitude, user_longitude)
+        selects = [f"SELECT NULL AS facet, NULL AS value, COUNT(*) AS n FROM unified_vehicle_listings{where_clause}"]
+
+        for name in fields:
+            relaxed = {key: value for key, value in filters.items() if key != name}
+            facet_where, facet_params = self._build_where(relaxed, user_latitude, user_longitude)
+            facet_where += " AND " if facet_where else " WHERE "
+
+            if name in _CATEGORICAL_FACETS:
+                column = _CATEGORICAL_FACETS[name]
+                selects.append(
+                    f"SELECT ? AS facet, MIN({column}) AS value, COUNT(*) AS n FROM unified_vehicle_listings"
+                    f"{facet_where}TRIM(COALESCE({column}, '')) != '' GROUP BY UPPER({column})"
+                )
+            else:
+                column, width = _BAND_FACETS[name]
+                selects.append(
+                    f"SELECT ? AS facet, CAST({column} / {width} AS INTEGER) AS value, COUNT(*) AS n "
+                    f"FROM unified_vehicle_listings{facet_where}{column} IS NOT NULL GROUP BY 2"
+                )
+            params.append(name)
+            params.extend(facet_params)
+
+        sql = " UNION ALL ".join(selects)
+        logger.debug("Executing facet query: %s | params=%s", sql, params)
+
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(sql, params).fetchall()
+        except sqlite3.Error as exc:
+            raise VehicleStoreError(f"Facet query failed: {exc}") from exc
+
+        total = 0
+        buckets: Dict[str, List[Tuple[Any, int]]] = {name: [] for name in fields}
+        for facet, value, count in rows:
+            if facet is None:
+                total = count
+            else:
+                buckets[facet].append((value, count))
+
+        facets: Dict[str, List[Dict[str, Any]]] = {}
+        for name, values in buckets.items():
+            if name in _CATEGORICAL_FACETS:
+                values.sort(key=lambda item: (-item[1], str(item[0]).upper()))
+                if limit is not None:
+                    values = values[:limit]
+                facets[name] = [{"value": value, "count": count} for value, count in values]
+            else:
+                width = _BAND_FACETS[name][1]
+                facets[name] = [
+                    {"value": _band_label(band, width), "count": count}
+                    for band, count in sorted(values)
+                ]
+
+        return {"total": total, "facets": facets}
+
+    def get_by_rowids(self, rowids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        """Fetch listing payloads keyed by rowid (missing rowids are omitted)."""
+        raw_column = "raw_json, " if self.include_raw_json else ""
+        unique_rowids = list(dict.fromkeys(int(rowid) for rowid in rowids))
+        payloads: Dict[int, Dict[str, Any]] = {}
+
+        try:
+            with self._connect() as conn:
+                for start in range(0, len(unique_rowids), _MAX_VARS_PER_QUERY):
+                    chunk = unique_rowids[start:start + _MAX_VARS_PER_QUERY]
+                    placeholders = ",".join(["?"] * len(chunk))
+                    rows = conn.execute(
+                        f"SELECT rowid AS listing_rowid, {raw_column}{_LISTING_COLUMNS} "
+                        f"FROM unified_vehicle_listings WHERE rowid IN ({placeholders})",
+                        chunk,
+                    ).fetchall()
+                    for row in rows:
+                        raw_loader = None if self.include_raw_json else self._raw_loader_for(row["vin"])
+                        payload = self._row_to_payload(row, raw_loader=raw_loader)
+                        if payload:
+                            payloads[row["listing_rowid"]] = payload
+        except sqlite3.Error as exc:
+            raise VehicleStoreError(f"Failed to load listings by rowid: {exc}") from exc
+
+        return payloads
+
+    def get_raw_json(self, vin: str) -> Optional[str]:
+        """Fetch the raw listing JSON text for a VIN."""
+        if not vin:
+            return None
+
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT raw_json FROM unified_vehicle_listings WHERE vin = ? LIMIT 1",
+                    (vin.upper(),),
+                ).fetchone()
+        except sqlite3.Error as exc:
+            raise VehicleStoreError(f"Failed to load raw listing for VIN {vin}: {exc}") from exc
+
+        return row["raw_json"] if row else None
+
+    def _raw_loader_for(self, vin: Optional[str]) -> Optional[Callable[[], Optional[str]]]:
+        """Return a deferred raw_json fetcher for rows selected without raw_json."""
+        if not vin:
+            return None
+
+        def load() -> Optional[str]:
+            try:
+                return self.get_raw_json(vin)
+            except VehicleStoreError as exc:
+                logger.warning("%s", exc)
+                return None
+
+        return load
+
     # ------------------------------------------------------------------ #
     # Query construction helpers
     # ------------------------------------------------------------------ #
@@ -215,12 +1001,40 @@ class LocalVehicleStore:
         user_longitude: Optional[float] = None,
     ) -> Tuple[str, Tuple[Any, ...]]:
         """Construct SQL query and parameter tuple from explicit filters."""
-        select_clause = """SELECT raw_json, price, mileage, primary_image_url, photo_count,
-            year, make, model, trim, body_style, drivetrain, engine, fuel_type, transmission,
-            doors, seats, exterior_color, interior_color,
-            dealer_name, dealer_city, dealer_state, dealer_zip, dealer_latitude, dealer_longitude,
-            is_used, is_cpo, vdp_url, carfax_url, vin
+        raw_column = "raw_json, " if self.include_raw_json else ""
+        select_clause = f"""SELECT {raw_column}{_LISTING_COLUMNS}
             FROM unified_vehicle_listings"""
+        where_clause, params = self._build_where(filters, user_latitude, user_longitude)
+
+        sql = (
+            f"{select_clause}{where_clause} "
+            f"ORDER BY {self._order_clause(order_by, order_dir)} "
+            f"LIMIT ? OFFSET ?"
+        )
+
+        params.extend([limit, offset])
+        return sql, tuple(params)
+
+    @staticmethod
+    def _order_clause(order_by: str, order_dir: str) -> str:
+        """ORDER BY terms for a sort column and direction (ties broken by VIN)."""
+        order_column = {
+            "price": "price",
+            "mileage": "mileage",
+            "year": "year",
+        }.get(order_by.lower(), "price")
+
+        # Fall back to ascending unless explicitly descending
+        direction = "DESC" if order_dir.upper() == "DESC" else "ASC"
+        return f"{order_column} {direction}, vin ASC"
+
+    def _build_where(
+        self,
+        filters: Dict[str, Any],
+        user_latitude: Optional[float] = None,
+        user_longitude: Optional[float] = None,
+    ) -> Tuple[str, List[Any]]:
+        """Construct the WHERE clause and its parameters from explicit filters."""
         conditions: List[str] = []
         params: List[Any] = []
 
@@ -243,12 +1057,13 @@ class LocalVehicleStore:
         ]:
             value = filters.get(key)
             values = _split_multi_value(value) if isinstance(value, str) else []
-            if values:
+            # Same UPPER(column) expression as the search indexes, so they apply
+            values = list(dict.fromkeys(v.upper() for v in values))
+            if len(values) == 1:
+                add_condition(f"UPPER({column}) = ?", values)
+            elif values:
                 placeholders = ",".join(["?"] * len(values))
-                add_condition(
-                    f"UPPER({column}) IN ({placeholders})",
-                    [v.upper() for v in values],
-                )
+                add_condition(f"UPPER({column}) IN ({placeholders})", values)
 
         # Door count
         if filters.get("doors"):
@@ -260,20 +1075,40 @@ class LocalVehicleStore:
 
         # State filter (optional, for state-specific searches)
         if filters.get("state"):
-            add_condition("UPPER(dealer_state) = ?", (filters["state"].upper(),))
+            add_condition("UPPER(dealer_state) = ?", (filters["state"].strip().upper(),))
 
         # Note: ZIP code filter removed - ZIP is now only used to lookup lat/long,
         # then search_radius filter applies geographic distance search
 
         # Search radius filter (requires user location - lat/long from browser OR ZIP lookup)
         if filters.get("search_radius") and user_latitude is not None and user_longitude is not None:
-            radius_miles = filters["search_radius"]
-            # Only include vehicles with valid lat/long coordinates
-            conditions.append("dealer_latitude IS NOT NULL")
-            conditions.append("dealer_longitude IS NOT NULL")
-            # Add haversine distance calculation
+            radius_miles = float(filters["search_radius"])
+            min_lat, max_lat, min_lon, max_lon = _bounding_box(
+                user_latitude, user_longitude, radius_miles
+            )
+
+            # Prefilter by bounding box (index-assisted when the R*Tree exists),
+            # then run the exact haversine check only on the survivors.
+            if self._spatial_index_available():
+                box_conditions = ["max_lat >= ?", "min_lat <= ?"]
+                box_params: List[Any] = [min_lat, max_lat]
+                if min_lon is not None and max_lon is not None:
+                    box_conditions.extend(["max_lon >= ?", "min_lon <= ?"])
+                    box_params.extend([min_lon, max_lon])
+                add_condition(
+                    f"rowid IN (SELECT id FROM {SPATIAL_INDEX_TABLE} "
+                    f"WHERE {' AND '.join(box_conditions)})",
+                    box_params,
+                )
+            else:
+                add_condition("dealer_latitude BETWEEN ? AND ?", (min_lat, max_lat))
+                if min_lon is not None and max_lon is not None:
+                    add_condition("dealer_longitude BETWEEN ? AND ?", (min_lon, max_lon))
+                else:
+                    conditions.append("dealer_longitude IS NOT NULL")
+
             distance_expr = _haversine_distance_sql(user_latitude, user_longitude)
-            conditions.append(f"({distance_expr}) <= {float(radius_miles)}")
+            conditions.append(f"({distance_expr}) <= {radius_miles}")
 
         # Year range
         if filters.get("year"):
@@ -312,108 +1147,80 @@ class LocalVehicleStore:
         if conditions:
             where_clause = " WHERE " + " AND ".join(conditions)
 
-        order_column = {
-            "price": "price",
-            "mileage": "mileage",
-            "year": "year",
-        }.get(order_by.lower(), "price")
-
-        # Fall back to ascending unless explicitly descending
-        direction = "DESC" if order_dir.upper() == "DESC" else "ASC"
+        return where_clause, params
 
-        sql = (
-            f"{select_clause}{where_clause} "
-            f"ORDER BY {order_column} {direction}, vin ASC "
-            f"LIMIT ? OFFSET ?"
-        )
-
-        params.extend([limit, offset])
-        return sql, tuple(params)
+    def _rows_to_payloads(self, rows: Iterable[sqlite3.Row]) -> List[Dict[str, Any]]:
+        """Convert listing rows to payloads, deferring raw_json to VIN lookups when not selected."""
+        payloads: List[Dict[str, Any]] = []
+        for row in rows:
+            raw_loader = None if self.include_raw_json else self._raw_loader_for(row["vin"])
+            payload = self._row_to_payload(row, raw_loader=raw_loader)
+            if payload:
+                payloads.append(payload)
+        return payloads
 
     @staticmethod
-    def _row_to_payload(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
-        """Convert a SQLite row into the payload expected downstream."""
+    def _row_to_payload(
+        row: Optional[sqlite3.Row],
+        raw_loader: Optional[Callable[[], Optional[str]]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Convert a SQLite row into the payload expected downstream.
+
+        Every row of ``unified_vehicle_listings`` is in the unified format, so
+        the payload is always built from the normalized columns, whether or not
+        ``raw_json`` was selected. It is a LazyListingPayload whose
+        ``_original`` (the raw listing) is only parsed when touched.
+        """
         if not row:
             return None
 
-        raw_json = row["raw_json"]
-        if raw_json:
-            try:
-                payload = json.loads(raw_json)
-            except json.JSONDecodeError:
-                logger.warning("Failed to parse raw_json for row")
-                payload = {}
-        else:
-            payload = {}
-
-        # Check if this is the new unified format (flat structure) vs old Auto.dev format (nested)
-        # New format has fields like "heading", "data_source" at root level
-        # Old format has "vehicle" and "retailListing" as nested objects
-        is_unified_format = "data_source" in payload or ("vehicle" not in payload and "retailListing" not in payload)
-
-        if is_unified_format:
-            # Transform unified format to Auto.dev format expected by downstream code
-            # Prefer database columns over raw_json values (database columns are normalized)
-            vehicle_data = {
+        raw_json = row["raw_json"] if "raw_json" in row.keys() else None
+
+        # Transform unified format to Auto.dev format expected by downstream code
+        vehicle_data = {
+            "vin": row["vin"],
+            "year": row["year"],
+            "make": row["make"],
+            "model": row["model"],
+            "trim": row["trim"],
+            "bodyStyle": row["body_style"],
+            "drivetrain": row["drivetrain"],
+            "engine": row["engine"],
+            "fuel": row["fuel_type"],
+            "transmission": row["transmission"],
+            "doors": row["doors"],
+            "seats": row["seats"],
+            "exteriorColor": row["exterior_color"],
+            "interiorColor": row["interior_color"],
+        }
+
+        # Extract retail listing info
+        retail_data = {
+            "price": row["price"],
+            "miles": row["mileage"],
+            "dealer": row["dealer_name"],
+            "city": row["dealer_city"],
+            "state": row["dealer_state"],
+            "zip": row["dealer_zip"],
+            "vdp": row["vdp_url"],
+            "carfaxUrl": row["carfax_url"],
+            "primaryImage": row["primary_image_url"],
+            "photoCount": row["photo_count"],
+            "used": row["is_used"] if row["is_used"] is not None else True,
+            "cpo": row["is_cpo"] if row["is_cpo"] is not None else False,
+        }
+
+        # Reconstruct in Auto.dev format; "@id", "online" and "_original"
+        # (the original payload) are filled in lazily from raw_json
+        return LazyListingPayload(
+            {
                 "vin": row["vin"],
-                "year": row["year"],
-                "make": row["make"],
-                "model": row["model"],
-                "trim": row["trim"],
-                "bodyStyle": row["body_style"],
-                "drivetrain": row["drivetrain"],
-                "engine": row["engine"],
-                "fuel": row["fuel_type"],
-                "transmission": row["transmission"],
-                "doors": row["doors"],
-                "seats": row["seats"],
-                "exteriorColor": row["exterior_color"],
-                "interiorColor": row["interior_color"],
-            }
-
-            # Extract retail listing info
-            retail_data = {
-                "price": row["price"],
-                "miles": row["mileage"],
-                "dealer": row["dealer_name"],
-                "city": row["dealer_city"],
-                "state": row["dealer_state"],
-                "zip": row["dealer_zip"],
-                "vdp": row["vdp_url"],
-                "carfaxUrl": row["carfax_url"],
-                "primaryImage": row["primary_image_url"],
-                "photoCount": row["photo_count"],
-                "used": row["is_used"] if row["is_used"] is not None else True,
-                "cpo": row["is_cpo"] if row["is_cpo"] is not None else False,
-            }
-
-            # Reconstruct in Auto.dev format
-            transformed_payload = {
-                "@id": payload.get("id", f"unified/{row['vin']}"),
-                "vin": row["vin"],
-                "online": payload.get("online", True),
                 "vehicle": vehicle_data,
                 "retailListing": retail_data,
                 "wholesaleListing": None,
-            }
-
-            # Keep original payload as metadata
-            transformed_payload["_original"] = payload
-
-            return transformed_payload
-        else:
-            # Old Auto.dev format - use existing logic
-            retail_listing = payload.setdefault("retailListing", {})
-            if row["price"] is not None:
-                retail_listing.setdefault("price", row["price"])
-            if row["mileage"] is not None:
-                retail_listing.setdefault("miles", row["mileage"])
-
-            # Backfill photo hint if missing
-            if row["primary_image_url"] and not retail_listing.get("primaryImage"):
-                retail_listing["primaryImage"] = row["primary_image_url"]
-            if row["photo_count"] is not None and not retail_listing.get("photoCount"):
-                retail_listing["photoCount"] = row["photo_count"]
-
-            return payload
+            },
+            raw_json=raw_json,
+            raw_loader=raw_loader,
+        )
 
@@ -2,76 +2,429 @@
 ZIP code to lat/long lookup utility.
 
 Provides fast ZIP → coordinates conversion for users who don't share browser location.
-Uses an in-memory dictionary for instant O(1) lookups.
+ZIP data lives in a ``ZipCodeTable``: ZIPs sorted as ``int32`` with parallel
+``float32`` latitude/longitude arrays and interned city/state ids, looked up
+by binary search. The table is memory-mapped from ``data/zip_code_index.bin``
+(built by ``scripts/build_zipcode_index.py``); without that file it is built
+from ``data/zip_code_database.csv`` on first use.
+
+The reverse direction (coordinates → nearest ZIP) uses a grid index over the
+same ZIP centroids, so browser coordinates resolve offline in microseconds.
 """
 import csv
+import json
+import math
+import mmap
+import threading
 from pathlib import Path
-from typing import Optional, Tuple, Dict
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
 from idss_agent.utils.logger import get_logger
 
 logger = get_logger("tools.zipcode_lookup")
 
-# Global cache for ZIP code data - loads ONCE per application lifecycle
-_ZIPCODE_DICT: Optional[Dict[str, Tuple[float, float, str, str]]] = None
-
+_DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data"
+ZIPCODE_CSV_PATH = _DATA_DIR / "zip_code_database.csv"
+ZIPCODE_INDEX_PATH = _DATA_DIR / "zip_code_index.bin"
 
-def _load_zipcode_data() -> Dict[str, Tuple[float, float, str, str]]:
+# Global cache for ZIP code data - loads ONCE per application lifecycle
+_ZIPCODE_TABLE: Optional["ZipCodeTable"] = None
+
+# Nearest-ZIP index over the same data, built on first reverse lookup (or at API startup)
+_ZIPCODE_INDEX: Optional["ZipCodeIndex"] = None
+_ZIPCODE_LOCK = threading.Lock()
+
+EARTH_RADIUS_MILES = 3959.0
+
+# Grid cells are 0.25° of latitude by 0.25° of longitude; cell ids are row-major, so a
+# row's run of cells is one contiguous slice of the cell-sorted points
+_CELL_DEGREES = 0.25
+_GRID_COLUMNS = int(360 / _CELL_DEGREES) + 1
+_MILES_PER_DEGREE = EARTH_RADIUS_MILES * math.pi / 180
+
+# Binary index layout: magic, little-endian uint32 header length, JSON header
+# ({array name: [offset, dtype, count]}), then the arrays at 16-byte aligned offsets
+_INDEX_MAGIC = b"IDSSZIP1"
+_ALIGNMENT = 16
+
+_TABLE_DTYPES = {
+    "zips": "<i4",
+    "latitudes": "<f4",
+    "longitudes": "<f4",
+    "city_ids": "<u4",
+    "state_ids": "<u2",
+    "grid_cells": "<i4",   # Cell id of each point, in grid order
+    "grid_order": "<i4",   # Point indices sorted by grid cell
+    "city_offsets": "<u4",
+    "city_names": "u1",    # UTF-8 city names, sliced by city_offsets
+    "state_offsets": "<u4",
+    "state_names": "u1",
+}
+
+
+def _grid_cell(latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+    """Row-major grid cell ids of coordinates."""
+    rows = np.floor((latitude + 90.0) / _CELL_DEGREES).astype(np.int64)
+    columns = np.floor((longitude + 180.0) / _CELL_DEGREES).astype(np.int64)
+    return rows * _GRID_COLUMNS + columns
+
+
+def _pack_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode strings as (offsets, UTF-8 bytes); string i is bytes[offsets[i]:offsets[i + 1]]."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    offsets[1:] = np.cumsum([len(value) for value in encoded], dtype=np.uint64)
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+
+def _read_zipcode_csv(csv_path: Path) -> List[Tuple[int, float, float, str, str]]:
     """
-    Load ZIP code data from CSV into memory dictionary.
+    Read active ZIP codes from the CSV.
 
     Returns:
-        Dictionary mapping ZIP → (latitude, longitude, city, state)
+        List of (zip, latitude, longitude, city, state) tuples
     """
-    csv_path = Path(__file__).resolve().parent.parent.parent / "data" / "zip_code_database.csv"
+    rows = []
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
 
-    if not csv_path.exists():
-        logger.error(f"ZIP code database not found at {csv_path}")
-        return {}
+        for row in reader:
+            zip_code = row['zip']
 
-    zipcode_dict = {}
+            # Skip if missing critical data or decommissioned
+            if not zip_code or not row['latitude'] or not row['longitude']:
+                continue
 
-    try:
-        with open(csv_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+            if row.get('decommissioned', '0') == '1':
+                continue
 
-            for row in reader:
-                zip_code = row['zip']
+            try:
+                rows.append((
+                    int(zip_code),
+                    float(row['latitude']),
+                    float(row['longitude']),
+                    row.get('primary_city') or 'Unknown',
+                    row.get('state') or 'Unknown',
+                ))
+            except (ValueError, KeyError):
+                continue
 
-                # Skip if missing critical data or decommissioned
-                if not zip_code or not row['latitude'] or not row['longitude']:
-                    continue
+    return rows
 
-                if row.get('decommissioned', '0') == '1':
-                    continue
 
-                try:
-                    latitude = float(row['latitude'])
-                    longitude = float(row['longitude'])
-                    city = row.get('primary_city', 'Unknown')
-                    state = row.get('state', 'Unknown')
+class ZipCodeTable:
+    """
+    ZIP code centroids as flat arrays: sorted ZIPs with parallel coordinates and city/state ids.
 
-                    zipcode_dict[zip_code] = (latitude, longitude, city, state)
+    Args:
+        arrays: Arrays named as in the binary index (memory-mapped or in memory).
+        source: Where the data came from (for logging).
+    """
 
-                except (ValueError, KeyError):
-                    continue
+    def __init__(self, arrays: Dict[str, np.ndarray], source: str):
+        self.zips = arrays["zips"]
+        self.latitudes = arrays["latitudes"]
+        self.longitudes = arrays["longitudes"]
+        self.city_ids = arrays["city_ids"]
+        self.state_ids = arrays["state_ids"]
+        self.grid_cells = arrays["grid_cells"]
+        self.grid_order = arrays["grid_order"]
+        self._cities = (arrays["city_offsets"], arrays["city_names"])
+        self._states = (arrays["state_offsets"], arrays["state_names"])
+        self.source = source
+
+    @staticmethod
+    def build_arrays(rows: List[Tuple[int, float, float, str, str]]) -> Dict[str, np.ndarray]:
+        """Lay out (zip, latitude, longitude, city, state) rows as index arrays."""
+        # One entry per ZIP (the last row wins, as in the CSV-backed dictionary this replaced)
+        rows = sorted({row[0]: row for row in rows}.values())
+        cities: Dict[str, int] = {}
+        states: Dict[str, int] = {}
+        city_ids = [cities.setdefault(city, len(cities)) for _, _, _, city, _ in rows]
+        state_ids = [states.setdefault(state, len(states)) for _, _, _, _, state in rows]
+
+        latitudes = np.array([row[1] for row in rows], dtype=np.float32)
+        longitudes = np.array([row[2] for row in rows], dtype=np.float32)
+        cells = _grid_cell(latitudes.astype(np.float64), longitudes.astype(np.float64))
+        grid_order = np.argsort(cells, kind="stable")
+
+        city_offsets, city_names = _pack_strings(list(cities))
+        state_offsets, state_names = _pack_strings(list(states))
+        arrays = {
+            "zips": np.array([row[0] for row in rows], dtype=np.int32),
+            "latitudes": latitudes,
+            "longitudes": longitudes,
+            "city_ids": np.array(city_ids, dtype=np.uint32),
+            "state_ids": np.array(state_ids, dtype=np.uint16),
+            "grid_cells": cells[grid_order],
+            "grid_order": grid_order,
+            "city_offsets": city_offsets,
+            "city_names": city_names,
+            "state_offsets": state_offsets,
+            "state_names": state_names,
+        }
+        return {name: np.ascontiguousarray(array, dtype=_TABLE_DTYPES[name]) for name, array in arrays.items()}
+
+    @classmethod
+    def from_csv(cls, csv_path: Path = ZIPCODE_CSV_PATH) -> "ZipCodeTable":
+        """Parse the ZIP CSV into an in-memory table."""
+        return cls(cls.build_arrays(_read_zipcode_csv(csv_path)), source=str(csv_path))
+
+    @classmethod
+    def load(cls, path: Path = ZIPCODE_INDEX_PATH) -> "ZipCodeTable":
+        """Memory-map a binary index written by ``write``."""
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if buffer[:len(_INDEX_MAGIC)] != _INDEX_MAGIC:
+            raise ValueError(f"{path} is not a ZIP code index")
+        header_start = len(_INDEX_MAGIC) + 4
+        header_length = int.from_bytes(buffer[len(_INDEX_MAGIC):header_start], "little")
+        header = json.loads(buffer[header_start:header_start + header_length])
+
+        arrays = {
+            name: np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=offset)
+            for name, (offset, dtype, count) in header.items()
+        }
+        missing = set(_TABLE_DTYPES) - set(arrays)
+        if missing:
+            raise ValueError(f"{path} is missing arrays: {sorted(missing)}")
+        return cls(arrays, source=str(path))
+
+    @staticmethod
+    def write(arrays: Dict[str, np.ndarray], path: Path) -> None:
+        """Write index arrays as a binary file that ``load`` can memory-map."""
+        def align(position: int) -> int:
+            return (position + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+        # Offsets depend on the header size, so lay out the data after a generously sized header
+        names = list(_TABLE_DTYPES)
+        header_room = align(len(_INDEX_MAGIC) + 4 + 64 * len(names))
+        header: Dict[str, List[Union[int, str]]] = {}
+        position = header_room
+        for name in names:
+            position = align(position)
+            header[name] = [position, _TABLE_DTYPES[name], int(arrays[name].size)]
+            position += arrays[name].nbytes
+
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        if len(_INDEX_MAGIC) + 4 + len(header_bytes) > header_room:
+            raise ValueError("ZIP index header does not fit its reserved space")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_INDEX_MAGIC)
+            f.write(len(header_bytes).to_bytes(4, "little"))
+            f.write(header_bytes)
+            for name in names:
+                f.write(b"\0" * (header[name][0] - f.tell()))
+                f.write(arrays[name].tobytes())
+        tmp_path.replace(path)
+
+    def __len__(self) -> int:
+        return len(self.zips)
+
+    @staticmethod
+    def _name(strings: Tuple[np.ndarray, np.ndarray], index: int) -> str:
+        offsets, names = strings
+        return names[offsets[index]:offsets[index + 1]].tobytes().decode("utf-8")
+
+    def zip_code(self, position: int) -> str:
+        return f"{int(self.zips[position]):05d}"
+
+    def lookup(self, zip_code: int) -> Optional[Tuple[float, float, str, str]]:
+        """Binary-search a ZIP; returns (latitude, longitude, city, state) or None."""
+        position = int(np.searchsorted(self.zips, zip_code))
+        if position >= len(self.zips) or self.zips[position] != zip_code:
+            return None
+        # Coordinates are stored as float32; round off the representation noise
+        return (
+            round(float(self.latitudes[position]), 6),
+            round(float(self.longitudes[position]), 6),
+            self._name(self._cities, int(self.city_ids[position])),
+            self._name(self._states, int(self.state_ids[position])),
+        )
+
+
+def build_zipcode_index(
+    csv_path: Path = ZIPCODE_CSV_PATH,
+    output_path: Path = ZIPCODE_INDEX_PATH,
+) -> int:
+    """
+    Build the binary ZIP index from the CSV.
 
-        logger.info(f"Loaded {len(zipcode_dict)} ZIP codes into memory (~{len(zipcode_dict) * 70 / 1024:.1f} KB)")
+    Returns:
+        Number of ZIP codes written
+    """
+    arrays = ZipCodeTable.build_arrays(_read_zipcode_csv(csv_path))
+    ZipCodeTable.write(arrays, output_path)
+    return int(arrays["zips"].size)
+
+
+def _load_zipcode_table() -> "ZipCodeTable":
+    """Memory-map the binary index, falling back to parsing the CSV."""
+    if ZIPCODE_INDEX_PATH.exists():
+        try:
+            table = ZipCodeTable.load(ZIPCODE_INDEX_PATH)
+            if ZIPCODE_CSV_PATH.exists() and ZIPCODE_CSV_PATH.stat().st_mtime > ZIPCODE_INDEX_PATH.stat().st_mtime:
+                logger.warning(
+                    f"{ZIPCODE_CSV_PATH.name} is newer than {ZIPCODE_INDEX_PATH.name}; "
+                    "rebuild it with scripts/build_zipcode_index.py"
+                )
+            logger.info(f"Memory-mapped {len(table)} ZIP codes from {ZIPCODE_INDEX_PATH}")
+            return table
+        except Exception as e:
+            logger.error(f"Failed to load ZIP index {ZIPCODE_INDEX_PATH}: {e}")
+
+    if not ZIPCODE_CSV_PATH.exists():
+        logger.error(f"ZIP code database not found at {ZIPCODE_CSV_PATH}")
+        return ZipCodeTable(ZipCodeTable.build_arrays([]), source="empty")
 
+    try:
+        table = ZipCodeTable.from_csv(ZIPCODE_CSV_PATH)
     except Exception as e:
         logger.error(f"Failed to load ZIP code data: {e}")
-        return {}
+        return ZipCodeTable(ZipCodeTable.build_arrays([]), source="empty")
+    logger.info(
+        f"Loaded {len(table)} ZIP codes from {ZIPCODE_CSV_PATH.name} "
+        "(run scripts/build_zipcode_index.py to memory-map a prebuilt index instead)"
+    )
+    return table
+
+
+def _get_zipcode_table() -> "ZipCodeTable":
+    """Get or load the ZIP table (loads only once)."""
+    global _ZIPCODE_TABLE
 
-    return zipcode_dict
+    if _ZIPCODE_TABLE is None:
+        with _ZIPCODE_LOCK:
+            if _ZIPCODE_TABLE is None:
+                _ZIPCODE_TABLE = _load_zipcode_table()
 
+    return _ZIPCODE_TABLE
 
-def _get_zipcode_dict() -> Dict[str, Tuple[float, float, str, str]]:
-    """Get or initialize the ZIP code dictionary (loads CSV only once)."""
-    global _ZIPCODE_DICT
 
-    if _ZIPCODE_DICT is None:
-        _ZIPCODE_DICT = _load_zipcode_data()
+class ZipCodeIndex:
+    """
+    Nearest-ZIP lookup over the centroids of a ``ZipCodeTable``.
+
+    The table's points are ordered by grid cell id (``grid_order``), so the
+    cells of one grid row inside a bounding box are a single ``searchsorted``
+    range. A query scans the box around the point, doubling its radius until
+    the nearest centroid found lies within it (which makes the answer exact).
+
+    Args:
+        table: ZIP table providing coordinates and the grid ordering.
+    """
+
+    def __init__(self, table: ZipCodeTable):
+        self.table = table
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _candidates(self, latitude: float, longitude: float, radius_miles: float) -> np.ndarray:
+        """Table positions of points in the grid cells covering a circle of ``radius_miles``."""
+        lat_delta = radius_miles / _MILES_PER_DEGREE
+        lat_min, lat_max = max(-90.0, latitude - lat_delta), min(90.0, latitude + lat_delta)
+        widest = max(abs(lat_min), abs(lat_max))
+        lon_delta = min(180.0, radius_miles / (_MILES_PER_DEGREE * max(math.cos(math.radians(widest)), 1e-6)))
+
+        row_min = math.floor((lat_min + 90.0) / _CELL_DEGREES)
+        row_max = math.floor((lat_max + 90.0) / _CELL_DEGREES)
+        column_min = max(0, math.floor((longitude - lon_delta + 180.0) / _CELL_DEGREES))
+        column_max = min(_GRID_COLUMNS - 1, math.floor((longitude + lon_delta + 180.0) / _CELL_DEGREES))
+
+        cells = self.table.grid_cells
+        row_offsets = np.arange(row_min, row_max + 1, dtype=np.int64) * _GRID_COLUMNS
+        starts = np.searchsorted(cells, row_offsets + column_min, side="left")
+        ends = np.searchsorted(cells, row_offsets + column_max, side="right")
+        slices = [self.table.grid_order[start:end] for start, end in zip(starts, ends) if end > start]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int32)
+
+    def nearest(self, latitude: float, longitude: float, max_distance_miles: float) -> Optional[Tuple[str, float]]:
+        """
+        Find the ZIP whose centroid is closest to a coordinate.
+
+        Args:
+            latitude: Query latitude.
+            longitude: Query longitude.
+            max_distance_miles: Give up beyond this distance (e.g. coordinates outside the US).
+
+        Returns:
+            (zip_code, distance_miles), or None if no ZIP centroid is within range.
+        """
+        if not len(self):
+            return None
+
+        lat_rad, lon_rad = math.radians(latitude), math.radians(longitude)
+        radius = min(_CELL_DEGREES * _MILES_PER_DEGREE, max_distance_miles)
+
+        while True:
+            candidates = self._candidates(latitude, longitude, radius)
+            if candidates.size:
+                lat = np.radians(self.table.latitudes[candidates].astype(np.float64))
+                lon = np.radians(self.table.longitudes[candidates].astype(np.float64))
+                a = (
+                    np.sin((lat - lat_rad) / 2) ** 2
+                    + math.cos(lat_rad) * np.cos(lat) * np.sin((lon - lon_rad) / 2) ** 2
+                )
+                distances = 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+                best = int(np.argmin(distances))
+                # The box covers the whole circle, so nothing outside it can be closer than this
+                if distances[best] <= radius:
+                    return self.table.zip_code(int(candidates[best])), float(distances[best])
+
+            if radius >= max_distance_miles:
+                return None
+            radius = min(radius * 2, max_distance_miles)
+
+
+def _get_zipcode_index() -> "ZipCodeIndex":
+    """Get or build the nearest-ZIP index (built once, thread-safe)."""
+    global _ZIPCODE_INDEX
+
+    if _ZIPCODE_INDEX is None:
+        table = _get_zipcode_table()
+        with _ZIPCODE_LOCK:
+            if _ZIPCODE_INDEX is None:
+                _ZIPCODE_INDEX = ZipCodeIndex(table)
+
+    return _ZIPCODE_INDEX
+
+
+def warm_zipcode_index() -> None:
+    """Load the ZIP table and nearest-ZIP index ahead of the first request."""
+    _get_zipcode_index()
+
+
+def find_nearest_zipcode(
+    latitude: float,
+    longitude: float,
+    max_distance_miles: float = 50.0,
+) -> Optional[str]:
+    """
+    Reverse-geocode coordinates to the nearest ZIP code, offline.
+
+    Args:
+        latitude: Latitude (e.g. from browser geolocation)
+        longitude: Longitude
+        max_distance_miles: Return None if the nearest ZIP centroid is further away
+
+    Returns:
+        5-digit ZIP code string, or None if no ZIP is within range
+    """
+    result = _get_zipcode_index().nearest(latitude, longitude, max_distance_miles)
+    if result is None:
+        logger.info(f"No ZIP code within {max_distance_miles} miles of ({latitude}, {longitude})")
+        return None
 
-    return _ZIPCODE_DICT
+    zip_code, distance = result
+    logger.debug(f"({latitude}, {longitude}) → ZIP {zip_code} ({distance:.1f} mi)")
+    return zip_code
 
 
 def lookup_zipcode_coordinates(zipcode: str) -> Optional[Tuple[float, float, str, str]]:
@@ -96,9 +449,8 @@ def lookup_zipcode_coordinates(zipcode: str) -> Optional[Tuple[float, float, str
         logger.warning(f"ZIP code must be 5 digits: {zipcode}")
         return None
 
-    # Lookup in dictionary
-    zipcode_dict = _get_zipcode_dict()
-    result = zipcode_dict.get(clean_zip)
+    # Binary search in the ZIP table
+    result = _get_zipcode_table().lookup(int(clean_zip))
 
     if result:
         latitude, longitude, city, state = result
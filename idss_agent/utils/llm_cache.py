@@ -0,0 +1,263 @@
+"""
+Persistent, content-addressed cache for structured-output LLM calls.
+
+Responses are stored in SQLite under a key derived from the model, temperature,
+max_tokens, output schema (including its JSON schema, so editing a schema
+invalidates its entries) and the exact input messages. The same file doubles
+as a record/replay fixture for offline benchmarks:
+
+- ``read_write``: serve hits, call the model and store on misses (default)
+- ``record``: always call the model and overwrite the stored response
+- ``replay``: never call the model; a miss raises ``LLMCacheMiss``
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Type, Union
+
+from langchain_core.messages import BaseMessage, convert_to_messages
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableConfig
+from pydantic import BaseModel
+
+from idss_agent.utils.logger import get_logger
+
+logger = get_logger("utils.llm_cache")
+
+CACHE_MODES = ("read_write", "record", "replay")
+
+# Expired and least-recently-used entries are pruned once per this many writes
+_PRUNE_EVERY = 200
+
+
+class LLMCacheMiss(LookupError):
+    """Raised in replay mode when a call has no recorded response."""
+
+
+def _normalize_messages(model_input: Any) -> List[BaseMessage]:
+    if isinstance(model_input, PromptValue):
+        return model_input.to_messages()
+    if isinstance(model_input, str):
+        return convert_to_messages([("human", model_input)])
+    return convert_to_messages(model_input)
+
+
+def _schema_fingerprint(schema: Any) -> str:
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        definition = schema.model_json_schema()
+        name = f"{schema.__module__}.{schema.__qualname__}"
+    else:
+        definition = schema
+        name = getattr(schema, "__qualname__", type(schema).__name__)
+    digest = hashlib.sha1(json.dumps(definition, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"{name}:{digest[:12]}"
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed response store with TTL and LRU eviction.
+
+    Args:
+        path: SQLite file holding cached responses.
+        mode: One of ``CACHE_MODES``.
+        ttl_seconds: Entry lifetime (``None``/0 = no expiry). Ignored in replay mode.
+        max_entries: Entries kept after pruning, least recently used first out.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        mode: str = "read_write",
+        ttl_seconds: Optional[float] = None,
+        max_entries: int = 50000,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}'. Expected one of {CACHE_MODES}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.ttl_seconds = ttl_seconds or None
+        self.max_entries = max_entries
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                schema TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses(last_used_at)")
+        self._conn.commit()
+
+        self._writes_since_prune = 0
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def make_key(
+        self,
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+        schema: Any,
+        model_input: Any,
+    ) -> str:
+        """Hash everything that determines the response into a cache key."""
+        messages = [
+            {"type": message.type, "content": message.content}
+            for message in _normalize_messages(model_input)
+        ]
+        payload = {
+            "model": model,
+            "temperature": float(temperature),
+            "max_tokens": max_tokens,
+            "schema": _schema_fingerprint(schema),
+            "messages": messages,
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored JSON response for ``key``, or None on a miss."""
+        if self.mode == "record":
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            expired = (
+                row is not None
+                and self.mode != "replay"
+                and self.ttl_seconds is not None
+                and now - row[1] > self.ttl_seconds
+            )
+            if row is None or expired:
+                self._stats["misses"] += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_responses SET last_used_at = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self._stats["hits"] += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, model: str, schema: Any, response: Any) -> None:
+        """Store a JSON-serializable response."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO llm_responses (key, model, schema, response, created_at, last_used_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE
+                SET response = excluded.response,
+                    created_at = excluded.created_at,
+                    last_used_at = excluded.last_used_at
+                """,
+                (key, model, _schema_fingerprint(schema), json.dumps(response, default=str), now, now),
+            )
+            self._stats["writes"] += 1
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= _PRUNE_EVERY:
+                self._prune(now)
+            self._conn.commit()
+
+    def _prune(self, now: float) -> None:
+        """Drop expired entries, then least recently used ones beyond ``max_entries``. Caller holds the lock."""
+        self._writes_since_prune = 0
+        removed = 0
+        if self.ttl_seconds is not None and self.mode != "replay":
+            removed += self._conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+        removed += self._conn.execute(
+            """
+            DELETE FROM llm_responses WHERE key IN (
+                SELECT key FROM llm_responses ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        ).rowcount
+        self._stats["evictions"] += removed
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return hit/miss/write/eviction counters and the current entry count."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["mode"] = self.mode
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedStructuredOutput(Runnable):
+    """
+    Wraps a ``with_structured_output`` runnable with an ``LLMResponseCache``.
+
+    Only ``invoke``/``ainvoke`` go through the cache; the result is rebuilt
+    from the stored JSON with the output schema.
+    """
+
+    def __init__(
+        self,
+        runnable: Runnable,
+        cache: LLMResponseCache,
+        schema: Type[Any],
+        model: str,
+        temperature: float,
+        max_tokens: Optional[int],
+    ):
+        self.runnable = runnable
+        self.cache = cache
+        self.schema = schema
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+
+    def _restore(self, response: Any) -> Any:
+        if isinstance(self.schema, type) and issubclass(self.schema, BaseModel):
+            return self.schema.model_validate(response)
+        return response
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        key = self.cache.make_key(self.model, self.temperature, self.max_tokens, self.schema, input)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._restore(cached)
+        if self.cache.mode == "replay":
+            raise LLMCacheMiss(f"No recorded {self.model} response for {_schema_fingerprint(self.schema)} (key {key[:12]})")
+
+        result = self.runnable.invoke(input, config, **kwargs)
+        if result is not None:
+            serialized = result.model_dump(mode="json") if isinstance(result, BaseModel) else result
+            self.cache.put(key, self.model, self.schema, serialized)
+        return result
+
+
+__all__ = [
+    "CACHE_MODES",
+    "CachedStructuredOutput",
+    "LLMCacheMiss",
+    "LLMResponseCache",
+]
@@ -0,0 +1,374 @@
+"""
+Shared, config-driven registry of LLM clients.
+
+Each ChatOpenAI client (and each ``with_structured_output`` runnable built on
+it) is created once per (model, temperature, max_tokens, output schema) and
+reused by every caller, so HTTP connections are pooled and the output schema
+is converted to a tool definition only once. Per-model concurrency limits and
+call metrics are enforced by a LangChain callback attached to every client,
+so they also cover ReAct agents and streaming calls.
+
+Structured-output runnables for deterministic components (temperature at or
+below ``llm.cache.max_temperature``, or ``cache: true`` on the component) are
+wrapped with the persistent response cache from ``llm_cache``.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple, Type
+from uuid import UUID
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
+
+from idss_agent.utils.config import get_config
+from idss_agent.utils.llm_cache import CachedStructuredOutput, LLMResponseCache
+from idss_agent.utils.logger import get_logger
+
+logger = get_logger("utils.llm_registry")
+
+
+class LLMConcurrencyTimeout(TimeoutError):
+    """Raised when a call waits too long for a free per-model concurrency slot."""
+
+
+def _token_usage(response: Optional[LLMResult]) -> Tuple[int, int]:
+    """Prompt/completion tokens of a run (``llm_output`` for regular calls, message usage for streamed ones)."""
+    if response is None:
+        return 0, 0
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens", 0) or 0, usage.get("completion_tokens", 0) or 0
+
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt_tokens += metadata.get("input_tokens", 0) or 0
+            completion_tokens += metadata.get("output_tokens", 0) or 0
+    return prompt_tokens, completion_tokens
+
+
+class _ModelGate(BaseCallbackHandler):
+    """
+    Callback enforcing a per-model concurrency limit and collecting metrics.
+
+    A slot is acquired when a chat model run starts and released when it ends
+    or fails, so every invocation style (invoke, stream, agents) is covered.
+    """
+
+    raise_error = True
+
+    def __init__(self, model: str, max_concurrency: int, acquire_timeout: float):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._runs: Dict[UUID, float] = {}
+        self._stats: Dict[str, float] = {
+            "calls": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "latency_seconds": 0.0,
+            "max_latency_seconds": 0.0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        waited_from = time.monotonic()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise LLMConcurrencyTimeout(
+                f"Timed out after {self.acquire_timeout}s waiting for a {self.model} slot "
+                f"({self.max_concurrency} concurrent calls max)"
+            )
+        started = time.monotonic()
+        waited = started - waited_from
+
+        with self._lock:
+            self._runs[run_id] = started
+            self._stats["calls"] += 1
+            self._stats["in_flight"] += 1
+            self._stats["wait_seconds"] += waited
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+
+        if waited > 1.0:
+            logger.info("Waited %.2fs for a %s concurrency slot", waited, self.model)
+
+    def _finish(self, run_id: UUID, failed: bool, response: Optional[LLMResult] = None) -> None:
+        with self._lock:
+            started = self._runs.pop(run_id, None)
+            if started is None:
+                return
+            latency = time.monotonic() - started
+            self._stats["in_flight"] -= 1
+            self._stats["latency_seconds"] += latency
+            self._stats["max_latency_seconds"] = max(self._stats["max_latency_seconds"], latency)
+            if failed:
+                self._stats["errors"] += 1
+            prompt_tokens, completion_tokens = _token_usage(response)
+            self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["completion_tokens"] += completion_tokens
+        self._slots.release()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, failed=False, response=response)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id, failed=True)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        completed = stats["calls"] - stats["in_flight"]
+        stats["avg_latency_seconds"] = stats["latency_seconds"] / completed if completed else 0.0
+        stats["avg_wait_seconds"] = stats["wait_seconds"] / stats["calls"] if stats["calls"] else 0.0
+        stats["max_concurrency"] = self.max_concurrency
+        return stats
+
+
+class LLMClientRegistry:
+    """
+    Hands out shared ChatOpenAI clients and structured-output runnables.
+
+    Args:
+        max_connections: Size of the HTTP connection pool shared by all clients.
+        default_max_concurrency: Concurrent calls allowed per model by default.
+        model_concurrency: Per-model overrides of the concurrency limit.
+        acquire_timeout: Seconds a call may wait for a concurrency slot.
+        request_timeout: Per-request timeout passed to the OpenAI client.
+        response_cache: Optional persistent cache for structured-output calls.
+        cache_max_temperature: Highest temperature whose structured calls are
+            cached unless a component opts in or out explicitly.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 32,
+        default_max_concurrency: int = 8,
+        model_concurrency: Optional[Dict[str, int]] = None,
+        acquire_timeout: float = 60.0,
+        request_timeout: Optional[float] = None,
+        response_cache: Optional[LLMResponseCache] = None,
+        cache_max_temperature: float = 0.0,
+    ):
+        self.response_cache = response_cache
+        self.cache_max_temperature = cache_max_temperature
+        self.default_max_concurrency = default_max_concurrency
+        self.model_concurrency = dict(model_concurrency or {})
+        self.acquire_timeout = acquire_timeout
+        self.request_timeout = request_timeout
+
+        self._http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self._lock = threading.Lock()
+        self._gates: Dict[str, _ModelGate] = {}
+        self._clients: Dict[Tuple[str, float, Optional[int], bool], ChatOpenAI] = {}
+        self._structured: Dict[Tuple[str, float, Optional[int], Hashable, bool, bool], Runnable] = {}
+
+    def _gate(self, model: str) -> _ModelGate:
+        gate = self._gates.get(model)
+        if gate is None:
+            gate = _ModelGate(
+                model,
+                max(1, int(self.model_concurrency.get(model, self.default_max_concurrency))),
+                self.acquire_timeout,
+            )
+            self._gates[model] = gate
+        return gate
+
+    def chat_model(
+        self,
+        model: str,
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None,
+        streaming: bool = False,
+    ) -> ChatOpenAI:
+        """Return the shared ChatOpenAI client for these settings (``streaming`` emits tokens to callbacks)."""
+        key = (model, float(temperature), max_tokens, streaming)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = ChatOpenAI(
+                        model=model,
+                        temperature=temperature,
+                        max_tokens=max_tokens,
+                        timeout=self.request_timeout,
+                        http_client=self._http_client,
+                        callbacks=[self._gate(model)],
+                        **({"streaming": True, "stream_usage": True} if streaming else {}),
+                    )
+                    self._clients[key] = client
+                    logger.debug(
+                        "Created LLM client %s (temperature=%s, max_tokens=%s, streaming=%s)",
+                        model, temperature, max_tokens, streaming,
+                    )
+        return client
+
+    def structured(
+        self,
+        schema: Type[Any],
+        model: str,
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None,
+        cache: Optional[bool] = None,
+        streaming: bool = False,
+    ) -> Runnable:
+        """
+        Return the shared ``with_structured_output(schema)`` runnable for these settings.
+
+        ``cache`` forces the response cache on or off; by default only calls at or
+        below ``cache_max_temperature`` are cached. Record and replay modes cache
+        every structured call so a recorded fixture covers the whole turn.
+        """
+        use_cache = self.response_cache is not None and (
+            self.response_cache.mode != "read_write"
+            or (cache if cache is not None else temperature <= self.cache_max_temperature)
+        )
+        key = (model, float(temperature), max_tokens, schema, use_cache, streaming)
+        runnable = self._structured.get(key)
+        if runnable is None:
+            llm = self.chat_model(model, temperature, max_tokens, streaming)
+            with self._lock:
+                runnable = self._structured.get(key)
+                if runnable is None:
+                    runnable = llm.with_structured_output(schema)
+                    if use_cache:
+                        runnable = CachedStructuredOutput(
+                            runnable, self.response_cache, schema, model, temperature, max_tokens
+                        )
+                    self._structured[key] = runnable
+        return runnable
+
+    def for_component(
+        self,
+        component: str,
+        schema: Optional[Type[Any]] = None,
+        default_max_tokens: Optional[int] = None,
+        streaming: bool = False,
+    ) -> Any:
+        """
+        Return the client configured for a component in ``models:`` of agent_config.yaml.
+
+        Args:
+            component: Component name (e.g., 'interview', 'semantic_parser').
+            schema: Optional output schema; returns a structured-output runnable.
+            default_max_tokens: Used when the component omits ``max_tokens``.
+            streaming: Return a client that streams tokens to callbacks.
+        """
+        model_config = get_config().get_model_config(component)
+        model = model_config['name']
+        temperature = model_config['temperature']
+        max_tokens = model_config.get('max_tokens', default_max_tokens)
+
+        if schema is None:
+            return self.chat_model(model, temperature, max_tokens, streaming)
+        return self.structured(schema, model, temperature, max_tokens, model_config.get('cache'), streaming)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Return per-model call counts, latency, wait time and token usage."""
+        return {model: gate.snapshot() for model, gate in self._gates.items()}
+
+    def cache_metrics(self) -> Optional[Dict[str, Any]]:
+        """Return response cache counters, or None when the cache is disabled."""
+        return self.response_cache.metrics() if self.response_cache is not None else None
+
+    def close(self) -> None:
+        """Drop cached clients and close the shared HTTP connection pool and response cache."""
+        with self._lock:
+            self._clients.clear()
+            self._structured.clear()
+        self._http_client.close()
+        if self.response_cache is not None:
+            self.response_cache.close()
+
+
+def _build_response_cache() -> Optional[LLMResponseCache]:
+    """
+    Create the response cache from ``llm.cache``.
+
+    ``LLM_CACHE_MODE`` and ``LLM_CACHE_PATH`` override the config, so a benchmark
+    can record a fixture once and replay it offline without editing the YAML.
+    """
+    config = get_config()
+    mode = os.getenv("LLM_CACHE_MODE") or config.get('llm.cache.mode', 'read_write')
+    if mode == "off" or (not config.get('llm.cache.enabled', False) and not os.getenv("LLM_CACHE_MODE")):
+        return None
+
+    path = Path(os.getenv("LLM_CACHE_PATH") or config.get('llm.cache.path', 'data/cache/llm_responses.db'))
+    if not path.is_absolute():
+        path = Path(__file__).resolve().parent.parent.parent / path
+
+    logger.info("LLM response cache: %s (%s)", path, mode)
+    return LLMResponseCache(
+        path,
+        mode=mode,
+        ttl_seconds=config.get('llm.cache.ttl_seconds'),
+        max_entries=config.get('llm.cache.max_entries', 50000),
+    )
+
+
+_REGISTRY: Optional[LLMClientRegistry] = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def get_llm_registry() -> LLMClientRegistry:
+    """Return the process-wide LLM client registry, configured from the ``llm:`` section."""
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                config = get_config()
+                _REGISTRY = LLMClientRegistry(
+                    response_cache=_build_response_cache(),
+                    cache_max_temperature=config.get('llm.cache.max_temperature', 0.0),
+                    max_connections=config.get('llm.max_connections', 32),
+                    default_max_concurrency=config.get('llm.max_concurrency', 8),
+                    model_concurrency=config.get('llm.model_concurrency') or {},
+                    acquire_timeout=config.get('llm.acquire_timeout_seconds', 60),
+                    request_timeout=config.get('llm.request_timeout_seconds'),
+                )
+    return _REGISTRY
+
+
+def get_llm(
+    component: str,
+    schema: Optional[Type[Any]] = None,
+    default_max_tokens: Optional[int] = None,
+    streaming: bool = False,
+) -> Any:
+    """Shortcut for ``get_llm_registry().for_component(...)``."""
+    return get_llm_registry().for_component(component, schema, default_max_tokens, streaming)
+
+
+def close_llm_registry() -> None:
+    """Close the shared registry (API shutdown)."""
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is not None:
+            _REGISTRY.close()
+            _REGISTRY = None
+
+
+__all__ = [
+    "LLMClientRegistry",
+    "LLMConcurrencyTimeout",
+    "close_llm_registry",
+    "get_llm",
+    "get_llm_registry",
+]
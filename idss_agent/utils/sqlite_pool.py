@@ -0,0 +1,159 @@
+"""
+Bounded SQLite connection pool.
+
+Keeps a small set of warm connections to a single database file so request
+threads can reuse them instead of paying connect + schema parse + cold page
+cache on every query.
+"""
+from __future__ import annotations
+
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from idss_agent.utils.logger import get_logger
+
+logger = get_logger("utils.sqlite_pool")
+
+
+class SQLiteConnectionPool:
+    """
+    Thread-safe pool of SQLite connections for one database file.
+
+    Connections are handed out LIFO so the most recently used (warmest) one is
+    reused first. Each checkout runs a cheap health check and transparently
+    replaces broken connections.
+
+    Args:
+        db_path: Path to the SQLite database file.
+        max_size: Maximum number of concurrently open connections.
+        read_only: Open connections with ``mode=ro`` and ``PRAGMA query_only``.
+        mmap_size: Bytes of the database file to memory-map (0 disables mmap).
+        cache_size_kib: Page cache size per connection in KiB.
+        timeout: Seconds to wait for a free connection before giving up.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        max_size: int = 8,
+        read_only: bool = True,
+        mmap_size: int = 256 * 1024 * 1024,
+        cache_size_kib: int = 64 * 1024,
+        timeout: float = 30.0,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.max_size = max(1, int(max_size))
+        self.read_only = read_only
+        self.mmap_size = int(mmap_size)
+        self.cache_size_kib = int(cache_size_kib)
+        self.timeout = timeout
+
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        if self.read_only:
+            conn = sqlite3.connect(
+                f"{self.db_path.resolve().as_uri()}?mode=ro",
+                uri=True,
+                check_same_thread=False,
+            )
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+
+        conn.row_factory = sqlite3.Row
+        if self.read_only:
+            conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        conn.execute(f"PRAGMA cache_size = -{self.cache_size_kib}")
+        logger.debug("Opened SQLite connection to %s", self.db_path)
+        return conn
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _checkout(self) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.OperationalError(f"Connection pool for {self.db_path} is closed")
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(
+                f"Timed out after {self.timeout}s waiting for a connection to {self.db_path}"
+            )
+
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._open()
+
+                if self._is_healthy(conn):
+                    return conn
+
+                logger.warning("Discarding unhealthy SQLite connection to %s", self.db_path)
+                self._close_quietly(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _checkin(self, conn: sqlite3.Connection) -> None:
+        try:
+            if self._closed:
+                self._close_quietly(conn)
+            else:
+                if conn.in_transaction:
+                    conn.rollback()
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of the ``with`` block."""
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._checkin(conn)
+
+    def ping(self) -> bool:
+        """Return True if a pooled connection can execute a trivial query."""
+        try:
+            with self.connection() as conn:
+                return self._is_healthy(conn)
+        except sqlite3.Error:
+            return False
+
+    def close(self) -> None:
+        """Close idle connections and refuse new checkouts."""
+        self._closed = True
+        closed = 0
+        while True:
+            try:
+                conn: Optional[sqlite3.Connection] = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close_quietly(conn)
+            closed += 1
+        logger.info("Closed %d pooled SQLite connection(s) to %s", closed, self.db_path)
+
+
+__all__ = ["SQLiteConnectionPool"]
@@ -0,0 +1,221 @@
+"""
+Token streaming of the final response text.
+
+Response-generating stages stream their LLM output through the regular
+progress callback as ``response_delta`` updates, which the API forwards as
+``delta`` SSE events. Structured outputs arrive as JSON, so only the text of
+the response field (e.g. ``ai_response``) is extracted and forwarded.
+
+Each streamed generation starts with ``reset: true``: when a later stage (or
+a later ReAct step) replaces the text, clients discard what they have shown.
+``finish`` makes the streamed text end up equal to the final response, even
+when the response came from a cache or was post-processed.
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import Runnable
+
+from idss_agent.utils.config import get_config
+from idss_agent.utils.logger import get_logger
+
+logger = get_logger("utils.streaming")
+
+RESPONSE_DELTA_STEP = "response_delta"
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+def is_response_delta(update: Dict[str, Any]) -> bool:
+    """True if a progress update carries streamed response text."""
+    return update.get("step_id") == RESPONSE_DELTA_STEP
+
+
+def token_streaming_enabled(progress_callback: Optional[Callable[[dict], None]]) -> bool:
+    """Stream only when someone is listening and ``features.enable_token_streaming`` is on."""
+    return progress_callback is not None and get_config().features.get('enable_token_streaming', True)
+
+
+class _JsonStringField:
+    """Incrementally decodes the value of one string field from a JSON token stream."""
+
+    def __init__(self, field: str):
+        self._start = re.compile(r'"%s"\s*:\s*"' % re.escape(field))
+        self._buffer = ""
+        self._in_string = False
+        self.done = False
+
+    def feed(self, text: str) -> str:
+        if self.done:
+            return ""
+        self._buffer += text
+
+        if not self._in_string:
+            match = self._start.search(self._buffer)
+            if not match:
+                return ""
+            self._buffer = self._buffer[match.end():]
+            self._in_string = True
+
+        buffer = self._buffer
+        out: List[str] = []
+        i = 0
+        while i < len(buffer):
+            char = buffer[i]
+            if char == '"':
+                self.done = True
+                i += 1
+                break
+            if char != '\\':
+                out.append(char)
+                i += 1
+                continue
+
+            # Escape sequence: wait for the rest of it if it is split across tokens
+            if i + 1 >= len(buffer):
+                break
+            escape = buffer[i + 1]
+            if escape != 'u':
+                out.append(_ESCAPES.get(escape, escape))
+                i += 2
+                continue
+            if i + 6 > len(buffer):
+                break
+            code = int(buffer[i + 2:i + 6], 16)
+            if 0xD800 <= code <= 0xDBFF:
+                if i + 12 > len(buffer):
+                    break
+                if buffer[i + 6:i + 8] == '\\u':
+                    low = int(buffer[i + 8:i + 12], 16)
+                    out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                    continue
+            out.append(chr(code))
+            i += 6
+
+        self._buffer = buffer[i:]
+        return "".join(out)
+
+
+class ResponseStreamer(BaseCallbackHandler):
+    """
+    LangChain callback forwarding generated response text as ``response_delta`` updates.
+
+    Args:
+        progress_callback: Progress callback receiving the delta updates.
+        field: JSON field holding the response in structured output, or None
+            for plain-text models.
+        json_fallback_field: For plain-text models: if a generation starts with
+            JSON (e.g. a comparison payload), stream this field instead.
+    """
+
+    def __init__(
+        self,
+        progress_callback: Callable[[dict], None],
+        field: Optional[str] = "ai_response",
+        json_fallback_field: Optional[str] = None,
+    ):
+        self.progress_callback = progress_callback
+        self.field = field
+        self.json_fallback_field = json_fallback_field
+        self._run_id: Optional[UUID] = None
+        self._extractor: Optional[_JsonStringField] = None
+        self._pending = ""
+        self._plain = False
+        self._stopped = False
+        self._streamed = ""
+        self._reset_sent = False
+
+    def _emit(self, text: str, reset: bool = False) -> None:
+        if not text and not reset:
+            return
+        reset = reset or not self._reset_sent
+        self._reset_sent = True
+        self._streamed = text if reset else self._streamed + text
+        try:
+            self.progress_callback({"step_id": RESPONSE_DELTA_STEP, "text": text, "reset": reset})
+        except Exception as e:
+            logger.debug(f"Dropping response delta: {e}")
+
+    def _start_generation(self, run_id: UUID) -> None:
+        self._run_id = run_id
+        self._extractor = _JsonStringField(self.field) if self.field else None
+        self._pending = ""
+        self._plain = False
+        self._stopped = False
+        self._reset_sent = False
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        if run_id != self._run_id:
+            self._start_generation(run_id)
+        if self._stopped or not token:
+            return
+
+        if self._extractor is not None:
+            self._emit(self._extractor.feed(token))
+            return
+
+        if not self._plain:
+            # Plain-text model: decide from the first visible characters whether it is JSON
+            self._pending += token
+            stripped = self._pending.lstrip()
+            if not stripped:
+                return
+            if stripped[0] in "{`":
+                if self.json_fallback_field:
+                    self._extractor = _JsonStringField(self.json_fallback_field)
+                    self._emit(self._extractor.feed(self._pending))
+                else:
+                    self._stopped = True
+                return
+            self._plain = True
+            token, self._pending = self._pending, ""
+
+        # Stop at an embedded code block; the final response replaces it in finish()
+        tail = self._streamed[-2:] + token
+        if "```" in tail:
+            self._emit(token[:max(0, tail.index("```") - len(tail) + len(token))])
+            self._stopped = True
+            return
+        self._emit(token)
+
+    def finish(self, final_text: Optional[str]) -> None:
+        """Emit whatever the stream is missing so it ends equal to ``final_text``."""
+        if not final_text:
+            return
+        if self._reset_sent and final_text.startswith(self._streamed):
+            self._emit(final_text[len(self._streamed):])
+        else:
+            self._emit(final_text, reset=True)
+
+
+def invoke_streaming(
+    runnable: Runnable,
+    messages: Any,
+    progress_callback: Optional[Callable[[dict], None]],
+    field: str = "ai_response",
+) -> Any:
+    """
+    Invoke a structured-output runnable, streaming its ``field`` as it is generated.
+
+    The runnable should come from ``get_llm(..., streaming=True)``; without a
+    listener (or with streaming disabled) this is a plain ``invoke``.
+    """
+    if not token_streaming_enabled(progress_callback):
+        return runnable.invoke(messages)
+
+    streamer = ResponseStreamer(progress_callback, field)
+    result = runnable.invoke(messages, config={"callbacks": [streamer]})
+    streamer.finish(getattr(result, field, None))
+    return result
+
+
+__all__ = [
+    "RESPONSE_DELTA_STEP",
+    "ResponseStreamer",
+    "invoke_streaming",
+    "is_response_delta",
+    "token_streaming_enabled",
+]
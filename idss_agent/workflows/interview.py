@@ -6,11 +6,12 @@ This workflow runs until the interview is complete (threshold reached or user re
 import os
 from typing import Any, Optional, Callable
 from pydantic import BaseModel, Field
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from langgraph.graph import StateGraph, END
 from idss_agent.utils.logger import get_logger
 from idss_agent.utils.config import get_config
+from idss_agent.utils.llm_registry import get_llm
+from idss_agent.utils.streaming import invoke_streaming, token_streaming_enabled
 from idss_agent.utils.prompts import render_prompt
 from idss_agent.state.schema import (
     VehicleSearchState,
@@ -134,16 +135,13 @@ def interview_node(state: VehicleSearchState) -> VehicleSearchState:
 
     # Get configuration
     config = get_config()
-    model_config = config.get_model_config('interview')
     max_history = config.limits.get('max_conversation_history', 10)
 
-    # Create LLM with config parameters
-    llm = ChatOpenAI(
-        model=model_config['name'],
-        temperature=model_config['temperature'],
-        max_tokens=model_config.get('max_tokens', 1000)
+    # Shared LLM client with config parameters
+    structured_llm = get_llm(
+        'interview', InterviewResponse, default_max_tokens=1000,
+        streaming=token_streaming_enabled(progress_callback),
     )
-    structured_llm = llm.with_structured_output(InterviewResponse)
 
     # Load system prompt from template
     system_prompt = render_prompt('interview_system.j2')
@@ -157,7 +155,7 @@ def interview_node(state: VehicleSearchState) -> VehicleSearchState:
     messages.extend(conversation_history)
 
     # Get structured response
-    response: InterviewResponse = structured_llm.invoke(messages)
+    response: InterviewResponse = invoke_streaming(structured_llm, messages, progress_callback)
 
     # Store decision
     state["_interview_should_end"] = response.should_end
@@ -221,17 +219,8 @@ def make_initial_recommendation(state: VehicleSearchState) -> VehicleSearchState
         for msg in state.get("conversation_history", [])
     ])
 
-    # Get configuration
-    config = get_config()
-    model_config = config.get_model_config('interview_extraction')
-
-    # Create LLM with config parameters
-    llm = ChatOpenAI(
-        model=model_config['name'],
-        temperature=model_config['temperature'],
-        max_tokens=model_config.get('max_tokens', 2000)
-    )
-    structured_llm = llm.with_structured_output(ExtractionResult)
+    # Shared LLM client with config parameters
+    structured_llm = get_llm('interview_extraction', ExtractionResult, default_max_tokens=2000)
 
     # Load extraction prompt from template
     extraction_system_prompt = render_prompt('interview_extraction.j2')
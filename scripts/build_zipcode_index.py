@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Build the binary ZIP code index from zip_code_database.csv.
+
+The index (data/zip_code_index.bin) holds sorted int32 ZIPs, float32
+latitude/longitude arrays, interned city/state ids and the grid ordering used
+for nearest-ZIP lookups. The API memory-maps it at startup instead of parsing
+the CSV. Re-run after updating the CSV.
+
+Usage:
+    python scripts/build_zipcode_index.py
+    python scripts/build_zipcode_index.py --csv path/to/zip_code_database.csv --output path/to/zip_code_index.bin
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from idss_agent.tools.zipcode_lookup import (
+    ZIPCODE_CSV_PATH,
+    ZIPCODE_INDEX_PATH,
+    ZipCodeIndex,
+    ZipCodeTable,
+    build_zipcode_index,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", type=Path, default=ZIPCODE_CSV_PATH, help="ZIP code CSV")
+    parser.add_argument("--output", type=Path, default=ZIPCODE_INDEX_PATH, help="Binary index to write")
+    args = parser.parse_args()
+
+    print(f"Reading from: {args.csv}")
+    print(f"Writing to: {args.output}")
+
+    start = time.perf_counter()
+    count = build_zipcode_index(args.csv, args.output)
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✓ Index built in {elapsed:.2f}s")
+    print(f"  ZIP codes: {count}")
+    print(f"  Size: {args.output.stat().st_size / 1024:.1f} KB")
+
+    # Test lookups against the written file
+    table = ZipCodeTable.load(args.output)
+    result = table.lookup(94043)
+    if result:
+        print(f"\n✓ Test lookup for ZIP 94043:")
+        print(f"  City: {result[2]}, {result[3]}")
+        print(f"  Coordinates: {result[0]}, {result[1]}")
+
+        nearest = ZipCodeIndex(table).nearest(result[0], result[1], max_distance_miles=50)
+        if nearest:
+            print(f"  Nearest ZIP to those coordinates: {nearest[0]} ({nearest[1]:.2f} mi)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Apply search optimizations to the local vehicle database (uni_vehicles.db).
+
+Run once after downloading or refreshing the dataset:
+    python scripts/migrate_vehicle_db.py
+    python scripts/migrate_vehicle_db.py --db data/car_dataset_idss/uni_vehicles.db --only spatial_index
+
+Steps:
+    spatial_index      - R*Tree index over dealer coordinates for radius searches
+    search_indexes     - UPPER(column) expression and composite indexes for filtered searches
+    binary_embeddings  - convert JSON embeddings to packed token-id/weight BLOBs
+    analyze            - refresh query planner statistics
+    dataset_version    - stamp a new dataset version so running servers drop cached
+                         search results and reload the catalog index (always runs last;
+                         use --only dataset_version after refreshing listings by other means)
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from idss_agent.tools.local_vehicle_store import (
+    DEFAULT_DB_PATH,
+    analyze_database,
+    build_search_indexes,
+    build_spatial_index,
+    stamp_dataset_version,
+)
+from idss_agent.processing.vector_ranker import migrate_json_embeddings
+
+
+MIGRATION_STEPS = {
+    "spatial_index": build_spatial_index,
+    "search_indexes": build_search_indexes,
+    "binary_embeddings": migrate_json_embeddings,
+    "analyze": analyze_database,
+    "dataset_version": stamp_dataset_version,
+}
+
+
+def main():
+    """Main entry point for the migration script."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB_PATH, help="Path to uni_vehicles.db")
+    parser.add_argument(
+        "--only",
+        action="append",
+        choices=sorted(MIGRATION_STEPS),
+        help="Run only the given step (repeatable). Default: all steps.",
+    )
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"Database not found: {args.db}", file=sys.stderr)
+        sys.exit(1)
+
+    # Run in MIGRATION_STEPS order so ANALYZE sees the final set of indexes; the
+    # version stamp always comes last so caches never outlive a migrated dataset
+    steps = [name for name in MIGRATION_STEPS if not args.only or name in args.only]
+    if "dataset_version" not in steps:
+        steps.append("dataset_version")
+    print(f"Migrating {args.db}")
+
+    for name in steps:
+        started = time.time()
+        result = MIGRATION_STEPS[name](args.db)
+        print(f"  ✓ {name}: {result} ({time.time() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Precompute vehicle embeddings for the whole local catalog.
+
+Walks unified_vehicle_listings in rowid order, computes _embed_vehicle vectors
+in worker processes and writes them to vehicle_embedding_vectors in bulk transactions,
+so the request path never has to embed or write.
+
+Usage:
+    python scripts/precompute_embeddings.py
+    python scripts/precompute_embeddings.py --workers 8 --batch-size 5000
+    python scripts/precompute_embeddings.py --restart   # ignore saved progress
+
+The job is resumable: the last committed rowid is checkpointed after every
+batch. Listings whose embedding inputs are unchanged (same source hash) are
+skipped, so it is cheap to re-run after each dataset refresh.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from idss_agent.tools.local_vehicle_store import DEFAULT_DB_PATH, LocalVehicleStore, stamp_dataset_version
+from idss_agent.processing.vector_ranker import (
+    VehicleEmbeddingStore,
+    _embed_vehicle,
+    embedding_source_hash,
+)
+
+JOB_NAME = "precompute_embeddings"
+
+
+def _ensure_progress_table(db_path: Path) -> None:
+    with closing(sqlite3.connect(db_path)) as conn, conn:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS vehicle_embedding_jobs (
+                name TEXT PRIMARY KEY,
+                last_rowid INTEGER NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        )
+
+
+def _load_checkpoint(db_path: Path) -> int:
+    with closing(sqlite3.connect(db_path)) as conn:
+        row = conn.execute(
+            "SELECT last_rowid FROM vehicle_embedding_jobs WHERE name = ?", (JOB_NAME,)
+        ).fetchone()
+    return int(row[0]) if row else 0
+
+
+def _save_checkpoint(db_path: Path, last_rowid: int) -> None:
+    with closing(sqlite3.connect(db_path)) as conn, conn:
+        conn.execute(
+            """
+            INSERT INTO vehicle_embedding_jobs (name, last_rowid, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(name) DO UPDATE
+            SET last_rowid = excluded.last_rowid,
+                updated_at = CURRENT_TIMESTAMP
+            """,
+            (JOB_NAME, last_rowid),
+        )
+
+
+def _embed_chunk(items: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, float], str]]:
+    """Worker: embed a list of (vin, payload) pairs."""
+    results = []
+    for vin, vehicle in items:
+        embedding = _embed_vehicle(vehicle)
+        if embedding:
+            results.append((vin, embedding, embedding_source_hash(vehicle)))
+    return results
+
+
+def _split(items: List[Any], parts: int) -> List[List[Any]]:
+    size = max(1, -(-len(items) // parts))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def precompute_embeddings(
+    db_path: Path,
+    batch_size: int = 2000,
+    workers: int = 1,
+    restart: bool = False,
+    force: bool = False,
+) -> Dict[str, int]:
+    """
+    Compute and store embeddings for every listing in the catalog.
+
+    Args:
+        db_path: Path to uni_vehicles.db.
+        batch_size: Listings read and committed per batch.
+        workers: Number of worker processes used for embedding.
+        restart: Ignore the saved checkpoint and start from the first rowid.
+        force: Recompute embeddings even when the source hash is unchanged.
+
+    Returns:
+        Counters for scanned, embedded and skipped listings.
+    """
+    listing_store = LocalVehicleStore(db_path=db_path, require_photos=False, include_raw_json=False)
+    embedding_store = VehicleEmbeddingStore(db_path)
+    _ensure_progress_table(db_path)
+
+    start_rowid = 0 if restart else _load_checkpoint(db_path)
+    if start_rowid:
+        print(f"Resuming after rowid {start_rowid}")
+
+    stats = {"scanned": 0, "embedded": 0, "skipped": 0}
+    started = time.time()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in listing_store.iter_listing_batches(batch_size=batch_size, after_rowid=start_rowid):
+            # Plain dicts only: workers need just the normalized fields
+            items = [
+                (payload["vin"], {"vehicle": payload["vehicle"], "retailListing": payload["retailListing"]})
+                for _, payload in batch
+                if payload and payload.get("vin")
+            ]
+            stats["scanned"] += len(batch)
+
+            if not force:
+                existing = embedding_store.get_source_hashes(vin for vin, _ in items)
+                pending = [
+                    (vin, vehicle) for vin, vehicle in items
+                    if existing.get(vin) != embedding_source_hash(vehicle)
+                ]
+                stats["skipped"] += len(items) - len(pending)
+                items = pending
+
+            if items:
+                embeddings: Dict[str, Dict[str, float]] = {}
+                source_hashes: Dict[str, str] = {}
+                for chunk_result in executor.map(_embed_chunk, _split(items, workers)):
+                    for vin, embedding, source_hash in chunk_result:
+                        embeddings[vin] = embedding
+                        source_hashes[vin] = source_hash
+
+                embedding_store.upsert_many(embeddings, source_hashes)
+                stats["embedded"] += len(embeddings)
+
+            _save_checkpoint(db_path, batch[-1][0])
+
+            elapsed = time.time() - started
+            print(
+                f"  rowid <= {batch[-1][0]}: scanned {stats['scanned']}, "
+                f"embedded {stats['embedded']}, skipped {stats['skipped']} ({elapsed:.1f}s)"
+            )
+
+    # Finished a full pass: the next run (e.g. after a refresh) starts from the top
+    _save_checkpoint(db_path, 0)
+    if stats["embedded"]:
+        # Running servers rebuild their catalog index to pick up the new embeddings
+        stamp_dataset_version(db_path)
+
+    listing_store.close()
+    embedding_store.close()
+    return stats
+
+
+def main():
+    """Main entry point for the precompute job."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB_PATH, help="Path to uni_vehicles.db")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Listings per batch/transaction")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--restart", action="store_true", help="Ignore saved progress and start over")
+    parser.add_argument("--force", action="store_true", help="Recompute unchanged listings too")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        print(f"Database not found: {args.db}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Precomputing embeddings for {args.db} with {args.workers} worker(s)")
+    stats = precompute_embeddings(
+        args.db,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        restart=args.restart,
+        force=args.force,
+    )
+    print(f"\n✓ Done: scanned {stats['scanned']}, embedded {stats['embedded']}, skipped {stats['skipped']}")
+
+
+if __name__ == "__main__":
+    main()
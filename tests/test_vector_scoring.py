@@ -0,0 +1,101 @@
+"""
+Equivalence test for the vectorized vector-ranker scoring path.
+
+Scores synthetic listings with both the NumPy CSR path (_score_candidates /
+_rank_order) and the reference dict implementation (_cosine_similarity). The
+embeddings round-trip through a VehicleEmbeddingStore on a temporary SQLite
+file, so the packed BLOB encoding is covered too; the catalog is never touched.
+"""
+import random
+import sqlite3
+
+import pytest
+
+from idss_agent.processing.vector_ranker import (
+    VehicleEmbeddingStore,
+    _build_user_vector,
+    _cosine_similarity,
+    _dense_user_vector,
+    _embed_vehicle,
+    _rank_order,
+    _score_candidates,
+)
+
+# (explicit_filters, implicit_preferences) pairs covering filter and preference tokens
+PREFERENCE_CASES = [
+    ({"make": "Toyota", "body_style": "SUV"}, {"priorities": ["fuel efficiency"]}),
+    ({"price": "15000-30000", "year": "2018-2022"}, {"usage_patterns": "daily commute"}),
+    ({"fuel_type": "Electric"}, {"priorities": ["technology", "safety"], "lifestyle": "city"}),
+    ({"drivetrain": "AWD", "exterior_color": "Black"}, {"concerns": ["reliability"]}),
+    ({"make": "NoSuchMake"}, {}),
+]
+
+TOLERANCE = 1e-5
+SAMPLE_SIZE = 1000
+TOP_K = 20
+
+MAKES = {
+    "Toyota": ["Camry", "Corolla", "RAV4", "Highlander"],
+    "Honda": ["Civic", "Accord", "CR-V"],
+    "Ford": ["F-150", "Escape", "Mustang"],
+    "Tesla": ["Model 3", "Model Y"],
+}
+
+
+def _synthetic_listing(rng: random.Random, index: int) -> dict:
+    make = rng.choice(list(MAKES))
+    return {
+        "vin": f"TESTVIN{index:010d}",
+        "vehicle": {
+            "make": make,
+            "model": rng.choice(MAKES[make]),
+            "trim": rng.choice(["Base", "LE", "Sport", "Limited", None]),
+            "fuel": rng.choice(["Gasoline", "Hybrid", "Electric"]),
+            "drivetrain": rng.choice(["FWD", "AWD", "RWD"]),
+            "transmission": rng.choice(["Automatic", "Manual"]),
+            "exteriorColor": rng.choice(["Black", "White", "Silver", "Blue"]),
+            "bodyStyle": rng.choice(["SUV", "Sedan", "Truck", "Coupe"]),
+            "doors": rng.choice([2, 4]),
+            "seats": rng.choice([5, 7]),
+            "year": rng.randint(2012, 2024),
+        },
+        "retailListing": {
+            "price": rng.randint(8000, 70000),
+            "miles": rng.randint(0, 120000),
+            "state": rng.choice(["CA", "NY", "TX"]),
+            "city": rng.choice(["Oakland", "Austin", "Buffalo"]),
+        },
+    }
+
+
+@pytest.fixture(scope="module")
+def scored_listings(tmp_path_factory):
+    db_path = tmp_path_factory.mktemp("embeddings") / "embeddings.db"
+    sqlite3.connect(db_path).close()
+    store = VehicleEmbeddingStore(db_path)
+
+    rng = random.Random(7)
+    vehicles = [_synthetic_listing(rng, index) for index in range(SAMPLE_SIZE)]
+    embeddings = {vehicle["vin"]: _embed_vehicle(vehicle) for vehicle in vehicles}
+    store.upsert_many(embeddings)
+
+    stored = store.get_vectors(embeddings)
+    vectors = [stored[vehicle["vin"]] for vehicle in vehicles]
+    yield store, vehicles, embeddings, vectors
+    store.close()
+
+
+@pytest.mark.parametrize("explicit, implicit", PREFERENCE_CASES)
+def test_vectorized_scores_match_reference(scored_listings, explicit, implicit):
+    store, vehicles, embeddings, vectors = scored_listings
+    user_vector = _build_user_vector(explicit, implicit)
+
+    expected = [_cosine_similarity(user_vector, embeddings[vehicle["vin"]]) for vehicle in vehicles]
+    actual = _score_candidates(_dense_user_vector(store, user_vector), vectors)
+
+    assert max(abs(a - e) for a, e in zip(actual, expected)) <= TOLERANCE
+
+    # Ties within float32 rounding may legitimately swap, so compare the score sequence
+    expected_top = sorted(expected, reverse=True)[:TOP_K]
+    actual_top = [expected[index] for index in _rank_order(actual, TOP_K)[:TOP_K]]
+    assert max(abs(a - e) for a, e in zip(actual_top, expected_top)) <= TOLERANCE
@@ -254,7 +254,11 @@ export default function Home() {
   }, [chatMessages, isLoading]);
 
   // Helper function to handle streaming response
-  const handleStreamingResponse = async (response: Response) => {
+  // onDelta receives the response text as it is generated (reset = replace what was shown)
+  const handleStreamingResponse = async (
+    response: Response,
+    onDelta?: (text: string, reset: boolean) => void
+  ) => {
     const reader = response.body?.getReader();
     const decoder = new TextDecoder();
 
@@ -297,6 +301,13 @@ export default function Home() {
             } catch (e) {
               console.error('Error parsing progress data:', e);
             }
+          } else if (currentEventType === 'delta') {
+            try {
+              const deltaData = JSON.parse(dataStr);
+              onDelta?.(deltaData.text || '', Boolean(deltaData.reset));
+            } catch (e) {
+              console.error('Error parsing delta data:', e);
+            }
           } else if (currentEventType === 'complete' && hasCompleted) {
             try {
               finalData = JSON.parse(dataStr);
@@ -346,6 +357,19 @@ export default function Home() {
       requestBody.longitude = userLocation.longitude;
     }
 
+    // Placeholder assistant message filled in as response text streams in
+    const streamingId = `${Date.now()}-stream`;
+    let streamedText = '';
+    const handleDelta = (text: string, reset: boolean) => {
+      streamedText = reset ? text : streamedText + text;
+      const content = streamedText;
+      setChatMessages(prev =>
+        prev.some(m => m.id === streamingId)
+          ? prev.map(m => (m.id === streamingId ? { ...m, content } : m))
+          : [...prev, { id: streamingId, role: 'assistant' as const, content, timestamp: new Date() }]
+      );
+    };
+
     try {
       // Send message to streaming endpoint
       const response = await fetch('/api/chat/stream', {
@@ -362,7 +386,7 @@ export default function Home() {
       }
 
       // Handle streaming response
-      const data = await handleStreamingResponse(response);
+      const data = await handleStreamingResponse(response, handleDelta);
       
       // Update session ID
       if (data.session_id) {
@@ -391,7 +415,8 @@ export default function Home() {
         suggested_followups: data.suggested_followups || [],
         comparison_table: data.comparison_table || null
       };
-      setChatMessages(prev => [...prev, assistantMessage]);
+      // Replace the streamed placeholder with the final, formatted message
+      setChatMessages(prev => [...prev.filter(m => m.id !== streamingId), assistantMessage]);
 
       // Update vehicles - convert API format to our format
       if (data.vehicles && data.vehicles.length > 0) {
@@ -412,7 +437,7 @@ export default function Home() {
         content: `Sorry, I ran into an issue. Mind trying again?`,
         timestamp: new Date()
       };
-      setChatMessages(prev => [...prev, errorMessage]);
+      setChatMessages(prev => [...prev.filter(m => m.id !== streamingId), errorMessage]);
     } finally {
       setIsLoading(false);
       stop(); // Stop verbose loading